@@ -0,0 +1,92 @@
+# Article parsing (newspaper3k) off the download threads.
+#
+# Article.parse() is lxml plus newspaper's pure-Python extraction heuristics. Run inline in
+# the scraper's download threads it holds the GIL, so once pages arrive quickly parsing
+# caps the whole fetch engine at one core. ParsePool sends each downloaded page to a pool of
+# worker processes instead; the download thread waits for the result without holding the
+# GIL and the parsed fields come back as a small picklable ParsedArticle, which the keyword
+# and quota filters take like a newspaper Article. At most max_in_flight pages are queued
+# or being parsed at a time, which bounds the HTML held in memory.
+#
+# Workers are started with "spawn": the scraper forks from a process full of threads
+# (downloads, sqlite stores), which fork does not handle safely.
+import collections
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from newspaper import Article
+
+# Worker processes; 0 parses inline in the download threads, the default on a single core
+# where a pool only adds pickling
+PARSE_WORKERS = os.cpu_count() if (os.cpu_count() or 1) > 1 else 0
+MAX_PARSE_IN_FLIGHT = 32              # pages submitted to the pool and not parsed yet
+
+# The fields of a parsed newspaper Article the scraper uses
+ParsedArticle = collections.namedtuple("ParsedArticle", ["url", "title", "text", "publish_date", "canonical_link"])
+
+def parse_article_html(url, html):
+    # Parse one downloaded page; None if newspaper fails on it
+    try:
+        article = Article(url)
+        article.download(input_html=html)
+        article.parse()
+    except Exception:
+        return None
+    return ParsedArticle(url, article.title, article.text, article.publish_date, article.canonical_link)
+
+class ParsePool:
+    def __init__(self, workers=PARSE_WORKERS, max_in_flight=MAX_PARSE_IN_FLIGHT):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.parsed = 0
+        self.failed = 0
+        self.slot_wait = 0.0
+        self.lock = threading.Lock()
+
+    def submit(self, url, html):
+        # Future of parse_article_html(url, html); blocks while max_in_flight pages are pending
+        start = time.perf_counter()
+        self.slots.acquire()
+        waited = time.perf_counter() - start
+        try:
+            future = self.executor.submit(parse_article_html, url, html)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(self._done)
+        with self.lock:
+            self.slot_wait += waited
+        return future
+
+    def _done(self, future):
+        self.slots.release()
+        with self.lock:
+            if not future.cancelled() and future.exception() is None and future.result() is not None:
+                self.parsed += 1
+            else:
+                self.failed += 1
+
+    def parse(self, url, html):
+        # Blocking parse for a download thread; None on failure, like parse_article_html
+        try:
+            return self.submit(url, html).result()
+        except Exception as e:
+            print(f"Error parsing {url} in worker process: {e}")
+            return None
+
+    def summary(self):
+        return (f"parse pool: {self.parsed} pages parsed, {self.failed} failed, {self.workers} worker processes, "
+                f"{self.slot_wait:.1f}s waiting for an in-flight slot")
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,352 @@
+# Streaming CSV output for the scrapers, and a reader that tails it.
+#
+# ArticleWriter appends rows in batches instead of collecting a whole run in memory. Rows
+# go to "<file>.partial"; every commit writes the buffered batch, fsyncs it and records
+# the byte offset of the last complete row in the "<file>.committed" sidecar (temp file
+# plus rename). When a file is finished (on close, or on rotation by size or by day) the
+# partial file is renamed to its final name, so a file under a final name is always
+# complete. After a crash the next writer truncates the partial file to its committed
+# offset and continues it; at most one batch is lost, never a half-written row.
+#
+# An appending writer without rotation leaves the published file in place instead, so
+# readers can open it for the whole run: every commit copies it to "<file>.tmp", appends
+# the batch, fsyncs and renames the copy over it.
+#
+# With a dataset directory every committed batch is also appended to that Parquet dataset
+# (storage.write_rows), for stages that read Parquet.
+#
+# ArticleTail returns the rows committed since its last call, across rotated files, by
+# remembering a byte offset per file: finished files are read to the end, the partial
+# file up to its committed offset. A file replaced by a copy with rows appended is
+# recognised by the bytes before the offset and read on from there.
+#
+#   python article_writer.py news_bias_articles.csv --follow
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+BATCH_SIZE = 50          # rows buffered in memory before a commit
+COMMIT_INTERVAL = 30.0   # seconds; a write() after this long commits even a partial batch
+PARTIAL_SUFFIX = ".partial"
+COMMITTED_SUFFIX = ".committed"
+PUBLISH_SUFFIX = ".tmp"
+FINGERPRINT_BYTES = 256  # bytes before a tail's offset that identify the file it read
+
+def segment_pattern(path):
+    # Rotated files are <stem>-<YYYYMMDD>-<NNN><ext>, next to path
+    stem, ext = os.path.splitext(path)
+    return re.compile(re.escape(os.path.basename(stem)) + r"-(\d{8})-(\d{3})" + re.escape(ext) + "$")
+
+def segments(path):
+    # (final name, file on disk, committed offset or None if finished) for path and its
+    # rotated files, oldest first
+    directory = os.path.dirname(path) or "."
+    pattern = segment_pattern(path)
+    names = [path] + sorted(
+        os.path.join(directory, name[:-len(PARTIAL_SUFFIX)] if name.endswith(PARTIAL_SUFFIX) else name)
+        for name in os.listdir(directory)
+        if pattern.match(name[:-len(PARTIAL_SUFFIX)] if name.endswith(PARTIAL_SUFFIX) else name)
+    )
+    found = []
+    for name in dict.fromkeys(names):
+        if os.path.exists(name + PARTIAL_SUFFIX):
+            found.append((name, name + PARTIAL_SUFFIX, read_committed(name)))
+        elif os.path.exists(name):
+            found.append((name, name, None))
+    return found
+
+def read_committed(name):
+    try:
+        with open(name + COMMITTED_SUFFIX, encoding="utf-8") as f:
+            return json.load(f)["offset"]
+    except (OSError, ValueError, KeyError):
+        return 0
+
+def write_committed(name, offset):
+    tmp_path = name + COMMITTED_SUFFIX + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"offset": offset}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, name + COMMITTED_SUFFIX)
+
+class ArticleWriter:
+    # rotate_bytes / rotate_daily switch from the single file `path` to rotated files next
+    # to it. append=False replaces `path` when the writer closes (the scraper's one-shot
+    # runs); append=True continues the existing file, in place unless rotating.
+    def __init__(self, path, columns, batch_size=BATCH_SIZE, commit_interval=COMMIT_INTERVAL,
+                 rotate_bytes=None, rotate_daily=False, append=False, dataset=None):
+        self.path = path
+        self.columns = list(columns)
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_daily = rotate_daily
+        self.rotating = bool(rotate_bytes or rotate_daily)
+        self.append = append
+        self.dataset = dataset
+        if dataset:
+            from storage import write_rows
+            self.write_dataset = write_rows
+        self.buffer = []
+        self.files = []
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.commits = 0
+        self.recovered_bytes = 0
+        self.last_commit = time.monotonic()
+        header = io.StringIO()
+        csv.writer(header).writerow(self.columns)
+        self.header = header.getvalue().encode("utf-8")
+        self.lock = threading.Lock()
+        self.file = None
+        self.closed = False
+        self._open(self._resume_name() or self._next_name())
+
+    def _next_name(self):
+        if not self.rotating:
+            return self.path
+        day = time.strftime("%Y%m%d")
+        directory = os.path.dirname(self.path) or "."
+        pattern = segment_pattern(self.path)
+        taken = [int(m.group(2)) for m in (pattern.match(name.split(PARTIAL_SUFFIX)[0]) for name in os.listdir(directory))
+                 if m and m.group(1) == day]
+        stem, ext = os.path.splitext(self.path)
+        return f"{stem}-{day}-{max(taken, default=-1) + 1:03d}{ext}"
+
+    def _resume_name(self):
+        # The partial file an interrupted writer left behind, if any; rotated partial files
+        # from an earlier day are finished off instead of continued
+        partial = [(name, disk) for name, disk, committed in segments(self.path) if committed is not None]
+        if not self.rotating:
+            partial = [(name, disk) for name, disk in partial if name == self.path]
+        for name, _ in partial[:-1]:
+            self._recover(name)
+            self._finish(name)
+        if not partial:
+            return None
+        name = partial[-1][0]
+        if self.rotate_daily and segment_pattern(self.path).match(os.path.basename(name)).group(1) != time.strftime("%Y%m%d"):
+            self._recover(name)
+            self._finish(name)
+            return None
+        return name
+
+    def _recover(self, name):
+        # Cut an interrupted partial file back to its last committed row
+        committed = read_committed(name)
+        size = os.path.getsize(name + PARTIAL_SUFFIX)
+        if size > committed:
+            os.truncate(name + PARTIAL_SUFFIX, committed)
+        self.recovered_bytes += committed
+        return committed
+
+    def _open(self, name):
+        self.name = name
+        partial = name + PARTIAL_SUFFIX
+        self.segment_rows = 0
+        self.opened_day = time.strftime("%Y%m%d")
+        self.publishing = False
+        if os.path.exists(partial):
+            self.offset = self._recover(name)
+            print(f"Continuing interrupted {partial} ({self.offset / 1024:.1f} KB committed)")
+        elif self.append and not self.rotating:
+            # Batches are appended to the published file itself (see _publish)
+            self.publishing = True
+            self.offset = os.path.getsize(name) if os.path.exists(name) else 0
+            return
+        else:
+            self.offset = 0
+        self.file = open(partial, "ab")
+        if self.offset == 0:
+            self._append(self.header)
+        else:
+            write_committed(name, self.offset)
+
+    def _append(self, data):
+        self.file.write(data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.offset += len(data)
+        write_committed(self.name, self.offset)
+
+    def _publish(self, data):
+        # Append data to the published file without it ever being missing or half-written:
+        # copy it, append, fsync and rename the copy over it
+        tmp_path = self.name + PUBLISH_SUFFIX
+        with open(tmp_path, "wb") as out:
+            if self.offset:
+                with open(self.name, "rb") as f:
+                    shutil.copyfileobj(f, out)
+            else:
+                out.write(self.header)
+            out.write(data)
+            out.flush()
+            os.fsync(out.fileno())
+            size = out.tell()
+        os.replace(tmp_path, self.name)
+        self.offset = size
+
+    def _finish(self, name):
+        os.replace(name + PARTIAL_SUFFIX, name)
+        os.remove(name + COMMITTED_SUFFIX)
+        self.files.append(name)
+
+    def _close_segment(self):
+        if self.publishing:
+            if os.path.exists(self.name):
+                self.files.append(self.name)
+            return
+        self.file.close()
+        if self.rotating and self.segment_rows == 0 and self.offset == len(self.header):
+            # Nothing but a header: drop it rather than leave an empty rotated file
+            os.remove(self.name + PARTIAL_SUFFIX)
+            os.remove(self.name + COMMITTED_SUFFIX)
+        else:
+            self._finish(self.name)
+
+    def write(self, row):
+        with self.lock:
+            self.buffer.append(row)
+            if len(self.buffer) >= self.batch_size or time.monotonic() - self.last_commit >= self.commit_interval:
+                self._commit()
+
+    def commit(self):
+        # Write, fsync and publish whatever is buffered
+        with self.lock:
+            self._commit()
+
+    def _commit(self):
+        self.last_commit = time.monotonic()
+        if not self.buffer:
+            return
+        if self.rotate_daily and time.strftime("%Y%m%d") != self.opened_day:
+            self._close_segment()
+            self._open(self._next_name())
+        data = io.StringIO()
+        csv.DictWriter(data, fieldnames=self.columns, extrasaction="ignore").writerows(self.buffer)
+        data = data.getvalue().encode("utf-8")
+        if self.publishing:
+            self._publish(data)
+        else:
+            self._append(data)
+        if self.dataset:
+            self.write_dataset(self.buffer, self.dataset, self.columns)
+        self.segment_rows += len(self.buffer)
+        self.rows_written += len(self.buffer)
+        self.bytes_written += len(data)
+        self.commits += 1
+        self.buffer.clear()
+        if self.rotate_bytes and self.offset >= self.rotate_bytes:
+            self._close_segment()
+            self._open(self._next_name())
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self._commit()
+            self._close_segment()
+            self.file = None
+            self.closed = True
+
+    def summary(self):
+        return (f"{self.rows_written} rows ({self.bytes_written / 1024:.1f} KB) in {self.commits} commits, "
+                f"{len(self.files)} files finished: {', '.join(self.files)}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ArticleTail:
+    # Rows committed to `path` (and its rotated files) since the last read(). Offsets are
+    # kept per file together with its inode and the FINGERPRINT_BYTES before the offset:
+    # renaming a partial file to its final name keeps the inode, and a file replaced by an
+    # appending writer's copy (new inode) still holds those bytes, while a file replaced by
+    # a new run does not and is read from the start again. state_path makes the position
+    # survive restarts.
+    def __init__(self, path, state_path=None):
+        self.path = path
+        self.state_path = state_path
+        self.positions = {}
+        if state_path and os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as f:
+                self.positions = {name: tuple(pos) for name, pos in json.load(f).items()}
+
+    def read(self):
+        rows = []
+        for name, disk, committed in segments(self.path):
+            try:
+                with open(disk, "rb") as f:
+                    inode = os.fstat(f.fileno()).st_ino
+                    end = committed if committed is not None else os.fstat(f.fileno()).st_size
+                    header = f.readline()
+                    if not header.endswith(b"\n") or len(header) > end:
+                        continue
+                    known_inode, offset, fingerprint = (self.positions.get(name, (inode, 0)) + ("",))[:3]
+                    if offset > end or (known_inode != inode and self._fingerprint(f, offset) != fingerprint):
+                        offset = 0
+                    offset = max(offset, len(header))
+                    f.seek(offset)
+                    data = f.read(end - offset)
+                    new_offset = offset + len(data)
+                    fingerprint = self._fingerprint(f, new_offset)
+            except FileNotFoundError:
+                # Renamed or rotated between listing and opening; picked up on the next read
+                continue
+            if data:
+                fieldnames = next(csv.reader([header.decode("utf-8")]))
+                rows.extend(csv.DictReader(io.StringIO(data.decode("utf-8"), newline=""), fieldnames=fieldnames))
+            self.positions[name] = (inode, new_offset, fingerprint)
+        return rows
+
+    @staticmethod
+    def _fingerprint(f, offset):
+        start = max(0, offset - FINGERPRINT_BYTES)
+        f.seek(start)
+        return f.read(offset - start).hex()
+
+    def follow(self, interval=1.0, stop=None):
+        # Yield each non-empty read() until stop (a threading.Event) is set
+        while stop is None or not stop.is_set():
+            rows = self.read()
+            if rows:
+                yield rows
+            elif stop is not None:
+                stop.wait(interval)
+            else:
+                time.sleep(interval)
+
+    def save(self):
+        if not self.state_path:
+            return
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.positions, f)
+        os.replace(tmp_path, self.state_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print rows committed to a scraper CSV (and its rotated files)")
+    parser.add_argument("path", nargs="?", default="news_bias_articles.csv")
+    parser.add_argument("--state", help="remember the position here and print only rows added since")
+    parser.add_argument("--follow", action="store_true", help="keep waiting for new rows")
+    parser.add_argument("--interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    tail = ArticleTail(args.path, args.state)
+    try:
+        batches = tail.follow(args.interval) if args.follow else [tail.read()]
+        for rows in batches:
+            for row in rows:
+                print(f"{row.get('datetime', '')} | {row.get('outlet', '')} | {row.get('title', '')}")
+            tail.save()
+    except KeyboardInterrupt:
+        tail.save()
@@ -0,0 +1,140 @@
+# ArticleWriter against the original end-of-run dump (collect every row, then write the CSV
+# once), with scraper-shaped rows: 10,000 characters of sample_text each, generated one at
+# a time the way downloads finish. Reports peak traced memory and wall time, then the cost
+# of the per-commit fsync by batch size.
+#
+# check_crash(): a child process is killed in the middle of a batch; the next writer must
+# keep every committed row and no half-written one.
+# check_tail(): a writer rotating small files while ArticleTail follows it; every row must
+# come out exactly once and in order.
+#
+#   python -m benchmarks.bench_article_writer
+#   python -m benchmarks.bench_article_writer --rows 2000 20000
+import argparse
+import csv
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from article_writer import PARTIAL_SUFFIX, ArticleTail, ArticleWriter
+from benchmarks.synthetic_corpus import WORDS
+from scrape_outlets import CSV_COLUMNS
+
+TEXT = (" ".join(WORDS) + " ") * 40
+
+def make_rows(n_rows, start=0):
+    for i in range(start, start + n_rows):
+        yield {
+            "topic": "immigration",
+            "outlet": f"Outlet {i % 57}",
+            "datetime": "2025-08-01 12:00",
+            "title": f"Headline number {i}",
+            "url": f"https://example.com/articles/{i}",
+            "sample_text": f"{i} {TEXT}"[:10000],
+            "ideological_stance": ["conservative", "moderate", "liberal"][i % 3],
+        }
+
+def dump_at_end(rows, path):
+    output_rows = list(rows)
+    with open(path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        writer.writerows(output_rows)
+
+def stream(rows, path, batch_size=50):
+    with ArticleWriter(path, CSV_COLUMNS, batch_size=batch_size) as writer:
+        for row in rows:
+            writer.write(row)
+
+def measure(fn, *args, **kwargs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+def run(sizes=(2_000, 20_000), batch_sizes=(1, 50, 500), fsync_rows=2_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>7s} {'end-of-run dump s':>18s} {'peak MB':>8s} {'ArticleWriter s':>16s} {'peak MB':>8s}")
+        for n_rows in sizes:
+            old_time, old_peak = measure(dump_at_end, make_rows(n_rows), os.path.join(tmp, "dump.csv"))
+            new_time, new_peak = measure(stream, make_rows(n_rows), os.path.join(tmp, "stream.csv"))
+            with open(os.path.join(tmp, "dump.csv"), "rb") as a, open(os.path.join(tmp, "stream.csv"), "rb") as b:
+                assert a.read() == b.read(), "ArticleWriter output differs from the end-of-run dump"
+            print(f"{n_rows:7d} {old_time:18.2f} {old_peak:8.1f} {new_time:16.2f} {new_peak:8.1f}")
+
+        print(f"\n{fsync_rows} rows by batch size (one fsync per commit)")
+        print(f"{'batch':>6s} {'seconds':>8s} {'rows/s':>8s}")
+        for batch_size in batch_sizes:
+            start = time.perf_counter()
+            stream(make_rows(fsync_rows), os.path.join(tmp, f"batch{batch_size}.csv"), batch_size)
+            elapsed = time.perf_counter() - start
+            print(f"{batch_size:6d} {elapsed:8.2f} {fsync_rows / elapsed:8.0f}")
+
+def crash_midway(path, n_rows, batch_size):
+    writer = ArticleWriter(path, CSV_COLUMNS, batch_size=batch_size)
+    for row in make_rows(n_rows):
+        writer.write(row)
+    # Half a row reaches the file, then the process dies without closing the writer
+    writer.file.write(b'immigration,Outlet 0,2025-08-01 12:00,"Headline cut')
+    writer.file.flush()
+    os._exit(1)
+
+def check_crash(n_rows=1_025, batch_size=50):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "articles.csv")
+        child = multiprocessing.get_context("fork").Process(target=crash_midway, args=(path, n_rows, batch_size))
+        child.start()
+        child.join()
+        assert not os.path.exists(path) and os.path.exists(path + PARTIAL_SUFFIX)
+        committed = ArticleTail(path).read()
+        with ArticleWriter(path, CSV_COLUMNS, batch_size=batch_size) as writer:
+            for row in make_rows(10, start=len(committed)):
+                writer.write(row)
+        rows = ArticleTail(path).read()
+    expected = n_rows // batch_size * batch_size
+    assert len(committed) == expected, (len(committed), expected)
+    assert [row["url"] for row in rows] == [f"https://example.com/articles/{i}" for i in range(expected + 10)]
+    print(f"\ncrash: {n_rows} rows written, {expected} committed before the crash survived, "
+          f"{n_rows - expected} buffered rows and the half-written row dropped, run continued in the same file")
+
+def check_tail(n_rows=5_000, rotate_bytes=2**20):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "articles.csv")
+        tail = ArticleTail(path)
+        done = threading.Event()
+        seen = []
+
+        def produce():
+            with ArticleWriter(path, CSV_COLUMNS, batch_size=20, rotate_bytes=rotate_bytes, append=True) as writer:
+                for row in make_rows(n_rows):
+                    writer.write(row)
+            done.set()
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        reads = 0
+        while not done.is_set():
+            seen.extend(tail.read())
+            reads += 1
+            time.sleep(0.01)
+        producer.join()
+        seen.extend(tail.read())
+        files = sorted(name for name in os.listdir(tmp))
+    assert [row["url"] for row in seen] == [f"https://example.com/articles/{i}" for i in range(n_rows)]
+    assert all(len(row["sample_text"]) == 10000 for row in seen)
+    print(f"tail: {n_rows} rows read exactly once in order over {reads} reads while the writer rotated "
+          f"into {len(files)} files")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming article CSV writer: memory, fsync cost, crash and tail checks")
+    parser.add_argument("--rows", type=int, nargs="+", default=[2_000, 20_000])
+    args = parser.parse_args()
+    run(args.rows)
+    check_crash()
+    check_tail()
@@ -0,0 +1,24 @@
+# score_bias.compare_backends() on the offline tiny model: throughput of each inference
+# backend and how far its scores drift from fp32 PyTorch on the repo's articles.
+#
+#   python -m benchmarks.bench_backends
+# For the real model, run `python score_bias.py --compare-backends [--threads N]`.
+import tempfile
+
+import score_bias
+from benchmarks.bench_scoring import load_texts
+from benchmarks.tiny_model import build_tiny_classifier
+
+def run(n_texts=16, num_threads=None, d_model=256, layers=3, batch_size=1):
+    texts = load_texts(n_texts=n_texts)
+    with tempfile.TemporaryDirectory() as tmp:
+        score_bias.ONNX_EXPORT_DIR = tmp
+        return score_bias.compare_backends(
+            texts,
+            num_threads=num_threads,
+            make_classifier=lambda: build_tiny_classifier(texts, d_model=d_model, layers=layers),
+            batch_size=batch_size,
+        )
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,69 @@
+# Repeated polling of 57 local feeds (the size of the outlet list), plain GETs versus
+# conditional GETs through FeedStateStore. Before each of the later rounds, one new entry
+# is published to every fifth feed; with the state store the other feeds answer 304 and
+# only the new entries are returned.
+#
+#   python -m benchmarks.bench_feed_polling
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import scrape_outlets
+from benchmarks.local_feed_server import LocalOutlets
+from feed_state import FeedStateStore
+
+def poll_round(feed_urls, session, limiter, executor, feed_state):
+    results = list(executor.map(lambda url: scrape_outlets.fetch_feed(url, limiter, session, feed_state), feed_urls))
+    if feed_state is not None:
+        # The scraper marks entries once it has handled them; here every entry counts as handled
+        for url, entries in zip(feed_urls, results):
+            for entry in entries:
+                feed_state.mark_seen(url, entry)
+        feed_state.save()
+    return sum(len(entries) for entries in results)
+
+def run(rounds=5, outlets_per_ideology=19, entries_per_feed=50, delay=0.02, workers=16, publish_every=5):
+    results = {}
+    for mode in ("plain GET", "conditional GET"):
+        with LocalOutlets(outlets_per_ideology=outlets_per_ideology, entries_per_feed=entries_per_feed,
+                          delay=delay) as local, tempfile.TemporaryDirectory() as tmp:
+            feed_urls = [url for outlets in local.topics[local.topic].values() for url in outlets.values()]
+            session = scrape_outlets.make_session(workers)
+            received = {"bytes": 0}
+            lock = threading.Lock()
+
+            def count_bytes(response, *args, **kwargs):
+                with lock:
+                    received["bytes"] += len(response.content)
+
+            session.hooks["response"].append(count_bytes)
+            limiter = scrape_outlets.HostLimiter(scrape_outlets.MAX_CONNECTIONS_PER_HOST, None)
+            feed_state = FeedStateStore(os.path.join(tmp, "feed_state.sqlite")) if mode == "conditional GET" else None
+
+            rows = []
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for round_no in range(rounds):
+                    if round_no:
+                        local.publish(f"Border Patrol update {round_no}", every=publish_every)
+                    before_bytes, before_requests = received["bytes"], local.request_counts()["feed"]
+                    start = time.perf_counter()
+                    n_entries = poll_round(feed_urls, session, limiter, executor, feed_state)
+                    rows.append((round_no + 1, local.request_counts()["feed"] - before_requests,
+                                 received["bytes"] - before_bytes, n_entries, time.perf_counter() - start))
+            session.close()
+            if feed_state is not None:
+                print(feed_state.summary())
+                feed_state.close()
+        results[mode] = rows
+
+    for mode, rows in results.items():
+        print(f"\n{mode}: {len(feed_urls)} feeds")
+        print("round  requests  body KB  entries  seconds")
+        for round_no, requests, n_bytes, n_entries, elapsed in rows:
+            print(f"{round_no:5d}  {requests:8d}  {n_bytes / 1024:7.1f}  {n_entries:7d}  {elapsed:7.2f}")
+    return results
+
+if __name__ == "__main__":
+    run()
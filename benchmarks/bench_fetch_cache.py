@@ -0,0 +1,82 @@
+# Fetch cache against the local stand-in outlets: one scrape records every feed and page,
+# then the outlets are shut down and the same scrape is replayed from the cache alone. The
+# replay must save exactly the articles the recorded run saved; its wall time is the
+# parse/filter throughput with no network. Finally the cache is trimmed to half its size.
+#
+#   python -m benchmarks.bench_fetch_cache
+#   python -m benchmarks.bench_fetch_cache --outlets-per-ideology 19 --entries 60
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import scrape_outlets
+from article_writer import ArticleTail
+from benchmarks.local_feed_server import LocalOutlets
+from fetch_cache import FetchCache
+
+def scrape(local_topics, topic, tmp, name, workers, cache_mode, cache_path):
+    output_csv = os.path.join(tmp, f"{name}.csv")
+    start = time.perf_counter()
+    scrape_outlets.main(
+        topic=topic,
+        topic_feeds=local_topics,
+        output_csv=output_csv,
+        max_workers=workers,
+        max_per_ideology=10**6,
+        max_per_outlet=10**6,
+        requests_per_second=None,
+        seen_url_store=os.path.join(tmp, f"{name}_seen.sqlite"),
+        feed_state_path=os.path.join(tmp, f"{name}_feeds.sqlite"),
+        fetch_cache=cache_path,
+        cache_mode=cache_mode,
+    )
+    return time.perf_counter() - start, ArticleTail(output_csv).read()
+
+def run(outlets_per_ideology=12, entries_per_feed=40, delay=0.05, workers=16):
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "fetch_cache.sqlite")
+        with LocalOutlets(outlets_per_ideology=outlets_per_ideology, entries_per_feed=entries_per_feed,
+                          delay=delay) as local:
+            topic, local_topics = local.topic, local.topics
+            live_time, live_rows = scrape(local_topics, topic, tmp, "live", workers, "record", cache_path)
+            requests = local.request_counts()
+
+        # The outlets are gone: anything not in the cache would fail
+        results = [("live + record", workers, live_time, live_rows, requests["feed"] + requests["article"])]
+        for replay_workers in sorted({1, workers}):
+            elapsed, rows = scrape(local_topics, topic, tmp, f"replay{replay_workers}", replay_workers, "replay",
+                                   cache_path)
+            assert [r["url"] for r in sorted(rows, key=lambda r: r["url"])] == \
+                   [r["url"] for r in sorted(live_rows, key=lambda r: r["url"])], "replay saved different articles"
+            assert [r["sample_text"] for r in sorted(rows, key=lambda r: r["url"])] == \
+                   [r["sample_text"] for r in sorted(live_rows, key=lambda r: r["url"])], "replay extracted different text"
+            results.append(("replay", replay_workers, elapsed, rows, 0))
+
+        cache = FetchCache(cache_path, read_only=True)
+        stats = cache.stats()
+        cache.close()
+        trimmed = os.path.join(tmp, "trimmed.sqlite")
+        shutil.copy(cache_path, trimmed)
+        trim = FetchCache(trimmed, max_bytes=stats["stored_bytes"] // 2)
+        trimmed_stats = trim.stats()
+        trim.close()
+
+    print(f"\n{'run':>14s} {'workers':>8s} {'articles':>9s} {'requests':>9s} {'seconds':>8s} {'articles/s':>11s}")
+    for name, n_workers, elapsed, rows, n_requests in results:
+        print(f"{name:>14s} {n_workers:8d} {len(rows):9d} {n_requests:9d} {elapsed:8.2f} {len(rows) / elapsed:11.1f}")
+    print(f"\ncache: {stats['responses']} responses over {stats['bodies']} bodies, "
+          f"{stats['raw_bytes'] / 2**20:.1f} MB stored as {stats['stored_bytes'] / 2**20:.1f} MB "
+          f"({stats['raw_bytes'] / max(stats['stored_bytes'], 1):.1f}x)")
+    print(f"trimmed to half: {trimmed_stats['responses']} responses, {trimmed_stats['stored_bytes'] / 2**20:.1f} MB")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record a scrape into the fetch cache and replay it offline")
+    parser.add_argument("--outlets-per-ideology", type=int, default=12)
+    parser.add_argument("--entries", type=int, default=40, help="entries per feed")
+    parser.add_argument("--delay", type=float, default=0.05, help="simulated latency per request (s)")
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+    run(args.outlets_per_ideology, args.entries, args.delay, args.workers)
@@ -0,0 +1,73 @@
+# Daily clustering cost as history grows: a full KMeans refit over every article so far
+# (what cluster_outlets does by default) against folding only the day's new articles into
+# a persisted TopicClusterer. Embeddings are synthetic 384-d blobs (the size of
+# all-MiniLM-L6-v2), three narratives with stance means around 30/50/70.
+#
+# Besides timing, each day reports how many of the previous day's articles changed label
+# under the refit. The incremental clusterer never reassigns an article by construction.
+#
+#   python -m benchmarks.bench_incremental_clustering
+import os
+import tempfile
+import time
+
+import numpy as np
+from sklearn.cluster import KMeans
+
+from incremental_clusters import load_clusterer, save_clusterer, BIAS_LABELS
+
+def make_day(rng, centers, n, day):
+    which = rng.integers(0, len(centers), size=n)
+    X = centers[which] + rng.normal(scale=1.0, size=(n, centers.shape[1])).astype(np.float32)
+    stances = np.array([30.0, 50.0, 70.0])[which] + rng.normal(scale=10.0, size=n)
+    keys = [f"{day}-{i}" for i in range(n)]
+    return keys, X.astype(np.float32), stances
+
+def refit_labels(X, stances, n_clusters):
+    # Same procedure as the non-incremental path of narrative_clustering_and_labeling
+    ids = KMeans(n_clusters=n_clusters, random_state=42).fit_predict(X)
+    means = {c: stances[ids == c].mean() for c in np.unique(ids)}
+    label_map = {c: BIAS_LABELS[i] for i, c in enumerate(sorted(means, key=means.get))}
+    return np.array([label_map[c] for c in ids])
+
+def run(days=20, per_day=2000, dim=384, n_clusters=3, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(scale=0.35, size=(n_clusters, dim)).astype(np.float32)
+
+    all_keys, all_X, all_stances = [], np.empty((0, dim), dtype=np.float32), np.empty(0)
+    prev_refit = None
+    print(f"{'day':>4} {'history':>8} {'refit s':>9} {'update s':>9} {'speedup':>8} {'refit relabelled':>17}")
+    with tempfile.TemporaryDirectory() as state_dir:
+        for day in range(days):
+            keys, X, stances = make_day(rng, centers, per_day, day)
+            all_keys += keys
+            all_X = np.vstack([all_X, X])
+            all_stances = np.concatenate([all_stances, stances])
+
+            start = time.perf_counter()
+            refit = refit_labels(all_X, all_stances, n_clusters)
+            refit_time = time.perf_counter() - start
+
+            # Load, update and save, as a daily run would
+            start = time.perf_counter()
+            clusterer = load_clusterer(state_dir, "bench", n_clusters)
+            clusterer.update(keys, X, stances)
+            save_clusterer(state_dir, clusterer)
+            update_time = time.perf_counter() - start
+
+            changed = ""
+            if prev_refit is not None:
+                changed = f"{np.mean(refit[:len(prev_refit)] != prev_refit) * 100:16.1f}%"
+            prev_refit = refit
+            print(f"{day + 1:4d} {len(all_keys):8d} {refit_time:9.3f} {update_time:9.3f} "
+                  f"{refit_time / update_time:7.1f}x {changed:>17}")
+
+        state_size = os.path.getsize(os.path.join(state_dir, "bench.pkl"))
+
+    # Agreement between the incremental labels and a final full refit
+    incremental = np.array([clusterer.label_map[clusterer.assignments[k]] for k in all_keys])
+    agreement = np.mean(incremental == prev_refit) * 100
+    print(f"final label agreement with a full refit: {agreement:.1f}%, state file {state_size / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    run()
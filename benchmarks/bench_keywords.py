@@ -0,0 +1,78 @@
+# Micro-benchmark of KeywordMatcher against the original per-keyword regex loop on a
+# synthetic title corpus. Both must agree on every title; find() is also checked
+# against a brute-force scan over the deduplicated keyword list.
+#
+#   python -m benchmarks.bench_keywords
+import random
+import re
+import time
+
+from keyword_matcher import KeywordMatcher
+from scrape_outlets import KEYWORDS
+
+FILLER = (
+    "senate house vote bill governor mayor court judge report week new plan city state "
+    "police fire storm market tax school health trump biden harris campaign poll voters "
+    "iceland icebergs bordering visas refugees' asylums naturalized ice-cold policing"
+).split()
+
+def legacy_contains_keyword_in_title(title, keywords):
+    title = title.lower()
+    for kw in keywords:
+        pattern = r'\b' + re.escape(kw) + r'\b'
+        if re.search(pattern, title):
+            return True
+    return False
+
+def brute_force_find(title, keywords):
+    title = title.lower()
+    return {kw for kw in keywords if re.search(r'\b' + re.escape(kw) + r'\b', title)}
+
+def make_titles(n, keyword_rate=0.3, seed=7):
+    rng = random.Random(seed)
+    keywords = sorted(set(KEYWORDS))
+    titles = []
+    for _ in range(n):
+        words = rng.choices(FILLER, k=rng.randint(6, 14))
+        if rng.random() < keyword_rate:
+            kw = rng.choice(keywords)
+            if rng.random() < 0.5:
+                kw = kw.upper() if rng.random() < 0.5 else kw.title()
+            words.insert(rng.randrange(len(words) + 1), kw)
+        title = " ".join(words)
+        titles.append(title[0].upper() + title[1:] + rng.choice(["", ".", "?", ":", " —"]))
+    return titles
+
+def run(n_titles=100000, verify_find=5000):
+    titles = make_titles(n_titles)
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher(KEYWORDS)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy = [legacy_contains_keyword_in_title(t, KEYWORDS) for t in titles]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [matcher.matches(t) for t in titles]
+    compiled_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = [matcher.find(t) for t in titles]
+    find_time = time.perf_counter() - start
+
+    assert legacy == compiled, "match results differ from the legacy loop"
+    assert all(bool(f) == m for f, m in zip(found, compiled))
+    for title, f in zip(titles[:verify_find], found[:verify_find]):
+        assert set(f) == brute_force_find(title, matcher.keywords), title
+
+    print(f"{n_titles} titles, {len(KEYWORDS)} keywords ({len(matcher.keywords)} unique), "
+          f"{sum(compiled)} matching; compiled in {compile_time * 1000:.1f} ms")
+    print(f"legacy loop        {legacy_time:8.3f} s  {n_titles / legacy_time:12,.0f} titles/s")
+    print(f"matcher.matches()  {compiled_time:8.3f} s  {n_titles / compiled_time:12,.0f} titles/s  "
+          f"({legacy_time / compiled_time:.0f}x)")
+    print(f"matcher.find()     {find_time:8.3f} s  {n_titles / find_time:12,.0f} titles/s")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,81 @@
+# Query latency of NearDuplicateIndex with 1M indexed articles.
+#
+# The bulk of the index is random MinHash signatures (distinct articles share no bands);
+# on top of that, n_planted synthetic articles are indexed by text. Queries are lightly
+# edited copies of the planted articles (should match) and fresh articles (should not).
+# A brute-force scan over the signature matrix is timed for comparison.
+#
+#   python -m benchmarks.bench_near_duplicates
+import random
+import time
+
+import numpy as np
+
+from near_duplicates import NearDuplicateIndex
+
+VOCAB = (
+    "border immigration asylum policy court ruling senate vote bill migrants deportation "
+    "officials said the a of to in on for with by administration federal state judge plan "
+    "reuters report week new president governor city police funding program families "
+    "agency enforcement detention camp children law rights group statement congress house"
+).split()
+
+def make_article(rng, n_words=80):
+    return " ".join(rng.choices(VOCAB, k=n_words))
+
+def edit(rng, text, n_edits=3):
+    # Wire-copy style changes: a few words swapped and a dateline added
+    words = text.split()
+    for _ in range(n_edits):
+        words[rng.randrange(len(words))] = rng.choice(VOCAB)
+    return "WASHINGTON (AP) — " + " ".join(words)
+
+def percentiles(times):
+    times = np.array(times) * 1e6
+    return f"median {np.median(times):8.1f} us  p99 {np.percentile(times, 99):8.1f} us"
+
+def run(n_indexed=1_000_000, n_planted=1000, n_queries=1000, n_inserts=10000, seed=3):
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    index = NearDuplicateIndex()
+
+    start = time.perf_counter()
+    index.add_many(np_rng.integers(0, 2**32, size=(n_indexed - n_planted, index.num_perm), dtype=np.uint32))
+    planted = [make_article(rng) for _ in range(n_planted)]
+    planted_ids = [index.add(index.signature(text)) for text in planted]
+    print(f"indexed {len(index):,} articles in {time.perf_counter() - start:.1f} s")
+
+    copies = [index.signature(edit(rng, planted[i % n_planted])) for i in range(n_queries)]
+    fresh = [index.signature(make_article(rng)) for _ in range(n_queries)]
+
+    for name, queries, expect in (("syndicated copies", copies, True), ("fresh articles", fresh, False)):
+        times, correct = [], 0
+        for i, sig in enumerate(queries):
+            start = time.perf_counter()
+            match = index.query(sig)
+            times.append(time.perf_counter() - start)
+            if expect:
+                correct += match is not None and match[0] == planted_ids[i % n_planted]
+            else:
+                correct += match is None
+        print(f"query, {name:18s} {percentiles(times)}  {correct / len(queries) * 100:5.1f}% correct")
+
+    times = []
+    for sig in copies[:20]:
+        start = time.perf_counter()
+        similarity = (index.sig_matrix[:len(index)] == sig).mean(axis=1)
+        int(np.argmax(similarity))
+        times.append(time.perf_counter() - start)
+    print(f"brute-force scan           {percentiles(times)}")
+
+    times = []
+    for _ in range(n_inserts):
+        sig = index.signature(make_article(rng))
+        start = time.perf_counter()
+        index.query(sig)
+        index.add(sig)
+        times.append(time.perf_counter() - start)
+    print(f"query + add (streaming)    {percentiles(times)}  mean {np.mean(times) * 1e6:.1f} us")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,97 @@
+# Parse throughput of the article pages in a fetch cache: inline on one thread, on a thread
+# pool (what the download threads amounted to before, all under the GIL), and in a
+# ParsePool with a growing number of worker processes. Every pool must return exactly what
+# the inline parse returns. Without --cache the corpus is recorded from the local stand-in
+# outlets first; pass --cache fetch_cache.sqlite to use pages recorded from the real ones.
+#
+#   python -m benchmarks.bench_parsing
+#   python -m benchmarks.bench_parsing --cache fetch_cache.sqlite --workers 1 2 4 8
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import scrape_outlets
+from article_parser import MAX_PARSE_IN_FLIGHT, ParsePool, parse_article_html
+from benchmarks.local_feed_server import LocalOutlets
+from fetch_cache import FetchCache
+
+def record_corpus(cache_path, outlets_per_ideology=12, entries_per_feed=40):
+    # Fetch every article page of the local outlets once through a recording session
+    with LocalOutlets(outlets_per_ideology=outlets_per_ideology, entries_per_feed=entries_per_feed, delay=0.0) as local:
+        cache = FetchCache(cache_path)
+        session = scrape_outlets.make_session(16, cache, "record")
+        urls = [f"{feed_url.rsplit('/', 1)[0]}/articles/{i}.html"
+                for outlets in local.topics[local.topic].values() for feed_url in outlets.values()
+                for i in range(entries_per_feed)]
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(lambda url: session.get(url, timeout=10), urls))
+        session.close()
+        cache.close()
+
+def load_pages(cache_path, limit=None):
+    cache = FetchCache(cache_path, read_only=True)
+    pages = [(url, body.decode("utf-8", errors="replace")) for url, body in cache.responses(content_type="text/html")]
+    cache.close()
+    return pages[:limit] if limit else pages
+
+def timed(fn, pages):
+    start = time.perf_counter()
+    results = fn(pages)
+    return time.perf_counter() - start, results
+
+def inline(pages):
+    return [parse_article_html(url, html) for url, html in pages]
+
+def threaded(threads):
+    def parse(pages):
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(lambda page: parse_article_html(*page), pages))
+    return parse
+
+def pooled(workers, max_in_flight):
+    def parse(pages):
+        with ParsePool(workers, max_in_flight) as pool:
+            pool.parse(*pages[0])   # worker start-up (spawn + imports) is not part of the rate
+            start = time.perf_counter()
+            futures = [pool.submit(url, html) for url, html in pages]
+            results = [future.result() for future in futures]
+            parse.elapsed = time.perf_counter() - start
+        return results
+    return parse
+
+def run(cache_path=None, worker_counts=None, limit=None, max_in_flight=MAX_PARSE_IN_FLIGHT, threads=4):
+    with tempfile.TemporaryDirectory() as tmp:
+        if cache_path is None:
+            cache_path = os.path.join(tmp, "fetch_cache.sqlite")
+            record_corpus(cache_path)
+        pages = load_pages(cache_path, limit)
+    cpus = os.cpu_count() or 1
+    worker_counts = worker_counts or sorted({1, 2, 4, cpus})
+    print(f"{len(pages)} cached pages ({sum(len(html) for _, html in pages) / 2**20:.1f} MB HTML), {cpus} CPUs")
+
+    base_time, expected = timed(inline, pages)
+    rows = [("inline", 1, base_time)]
+    elapsed, results = timed(threaded(threads), pages)
+    assert results == expected, "threaded parse differs from inline"
+    rows.append(("threads", threads, elapsed))
+    for workers in worker_counts:
+        parse = pooled(workers, max_in_flight)
+        _, results = timed(parse, pages)
+        assert results == expected, f"ParsePool({workers}) parse differs from inline"
+        rows.append(("processes", workers, parse.elapsed))
+
+    print(f"\n{'mode':>10s} {'workers':>8s} {'seconds':>8s} {'pages/s':>8s} {'speedup':>8s}")
+    for mode, workers, elapsed in rows:
+        print(f"{mode:>10s} {workers:8d} {elapsed:8.2f} {len(pages) / elapsed:8.1f} {base_time / elapsed:7.2f}x")
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Article parse throughput: inline, threads, worker processes")
+    parser.add_argument("--cache", help="fetch cache with recorded pages (default: record the local outlets)")
+    parser.add_argument("--workers", type=int, nargs="+", help="process counts (default 1 2 4 and the CPU count)")
+    parser.add_argument("--limit", type=int, help="parse at most this many pages")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_PARSE_IN_FLIGHT)
+    args = parser.parse_args()
+    run(args.cache, args.workers, args.limit, args.max_in_flight)
@@ -0,0 +1,64 @@
+# Headless render time of the analyze_velocity plots (plot_mode="file", PNG) against corpus
+# size, next to the original per-article seaborn scatter on the same frame. The original
+# daily-count line plot is not timed: its per-row groupby().size().reindex(df['date'])
+# fails on current pandas. Metrics are computed before timing; only drawing and saving
+# are measured.
+#
+#   python -m benchmarks.bench_plotting
+#   python -m benchmarks.bench_plotting --sizes 10000 1000000 --format svg
+import argparse
+import os
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+from benchmarks.synthetic_corpus import make_velocity_frame
+from cluster_narratives import PLOT_FORMATS, plot_velocity, velocity_metrics
+
+def legacy_scatter(frame, path):
+    plt.figure(figsize=(14, 7))
+    sns.scatterplot(
+        data=frame.dropna(subset=['ideological_stance']),
+        x='datetime',
+        y='ideological_stance',
+        hue='combined_ideology_label',
+        style='combined_ideology_label',
+        hue_order=['Liberal', 'Moderate', 'Conservative'],
+        style_order=['Liberal', 'Moderate', 'Conservative'],
+        palette={'Liberal': 'blue', 'Moderate': 'green', 'Conservative': 'red'},
+        s=100,
+        alpha=0.7,
+    )
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close("all")
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+def run(sizes=(10_000, 100_000, 1_000_000, 10_000_000), legacy_max=100_000, plot_format="png"):
+    print(f"{'rows':>10s} {'original scatter s':>19s} {'plot_velocity s':>16s}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            result = velocity_metrics(make_velocity_frame(n_rows))
+            new_time = timed(plot_velocity, result, "file", tmp, plot_format)
+            old = "-"
+            if n_rows <= legacy_max:
+                old = f"{timed(legacy_scatter, result.frame, os.path.join(tmp, f'legacy.{plot_format}')):.2f}"
+            print(f"{n_rows:10d} {old:>19s} {new_time:16.2f}")
+            del result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless velocity plot render time")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="largest corpus to also draw with the original scatter")
+    parser.add_argument("--format", choices=PLOT_FORMATS, default="png")
+    args = parser.parse_args()
+    run(args.sizes, args.legacy_max, args.format)
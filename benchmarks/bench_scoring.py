@@ -0,0 +1,55 @@
+# Throughput of batched score_texts() against the original loop of one pipeline call per
+# article per dimension, using the offline tiny model on the repo's scored articles.
+#
+#   python -m benchmarks.bench_scoring
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+import score_bias
+from benchmarks.tiny_model import build_tiny_classifier
+
+def legacy_score_text(text, clf):
+    results = {}
+    for dim, labels in score_bias.BIAS_DIMENSIONS.items():
+        res = clf(text, labels, multi_label=False)
+        returned_labels = [label.lower() for label in res['labels']]
+        probs = np.array(res['scores'])
+        probs = probs / probs.sum()
+        label_to_score = {label: idx * 50 for idx, label in enumerate(labels)}
+        weighted_score = sum(probs[i] * label_to_score[returned_labels[i]] for i in range(len(labels)))
+        results[dim] = round(weighted_score, 2)
+    return results
+
+def load_texts(input_csv="news_bias_articles_scored.csv", n_texts=64):
+    texts = pd.read_csv(input_csv)['sample_text'].dropna().str.strip()
+    texts = texts[texts != ""].tolist()
+    return (texts * (n_texts // len(texts) + 1))[:n_texts]
+
+def run(n_texts=64, batch_sizes=(1, 4, 8, 16), max_chars=(None, 500)):
+    # max_chars=None scores the stored text (up to 10,000 chars, truncated to 1024 tokens);
+    # 500 matches the short snippets in news_bias_articles_clustered.csv
+    for limit in max_chars:
+        texts = [text[:limit] for text in load_texts(n_texts=n_texts)]
+        clf = build_tiny_classifier(texts)
+
+        start = time.perf_counter()
+        legacy = [legacy_score_text(text, clf) for text in texts]
+        legacy_time = time.perf_counter() - start
+        print(f"\n{n_texts} articles (max_chars={limit}), "
+              f"{sum(map(len, score_bias.BIAS_DIMENSIONS.values()))} hypotheses each, "
+              f"{torch.get_num_threads()} torch threads")
+        print(f"legacy loop      {n_texts / legacy_time:8.2f} articles/s")
+
+        for batch_size in batch_sizes:
+            start = time.perf_counter()
+            batched = score_bias.score_texts(texts, batch_size=batch_size, clf=clf, log_every=0)
+            elapsed = time.perf_counter() - start
+            max_diff = max(abs(a[dim] - b[dim]) for a, b in zip(legacy, batched) for dim in a)
+            print(f"batch_size={batch_size:<4d} {n_texts / elapsed:8.2f} articles/s  "
+                  f"({legacy_time / elapsed:.1f}x, max score diff {max_diff:.2f})")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,16 @@
+# score_bias.compare_scoring_modes() on the offline tiny model: latency and score
+# agreement of full / lead / chunked scoring on the repo's articles.
+#
+#   python -m benchmarks.bench_scoring_modes
+# For the real model, run `python score_bias.py --compare-modes`.
+import score_bias
+from benchmarks.bench_scoring import load_texts
+from benchmarks.tiny_model import build_tiny_classifier
+
+def run(n_texts=16, batch_size=4):
+    texts = load_texts(n_texts=n_texts)
+    clf = build_tiny_classifier(texts)
+    return score_bias.compare_scoring_modes(texts, clf=clf, batch_size=batch_size)
+
+if __name__ == "__main__":
+    run()
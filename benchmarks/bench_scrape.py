@@ -0,0 +1,93 @@
+# Wall-clock comparison of the scrape loop with one worker (sequential) versus the
+# concurrent fetch engine, against the local stand-in outlets. The global rate limit
+# is lifted by default so the numbers show concurrency rather than pacing.
+#
+# run_repeat() scrapes the same outlets twice with one seen-URL store and feed state: the
+# second run must not download any page the first one already handled, and appends its
+# articles to the first run's CSV.
+#
+#   python -m benchmarks.bench_scrape
+import os
+import tempfile
+import time
+
+import scrape_outlets
+from article_writer import ArticleTail
+from benchmarks.local_feed_server import LocalOutlets
+
+def check_quotas(rows, max_per_ideology, max_per_outlet):
+    per_ideology = {}
+    per_outlet = {}
+    for row in rows:
+        per_ideology[row["ideological_stance"]] = per_ideology.get(row["ideological_stance"], 0) + 1
+        per_outlet[row["outlet"]] = per_outlet.get(row["outlet"], 0) + 1
+    assert all(n == max_per_ideology for n in per_ideology.values()), per_ideology
+    assert all(n <= max_per_outlet for n in per_outlet.values()), per_outlet
+    assert len({row["url"] for row in rows}) == len(rows), "duplicate urls"
+
+def run(worker_counts=(1, 4, 16), max_per_ideology=12, max_per_outlet=3, delay=0.05, requests_per_second=None):
+    results = {}
+    with LocalOutlets(outlets_per_ideology=6, entries_per_feed=12, delay=delay) as local:
+        for workers in worker_counts:
+            with tempfile.TemporaryDirectory() as tmp:
+                start = time.perf_counter()
+                output_csv = os.path.join(tmp, "articles.csv")
+                scrape_outlets.main(
+                    topic=local.topic,
+                    topic_feeds=local.topics,
+                    output_csv=output_csv,
+                    max_workers=workers,
+                    max_per_ideology=max_per_ideology,
+                    max_per_outlet=max_per_outlet,
+                    requests_per_second=requests_per_second,
+                    seen_url_store=os.path.join(tmp, "seen_urls.sqlite"),
+                    feed_state_path=os.path.join(tmp, "feed_state.sqlite"),
+                )
+                elapsed = time.perf_counter() - start
+                rows = ArticleTail(output_csv).read()
+            check_quotas(rows, max_per_ideology, max_per_outlet)
+            results[workers] = elapsed
+
+    print("\nworkers  seconds  speedup")
+    for workers, elapsed in results.items():
+        print(f"{workers:7d}  {elapsed:7.2f}  {results[worker_counts[0]] / elapsed:6.1f}x")
+    return results
+
+def run_repeat(workers=16, max_per_ideology=6, max_per_outlet=2, delay=0.05):
+    with LocalOutlets(outlets_per_ideology=6, entries_per_feed=12, delay=delay) as local, \
+            tempfile.TemporaryDirectory() as tmp:
+        store = os.path.join(tmp, "seen_urls.sqlite")
+        output_csv = os.path.join(tmp, "articles.csv")
+        tail = ArticleTail(output_csv)
+        runs = []
+        for name in ("first run", "second run"):
+            before = local.request_counts()
+            start = time.perf_counter()
+            scrape_outlets.main(
+                topic=local.topic,
+                topic_feeds=local.topics,
+                output_csv=output_csv,
+                max_workers=workers,
+                max_per_ideology=max_per_ideology,
+                max_per_outlet=max_per_outlet,
+                requests_per_second=None,
+                seen_url_store=store,
+                feed_state_path=os.path.join(tmp, "feed_state.sqlite"),
+            )
+            elapsed = time.perf_counter() - start
+            rows = tail.read()
+            after = local.request_counts()
+            runs.append((name, rows, after["article"] - before["article"], elapsed))
+        saved = ArticleTail(output_csv).read()
+
+    first_urls = {row["url"] for row in runs[0][1]}
+    assert not first_urls & {row["url"] for row in runs[1][1]}, "second run re-scraped articles"
+    assert len(saved) == len(runs[0][1]) + len(runs[1][1]), "second run replaced the first run's articles"
+    print("\nrun         articles  article requests  seconds")
+    for name, rows, article_requests, elapsed in runs:
+        print(f"{name:10s}  {len(rows):8d}  {article_requests:16d}  {elapsed:7.2f}")
+    return runs
+
+if __name__ == "__main__":
+    run()
+    run_repeat()
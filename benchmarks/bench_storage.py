@@ -0,0 +1,88 @@
+# Load time and peak memory of the analyze_velocity input on a multi-million-row corpus:
+# the original full read_csv, the column-pruned CSV read, and the Parquet dataset from
+# storage.py (all of it, and one topic over one week). Each load runs in a fresh process so
+# that peak RSS belongs to that load alone; "imports only" is the floor.
+#
+#   python -m benchmarks.bench_storage --rows 2000000
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+CASES = {
+    "imports only": "None",
+    "csv, all columns": "pd.read_csv(csv, parse_dates=['datetime'])",
+    "csv, velocity columns": "load_velocity_frame(csv)",
+    "parquet, velocity columns": "load_velocity_frame(root)",
+    "parquet, 1 topic x 7 days": "load_velocity_frame(root, topics=['immigration'], start='2025-08-08', end='2025-08-14')",
+}
+
+def peak_rss_mb():
+    # VmHWM starts over at exec; ru_maxrss on Linux keeps the parent's peak from before the fork
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def load_once(expression, csv, root):
+    import pandas as pd
+    from cluster_narratives import load_velocity_frame
+    start = time.perf_counter()
+    df = eval(expression, {"pd": pd, "load_velocity_frame": load_velocity_frame, "csv": csv, "root": root})
+    elapsed = time.perf_counter() - start
+    peak_mb = peak_rss_mb()
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_mb, "rows": 0 if df is None else len(df)}))
+
+def measure(expression, csv, root):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_storage", "--load", expression, "--csv", csv, "--root", root],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+def run(n_rows=2_000_000, workdir=None):
+    from benchmarks.synthetic_corpus import write_corpus_csv
+    from storage import import_csv
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        csv = os.path.join(tmp, "articles.csv")
+        root = os.path.join(tmp, "articles_parquet")
+        start = time.perf_counter()
+        write_corpus_csv(csv, n_rows)
+        print(f"Wrote {n_rows} rows to CSV in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        import_csv(csv, root)
+        print(f"Converted to Parquet in {time.perf_counter() - start:.1f}s")
+        print(f"CSV {os.path.getsize(csv) / 2**20:.0f} MB, Parquet {dir_size(root) / 2**20:.0f} MB\n")
+
+        print(f"{'case':28s} {'rows':>9s} {'seconds':>8s} {'peak MB':>8s}")
+        results = {}
+        for name, expression in CASES.items():
+            result = measure(expression, csv, root)
+            results[name] = result
+            print(f"{name:28s} {result['rows']:9d} {result['seconds']:8.2f} {result['peak_mb']:8.0f}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workdir", help="where to put the temporary corpus (default: system temp dir)")
+    parser.add_argument("--load", help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.load:
+        load_once(args.load, args.csv, args.root)
+    else:
+        run(args.rows, args.workdir)
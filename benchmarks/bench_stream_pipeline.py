@@ -0,0 +1,50 @@
+# stream_pipeline against the local outlets with the offline tiny classifier and hashing
+# encoder: new immigration headlines are published to every feed once per poll interval,
+# and the per-stage metrics show throughput, backpressure and how long an article takes
+# from being scraped to being counted in the velocity numbers. The queues are kept small
+# so that the scorer, the slowest stage, visibly holds back the scraper.
+#
+#   python -m benchmarks.bench_stream_pipeline
+import os
+import tempfile
+import threading
+
+import score_bias
+import stream_pipeline
+from benchmarks.local_feed_server import KEYWORD_TITLES, PARAGRAPH, LocalOutlets
+from benchmarks.tiny_model import HashingEncoder, build_tiny_classifier
+
+def run(cycles=6, poll_interval=2.0, outlets_per_ideology=3, entries_per_feed=12, delay=0.02, queue_size=16):
+    with LocalOutlets(outlets_per_ideology=outlets_per_ideology, entries_per_feed=entries_per_feed,
+                      delay=delay) as local, tempfile.TemporaryDirectory() as tmp:
+        # The local outlets score like the real ones of the same ideology
+        for ideology, outlets in local.topics[local.topic].items():
+            for outlet in outlets:
+                score_bias.OUTLET_TO_IDEOLOGY[outlet] = ideology
+        clf = build_tiny_classifier([PARAGRAPH] + KEYWORD_TITLES)
+
+        stop = threading.Event()
+
+        def publish():
+            n = 0
+            while not stop.wait(poll_interval):
+                n += 1
+                local.publish(f"{KEYWORD_TITLES[n % len(KEYWORD_TITLES)]} (update {n})")
+
+        publisher = threading.Thread(target=publish, daemon=True)
+        publisher.start()
+        try:
+            velocity, metrics = stream_pipeline.run_pipeline(
+                local.topic, local.topics, cycles=cycles, poll_interval=poll_interval, queue_size=queue_size, metrics_interval=5,
+                output_csv=os.path.join(tmp, "stream.csv"), clf=clf, embedding_model=HashingEncoder(),
+                score_cache_path=None, store_dir=os.path.join(tmp, "embeddings"),
+                state_dir=os.path.join(tmp, "clusters"), seen_url_store=os.path.join(tmp, "seen_urls.sqlite"),
+                feed_state_path=os.path.join(tmp, "feed_state.sqlite"), requests_per_second=None,
+                dead_letter_path=os.path.join(tmp, "dead_letters.jsonl"),
+            )
+        finally:
+            stop.set()
+    return velocity, metrics
+
+if __name__ == "__main__":
+    run()
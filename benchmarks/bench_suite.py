@@ -0,0 +1,210 @@
+# End-to-end benchmark suite: every pipeline stage on synthetic corpora shaped like
+# news_bias_articles_clustered.csv (benchmarks.synthetic_corpus), fully offline.
+#
+#   scrape      scrape_outlets.main() against the local stand-in outlets (fixed size)
+#   keywords    the title keyword matcher over every title of the corpus
+#   scoring     score_bias.score_texts() with the tiny local BART classifier, on the first
+#               --score-rows texts (the real model's cost per text is far higher anyway)
+#   clustering  cluster_outlets.narrative_clustering_and_labeling() with the hashing
+#               encoder: CSV in, embeddings, per-topic k-means and labels, CSV out
+#   velocity    cluster_narratives.analyze_velocity() on the corpus CSV, without plots
+#
+# Results go to a JSON file together with the git commit, platform and library versions,
+# one record per stage and corpus size. --compare prints the ratio of every stage's time to
+# an earlier results file and exits with status 1 if any got slower by more than
+# --tolerance, so runs can be tracked across commits.
+#
+#   python -m benchmarks.bench_suite
+#   python -m benchmarks.bench_suite --sizes 1000 100000 --stages keywords velocity
+#   python -m benchmarks.bench_suite --compare benchmarks/results/<commit>.json
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from benchmarks.synthetic_corpus import write_corpus_csv
+
+SIZES = (1_000, 100_000, 1_000_000)
+STAGES = ("scrape", "keywords", "scoring", "clustering", "velocity")
+SCORE_ROWS = 256
+MIN_SECONDS = 0.05      # stages faster than this are too noisy to count as regressions
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+VERSIONED = ("numpy", "pandas", "pyarrow", "sklearn", "torch", "transformers", "newspaper", "feedparser")
+
+def git_commit():
+    def git(*args):
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True, cwd=REPO_ROOT).stdout.strip()
+    try:
+        return git("rev-parse", "HEAD"), bool(git("status", "--porcelain", "--untracked-files=no"))
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def environment():
+    commit, dirty = git_commit()
+    versions = {}
+    for name in VERSIONED:
+        try:
+            versions[name] = getattr(__import__(name), "__version__", "unknown")
+        except ImportError:
+            versions[name] = None
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": versions,
+    }
+
+def timed(stage, size, rows, fn, verbose=False):
+    # Run one stage; its own progress output is swallowed unless verbose
+    out = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    with out:
+        extra = fn() or {}
+    seconds = time.perf_counter() - start
+    record = {"stage": stage, "size": size, "rows": rows, "seconds": round(seconds, 4),
+              "rows_per_second": round(rows / seconds, 1) if seconds else None, **extra}
+    print(f"{stage:>10s} {str(size):>9s} {rows:9d} {seconds:9.2f} {record['rows_per_second'] or 0:12.1f}")
+    return record
+
+def scrape_stage(outlets_per_ideology=6, entries_per_feed=20, delay=0.02, verbose=False):
+    import scrape_outlets
+    from article_writer import ArticleTail
+    from benchmarks.local_feed_server import LocalOutlets
+
+    with LocalOutlets(outlets_per_ideology=outlets_per_ideology, entries_per_feed=entries_per_feed,
+                      delay=delay) as local, tempfile.TemporaryDirectory() as tmp:
+        output_csv = os.path.join(tmp, "articles.csv")
+        counts = {}
+
+        def scrape():
+            scrape_outlets.main(local.topic, local.topics, output_csv, max_per_ideology=10**6, max_per_outlet=10**6,
+                                requests_per_second=None, seen_url_store=None, feed_state_path=None)
+            counts.update(local.request_counts())
+
+        # rows: feed entries offered to the scraper
+        n_entries = outlets_per_ideology * 3 * entries_per_feed
+        record = timed("scrape", "local", n_entries, scrape, verbose)
+        record.update(articles=len(ArticleTail(output_csv).read()), feed_requests=counts["feed"],
+                      article_requests=counts["article"])
+    return record
+
+def keyword_stage(csv_path, size, verbose=False):
+    import scrape_outlets
+
+    titles = pd.read_csv(csv_path, usecols=["title"])["title"].fillna("").tolist()
+    matcher = scrape_outlets.KEYWORD_MATCHER
+    return timed("keywords", size, len(titles), lambda: {"matches": sum(map(matcher.matches, titles))}, verbose)
+
+def scoring_stage(csv_path, size, clf, score_rows=SCORE_ROWS, verbose=False):
+    import score_bias
+
+    texts = pd.read_csv(csv_path, usecols=["sample_text"], nrows=score_rows * 2)["sample_text"].dropna()
+    texts = texts.astype(str).head(score_rows).tolist()
+    return timed("scoring", size, len(texts), lambda: {"scored": len(score_bias.score_texts(texts, clf=clf, log_every=0))},
+                 verbose)
+
+def clustering_stage(csv_path, size, tmp, verbose=False):
+    import cluster_outlets
+    from benchmarks.tiny_model import HashingEncoder
+
+    output_csv = os.path.join(tmp, f"clustered_{size}.csv")
+    record = timed("clustering", size, size, lambda: cluster_outlets.narrative_clustering_and_labeling(
+        csv_path, output_csv, store_dir=os.path.join(tmp, f"embeddings_{size}"), embedding_model=HashingEncoder()),
+        verbose)
+    os.remove(output_csv)
+    return record
+
+def velocity_stage(csv_path, size, verbose=False):
+    import cluster_narratives
+
+    def velocity():
+        result = cluster_narratives.analyze_velocity(csv_path, plot_mode="none")
+        return {"articles": int(result.total)}
+    return timed("velocity", size, size, velocity, verbose)
+
+def run(sizes=SIZES, stages=STAGES, score_rows=SCORE_ROWS, output=None, verbose=False):
+    report = environment()
+    records = []
+    print(f"commit {report['commit'] or 'unknown'}{' (dirty)' if report['dirty'] else ''}, {report['cpus']} CPUs")
+    print(f"{'stage':>10s} {'size':>9s} {'rows':>9s} {'seconds':>9s} {'rows/s':>12s}")
+
+    if "scrape" in stages:
+        records.append(scrape_stage(verbose=verbose))
+
+    clf = None
+    if "scoring" in stages:
+        from benchmarks.synthetic_corpus import make_corpus
+        from benchmarks.tiny_model import build_tiny_classifier
+        clf = build_tiny_classifier(make_corpus(2000)["sample_text"].dropna().tolist())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            csv_path = write_corpus_csv(os.path.join(tmp, f"corpus_{size}.csv"), size)
+            if "keywords" in stages:
+                records.append(keyword_stage(csv_path, size, verbose))
+            if "scoring" in stages:
+                records.append(scoring_stage(csv_path, size, clf, score_rows, verbose))
+            if "clustering" in stages:
+                records.append(clustering_stage(csv_path, size, tmp, verbose))
+            if "velocity" in stages:
+                records.append(velocity_stage(csv_path, size, verbose))
+            os.remove(csv_path)
+
+    report["results"] = records
+    if output is None:
+        name = (report["commit"] or "unknown")[:12] + ("-dirty" if report["dirty"] else "")
+        output = os.path.join(RESULTS_DIR, f"{name}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    return report
+
+def compare(report, baseline_path, tolerance=0.2):
+    # Prints current / baseline seconds per (stage, size); returns the regressions
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    before = {(r["stage"], str(r["size"])): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nAgainst {baseline_path} (commit {(baseline.get('commit') or 'unknown')[:12]}):")
+    print(f"{'stage':>10s} {'size':>9s} {'before s':>9s} {'now s':>9s} {'ratio':>7s}")
+    for record in report["results"]:
+        old = before.get((record["stage"], str(record["size"])))
+        if old is None or not old["seconds"] or old["rows"] != record["rows"]:
+            continue
+        ratio = record["seconds"] / old["seconds"]
+        flag = ""
+        if ratio > 1 + tolerance and record["seconds"] >= MIN_SECONDS:
+            regressions.append((record["stage"], record["size"], ratio))
+            flag = "  slower"
+        print(f"{record['stage']:>10s} {str(record['size']):>9s} {old['seconds']:9.2f} {record['seconds']:9.2f} "
+              f"{ratio:6.2f}x{flag}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every pipeline stage on synthetic corpora")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--score-rows", type=int, default=SCORE_ROWS, help="texts scored per corpus size")
+    parser.add_argument("--output", help="results JSON (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="slowdown ratio above 1 counted as a regression")
+    parser.add_argument("--verbose", action="store_true", help="show the stages' own output")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.stages, args.score_rows, args.output, args.verbose)
+    if args.compare and compare(report, args.compare, args.tolerance):
+        sys.exit(1)
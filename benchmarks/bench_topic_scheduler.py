@@ -0,0 +1,115 @@
+# TopicScheduler against the local stand-in outlets, with the topics and keywords of
+# topics.json and headlines for all of them in the feeds.
+#
+# run(): one polling round for 1..4 topics, each topic scraped by its own scheduler (as
+# separate per-topic scrapers would) versus all topics in one scheduler. Both must collect
+# the same rows; the shared one fetches every feed and article once.
+#
+# run_adaptive(): the shared scheduler for a fixed time while one feed gets a new entry every
+# second and the others stay unchanged, with adaptive and with fixed polling intervals.
+#
+#   python -m benchmarks.bench_topic_scheduler
+import json
+import os
+import tempfile
+import threading
+import time
+
+from article_writer import ArticleTail
+from benchmarks.local_feed_server import LocalOutlets
+from topic_scheduler import CONFIG_PATH, Topic, TopicScheduler
+
+TOPIC_TITLES = [
+    "ICE agents detain workers in overnight raid",
+    "Senate weighs artificial intelligence safety bill",
+    "EPA rolls back power plant emissions rules",
+    "Voters head to the polls in special election",
+    "Judge blocks new deportation policy",
+    "OpenAI faces new scrutiny from regulators",
+    "Wildfires force evacuations across the West",
+    "Court strikes down congressional redistricting map",
+    "Immigration raids become issue in governor campaign",
+    "States move to ban deepfakes before the midterms",
+]
+
+def make_topics(local, names, quota=None):
+    with open(CONFIG_PATH, encoding="utf-8") as f:
+        config = json.load(f)
+    outlets = local.topics[local.topic]
+    return [Topic(name, outlets, config["topics"][name]["keywords"], poll_interval=2,
+                  max_per_ideology=quota, max_per_outlet=quota) for name in names]
+
+def scheduler(topics, tmp, output, tag, **kwargs):
+    # Runs sharing an output name append to the same CSV
+    return TopicScheduler(topics, output_csv=os.path.join(tmp, f"{output}.csv"), max_workers=16,
+                          requests_per_second=None, seen_url_store=os.path.join(tmp, f"{tag}_seen.sqlite"),
+                          feed_state_path=os.path.join(tmp, f"{tag}_feeds.sqlite"), **kwargs)
+
+def collected(output_csv):
+    # Each run gets its own servers (and ports), so rows are compared by outlet and title
+    return {(row["topic"], row["outlet"], row["title"]) for row in ArticleTail(output_csv).read()}
+
+def run(outlets_per_ideology=19, entries_per_feed=30, delay=0.02):
+    with open(CONFIG_PATH, encoding="utf-8") as f:
+        all_topics = list(json.load(f)["topics"])
+    rows = []
+    for n_topics in range(1, len(all_topics) + 1):
+        names = all_topics[:n_topics]
+        measured = {}
+        for mode in ("per topic", "shared"):
+            with LocalOutlets(outlets_per_ideology=outlets_per_ideology, entries_per_feed=entries_per_feed,
+                              delay=delay, keyword_titles=TOPIC_TITLES) as local, tempfile.TemporaryDirectory() as tmp:
+                groups = [[name] for name in names] if mode == "per topic" else [names]
+                start = time.perf_counter()
+                routing = 0.0
+                for i, group in enumerate(groups):
+                    s = scheduler(make_topics(local, group), tmp, "run", tag=f"run{i}")
+                    s.run(cycles=1)
+                    routing += s.routing_seconds
+                elapsed = time.perf_counter() - start
+                measured[mode] = (local.request_counts(), elapsed, routing, collected(os.path.join(tmp, "run.csv")))
+        assert measured["per topic"][3] == measured["shared"][3], "per-topic and shared runs collected different rows"
+        rows.append((n_topics, measured))
+
+    print(f"\n{'topics':>6s} {'mode':>10s} {'feed req':>9s} {'article req':>12s} {'rows':>5s} "
+          f"{'seconds':>8s} {'routing ms':>11s}")
+    for n_topics, measured in rows:
+        for mode, (counts, elapsed, routing, found) in measured.items():
+            print(f"{n_topics:6d} {mode:>10s} {counts['feed']:9d} {counts['article']:12d} {len(found):5d} "
+                  f"{elapsed:8.2f} {routing * 1000:11.1f}")
+    return rows
+
+def run_adaptive(duration=30.0, outlets_per_ideology=6, entries_per_feed=10, publish_every=1.0):
+    results = {}
+    for mode, bounds in (("adaptive", (0.5, 8.0)), ("fixed", (2.0, 2.0))):
+        with LocalOutlets(outlets_per_ideology=outlets_per_ideology, entries_per_feed=entries_per_feed, delay=0.0,
+                          keyword_titles=TOPIC_TITLES) as local, tempfile.TemporaryDirectory() as tmp:
+            s = scheduler(make_topics(local, ["immigration", "AI_policy"]), tmp, mode, mode,
+                          min_interval=bounds[0], max_interval=bounds[1])
+            hot = local.servers[0]
+            stop = threading.Event()
+
+            def publish():
+                i = 0
+                while not stop.wait(publish_every):
+                    i += 1
+                    local.publish(f"Judge blocks new deportation policy, update {i}", every=len(local.servers))
+
+            publisher = threading.Thread(target=publish, daemon=True)
+            publisher.start()
+            s.run(duration=duration)
+            stop.set()
+            publisher.join()
+            polls = sorted(server.RequestHandlerClass.counter["feed"] for server in local.servers[1:])
+            results[mode] = (hot.RequestHandlerClass.counter["feed"], polls[len(polls) // 2],
+                             local.request_counts()["feed"])
+
+    print(f"\n{duration:.0f}s, one feed publishing every {publish_every:.0f}s, {len(local.servers) - 1} idle feeds")
+    print(f"{'mode':>9s} {'busy feed polls':>16s} {'idle feed polls (median)':>25s} {'feed requests':>14s}")
+    for mode, (hot_polls, idle_polls, total) in results.items():
+        print(f"{mode:>9s} {hot_polls:16d} {idle_polls:25d} {total:14d}")
+    return results
+
+if __name__ == "__main__":
+    run()
+    run_adaptive()
@@ -0,0 +1,69 @@
+# Scaling of velocity_metrics() against the original analyze_velocity loops (row-wise
+# score_to_label, one filter of the full frame per ideology and per outlet) from 10k to 10M
+# rows. Plotting is left out of both. Where the original runs, both must agree on the first
+# publication per ideology and per outlet and on the daily counts.
+#
+#   python -m benchmarks.bench_velocity
+#   python -m benchmarks.bench_velocity --sizes 10000 100000 --legacy-max 100000
+import argparse
+import time
+
+from benchmarks.synthetic_corpus import make_velocity_frame
+from cluster_narratives import IDEOLOGIES, score_to_label, velocity_metrics
+
+def legacy_velocity(df):
+    df = df.copy()
+    df['combined_ideology_label'] = df['ideological_stance'].apply(score_to_label)
+    df = df.dropna(subset=['datetime', 'combined_ideology_label', 'outlet'])
+    df = df.sort_values('datetime')
+
+    first_article_times = {}
+    for ideology in IDEOLOGIES:
+        sub = df[df['combined_ideology_label'] == ideology]
+        if len(sub) == 0:
+            continue
+        first_article_times[ideology] = sub['datetime'].min()
+        sub['datetime'].max(), sub[['datetime', 'outlet', 'title']].head(3), sub[['datetime', 'outlet', 'title']].tail(3)
+
+    df['date'] = df['datetime'].dt.date
+    counts = df.groupby(['date', 'combined_ideology_label']).size().unstack(fill_value=0)
+
+    outlet_first_times = {}
+    for outlet in df['outlet'].unique():
+        outlet_first_times[outlet] = df[df['outlet'] == outlet]['datetime'].min()
+    return first_article_times, counts, outlet_first_times
+
+def check(result, legacy):
+    first_article_times, counts, outlet_first_times = legacy
+    assert result.ideology_summary['first'].to_dict() == first_article_times
+    assert result.outlet_first_times.to_dict() == outlet_first_times
+    assert result.outlet_first_times.is_monotonic_increasing
+    ours = result.daily_counts.rename(columns=str)
+    ours.index = ours.index.date
+    assert (ours[sorted(ours.columns)].to_numpy() == counts[sorted(counts.columns)].to_numpy()).all()
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+def run(sizes=(10_000, 100_000, 1_000_000, 10_000_000), legacy_max=10_000_000):
+    print(f"{'rows':>10s} {'original s':>11s} {'vectorized s':>13s} {'speedup':>8s}")
+    for n_rows in sizes:
+        df = make_velocity_frame(n_rows)
+        result, new_time = timed(velocity_metrics, df)
+        if n_rows <= legacy_max:
+            legacy, old_time = timed(legacy_velocity, df)
+            check(result, legacy)
+            print(f"{n_rows:10d} {old_time:11.3f} {new_time:13.3f} {old_time / new_time:7.1f}x")
+        else:
+            print(f"{n_rows:10d} {'-':>11s} {new_time:13.3f}")
+        del df, result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="velocity_metrics scaling benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000_000,
+                        help="largest corpus to also run the original loops on")
+    args = parser.parse_args()
+    run(args.sizes, args.legacy_max)
@@ -0,0 +1,192 @@
+# Local stand-in for the outlets in scrape_outlets.topics.
+#
+# Each outlet gets its own HTTP server on 127.0.0.1 (a distinct host:port, so the
+# per-host limits in the fetch engine apply per outlet) serving a canned RSS feed
+# and one HTML page per feed entry. Feeds carry an ETag and answer a matching
+# If-None-Match with 304. An optional delay per request simulates network latency.
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+import time
+import zlib
+
+KEYWORD_TITLES = [
+    "ICE agents detain workers in overnight raid",
+    "Border Patrol reports drop in crossings",
+    "Judge blocks new deportation policy",
+    "Asylum seekers wait at the border for hearings",
+    "Lawmakers clash over immigration reform bill",
+]
+
+OTHER_TITLES = [
+    "Stocks close higher as tech rallies",
+    "Local team wins championship in overtime",
+    "New study links sleep and memory",
+]
+
+PARAGRAPH = (
+    "Officials said on Tuesday that the agency would expand operations in several states, "
+    "drawing criticism from advocacy groups and praise from local sheriffs. The announcement "
+    "follows months of debate in Congress over funding levels and oversight of detention "
+    "facilities, and comes as court challenges continue to work their way through the system."
+)
+
+class OutletHandler(BaseHTTPRequestHandler):
+    # Set per server in serve_outlet()
+    outlet = ""
+    entries = []
+    delay = 0.0
+    counter = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type, headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        if self.delay:
+            time.sleep(self.delay)
+        with self.counter["lock"]:
+            kind = "feed" if self.path == "/feed.xml" else "article"
+            self.counter[kind] += 1
+
+        host = f"http://{self.headers.get('Host')}"
+        if self.path == "/feed.xml":
+            body = render_feed(self.outlet, host, self.entries)
+            etag = f'"{zlib.crc32(body.encode("utf-8")):08x}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self._send(200, body, "application/rss+xml", {"ETag": etag})
+            return
+
+        for i, (title, published) in enumerate(self.entries):
+            if self.path == f"/articles/{i}.html":
+                self._send(200, render_article(title, published), "text/html; charset=utf-8")
+                return
+
+        self._send(404, "not found", "text/plain")
+
+def render_feed(outlet, host, entries):
+    items = []
+    for i, (title, published) in enumerate(entries):
+        items.append(
+            "<item>"
+            f"<title>{escape(title)}</title>"
+            f"<link>{host}/articles/{i}.html</link>"
+            f"<guid>{host}/articles/{i}.html</guid>"
+            f"<pubDate>{format_datetime(published)}</pubDate>"
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<rss version="2.0"><channel>'
+        f"<title>{escape(outlet)}</title><link>{host}/</link><description>{escape(outlet)}</description>"
+        + "".join(items) +
+        "</channel></rss>"
+    )
+
+def render_article(title, published):
+    body = "".join(f"<p>{PARAGRAPH}</p>" for _ in range(6))
+    return (
+        "<html><head>"
+        f"<title>{escape(title)}</title>"
+        f'<meta property="og:title" content="{escape(title)}">'
+        f'<meta property="article:published_time" content="{published.isoformat()}">'
+        "</head><body>"
+        f"<article><h1>{escape(title)}</h1>{body}</article>"
+        "</body></html>"
+    )
+
+def make_entries(n_entries, keyword_every=2, stale_every=5, now=None, keyword_titles=KEYWORD_TITLES):
+    # Every keyword_every-th entry has a headline from keyword_titles (immigration by
+    # default), the rest are off-topic; every stale_every-th entry is older than the
+    # scraper's 30-day window
+    now = now or datetime.now(timezone.utc)
+    entries = []
+    for i in range(n_entries):
+        if i % keyword_every == 0:
+            title = keyword_titles[(i // keyword_every) % len(keyword_titles)]
+        else:
+            title = OTHER_TITLES[i % len(OTHER_TITLES)]
+        age = timedelta(days=45) if stale_every and i % stale_every == stale_every - 1 else timedelta(hours=i)
+        entries.append((f"{title} ({i})", now - age))
+    return entries
+
+def serve_outlet(outlet, entries, delay=0.0):
+    counter = {"feed": 0, "article": 0, "lock": threading.Lock()}
+    handler = type("Handler", (OutletHandler,), {"outlet": outlet, "entries": entries, "delay": delay, "counter": counter})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class LocalOutlets:
+    # Starts one server per outlet and exposes a topics dict shaped like scrape_outlets.topics
+    def __init__(self, topic="immigration", outlets_per_ideology=6, entries_per_feed=10, keyword_every=2, delay=0.05,
+                 keyword_titles=KEYWORD_TITLES):
+        self.topic = topic
+        self.servers = []
+        ideologies = {}
+        for ideology in ["conservative", "moderate", "liberal"]:
+            ideologies[ideology] = {}
+            for i in range(outlets_per_ideology):
+                outlet = f"Local {ideology.title()} {i}"
+                server = serve_outlet(outlet, make_entries(entries_per_feed, keyword_every, keyword_titles=keyword_titles),
+                                      delay)
+                self.servers.append(server)
+                ideologies[ideology][outlet] = f"http://127.0.0.1:{server.server_address[1]}/feed.xml"
+        self.topics = {topic: ideologies}
+
+    def publish(self, title, published=None, every=1):
+        # Append a new entry to every every-th outlet's feed
+        published = published or datetime.now(timezone.utc)
+        for server in self.servers[::every]:
+            server.RequestHandlerClass.entries.append((title, published))
+
+    def request_counts(self):
+        # {"feed": n, "article": n} requests served so far, over all outlets
+        totals = {"feed": 0, "article": 0}
+        for server in self.servers:
+            for kind in totals:
+                totals[kind] += server.RequestHandlerClass.counter[kind]
+        return totals
+
+    def close(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    with LocalOutlets() as local:
+        for ideology, outlets in local.topics[local.topic].items():
+            for outlet, url in outlets.items():
+                print(f"{ideology:12} {outlet:24} {url}")
+        print("Serving, press Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
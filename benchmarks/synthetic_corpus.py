@@ -0,0 +1,76 @@
+# Synthetic article corpus with the columns of news_bias_articles_clustered.csv, for
+# benchmarks at sizes the real scrape does not reach. Outlets come from score_bias with
+# their real ideology, stances lean accordingly, ~24% of rows have no text and no scores
+# (as in the real file), and sample_text is a 500-character snippet drawn from a pool.
+import numpy as np
+import pandas as pd
+
+from score_bias import OUTLET_TO_IDEOLOGY
+
+TOPICS = ["AI_policy", "ClimateChange", "Elections", "immigration"]
+STANCE_MEANS = {"liberal": 25.0, "moderate": 50.0, "conservative": 75.0}
+WORDS = (
+    "officials said the agency would expand operations in several states drawing criticism from "
+    "advocacy groups and praise from local sheriffs the announcement follows months of debate in "
+    "congress over funding levels and oversight of detention facilities court challenges continue "
+    "policy climate election voters model regulation emissions ballot border senate governor"
+).split()
+COLUMNS = [
+    "topic", "outlet", "datetime", "title", "url", "sample_text", "ideological_stance", "factual_grounding",
+    "framing_choices", "emotional_tone", "source_transparency", "cluster",
+]
+
+def make_corpus(n_rows, seed=0, start="2025-08-01", days=30, empty_fraction=0.24, pool_size=2000):
+    rng = np.random.default_rng(seed)
+    outlets = np.array(sorted(OUTLET_TO_IDEOLOGY))
+    ideology = np.array([OUTLET_TO_IDEOLOGY[o] for o in outlets])
+    texts = np.array([" ".join(rng.choice(WORDS, size=120))[:500] for _ in range(pool_size)], dtype=object)
+    titles = np.array([" ".join(rng.choice(WORDS, size=9)).capitalize() for _ in range(pool_size)], dtype=object)
+
+    outlet_idx = rng.integers(0, len(outlets), size=n_rows)
+    minutes = rng.integers(0, days * 24 * 60, size=n_rows)
+    when = pd.Timestamp(start) + pd.to_timedelta(np.sort(minutes), unit="min")
+    empty = rng.random(n_rows) < empty_fraction
+
+    df = pd.DataFrame({
+        "topic": rng.choice(TOPICS, size=n_rows),
+        "outlet": outlets[outlet_idx],
+        "datetime": when.strftime("%Y-%m-%d %H:%M"),
+        "title": titles[rng.integers(0, pool_size, size=n_rows)],
+        "url": [f"https://example.com/{i}" for i in range(n_rows)],
+        "sample_text": np.where(empty, None, texts[rng.integers(0, pool_size, size=n_rows)]),
+    })
+    stance_mean = np.array([STANCE_MEANS[i] for i in ideology])[outlet_idx]
+    df["ideological_stance"] = np.clip(rng.normal(stance_mean, 15.0), 0, 100).round(2)
+    for dim in ["factual_grounding", "framing_choices", "emotional_tone", "source_transparency"]:
+        df[dim] = rng.uniform(0, 100, size=n_rows).round(2)
+    score_columns = COLUMNS[6:11]
+    df.loc[empty, score_columns] = np.nan
+    df["cluster"] = np.where(empty, -1, rng.integers(0, 3, size=n_rows))
+    return df[COLUMNS]
+
+def make_velocity_frame(n_rows, seed=0, start="2025-08-01", days=30, empty_fraction=0.24, pool_size=2000):
+    # Just the columns analyze_velocity loads, already typed (datetime64, float scores), for
+    # corpora too large to go through make_corpus and CSV parsing
+    rng = np.random.default_rng(seed)
+    outlets = np.array(sorted(OUTLET_TO_IDEOLOGY), dtype=object)
+    ideology = np.array([OUTLET_TO_IDEOLOGY[o] for o in outlets])
+    titles = np.array([" ".join(rng.choice(WORDS, size=9)).capitalize() for _ in range(pool_size)], dtype=object)
+    outlet_idx = rng.integers(0, len(outlets), size=n_rows)
+    stance = np.clip(rng.normal(np.array([STANCE_MEANS[i] for i in ideology])[outlet_idx], 15.0), 0, 100)
+    stance[rng.random(n_rows) < empty_fraction] = np.nan
+    minutes = rng.integers(0, days * 24 * 60, size=n_rows)
+    return pd.DataFrame({
+        "datetime": pd.Timestamp(start) + pd.to_timedelta(minutes, unit="min"),
+        "outlet": outlets[outlet_idx],
+        "title": titles[rng.integers(0, pool_size, size=n_rows)],
+        "ideological_stance": stance.round(2),
+    })
+
+def write_corpus_csv(path, n_rows, chunk_rows=250_000, seed=0):
+    # Written in chunks so that corpora of millions of rows do not have to fit in memory
+    for offset in range(0, n_rows, chunk_rows):
+        chunk = make_corpus(min(chunk_rows, n_rows - offset), seed=seed + offset)
+        chunk["url"] = [f"https://example.com/{offset + i}" for i in range(len(chunk))]
+        chunk.to_csv(path, mode="w" if offset == 0 else "a", header=offset == 0, index=False)
+    return path
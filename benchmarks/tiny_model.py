@@ -0,0 +1,78 @@
+# A tiny, randomly initialised BART zero-shot classifier built entirely offline.
+#
+# The word-level tokenizer is trained on the given texts and wrapped to behave like the
+# BART tokenizer (<s> A </s></s> B </s>), and the model config carries the MNLI label
+# names, so it drops into score_bias wherever the bart-large-mnli pipeline is used.
+# Scores are meaningless; only speed and batching behaviour are representative. Weights
+# are initialised wider than BART's default (init_std=0.2 rather than 0.02) so that the
+# scores at least vary with the input and agreement between modes/backends is visible.
+# HashingEncoder stands in for the sentence embedding model in the same way.
+import zlib
+
+import numpy as np
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, processors, trainers
+from transformers import BartConfig, BartForSequenceClassification, PreTrainedTokenizerFast, pipeline
+
+from score_bias import BIAS_DIMENSIONS, HYPOTHESIS_TEMPLATE
+
+SPECIAL_TOKENS = ["<s>", "<pad>", "</s>", "<unk>"]
+
+def build_tokenizer(texts, vocab_size=5000):
+    hypotheses = [HYPOTHESIS_TEMPLATE.format(label) for labels in BIAS_DIMENSIONS.values() for label in labels]
+    tokenizer = Tokenizer(models.WordLevel(unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.train_from_iterator(
+        list(texts) + hypotheses,
+        trainers.WordLevelTrainer(vocab_size=vocab_size, special_tokens=SPECIAL_TOKENS),
+    )
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="<s> $A </s>",
+        pair="<s> $A </s> </s> $B </s>",
+        special_tokens=[(tok, tokenizer.token_to_id(tok)) for tok in ["<s>", "</s>"]],
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        bos_token="<s>", eos_token="</s>", pad_token="<pad>", unk_token="<unk>",
+        model_max_length=1024,
+    )
+
+def build_tiny_classifier(texts, d_model=128, layers=2, seed=0, init_std=0.2):
+    tokenizer = build_tokenizer(texts)
+    config = BartConfig(
+        vocab_size=len(tokenizer),
+        d_model=d_model,
+        encoder_layers=layers,
+        decoder_layers=layers,
+        encoder_attention_heads=4,
+        decoder_attention_heads=4,
+        encoder_ffn_dim=d_model * 4,
+        decoder_ffn_dim=d_model * 4,
+        max_position_embeddings=1024,
+        init_std=init_std,
+        pad_token_id=tokenizer.pad_token_id,
+        bos_token_id=tokenizer.bos_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+        decoder_start_token_id=tokenizer.eos_token_id,
+        id2label={0: "contradiction", 1: "neutral", 2: "entailment"},
+        label2id={"contradiction": 0, "neutral": 1, "entailment": 2},
+    )
+    torch.manual_seed(seed)
+    model = BartForSequenceClassification(config).eval()
+    return pipeline("zero-shot-classification", model=model, tokenizer=tokenizer, device="cpu")
+
+class HashingEncoder:
+    # Offline stand-in for the SentenceTransformer in cluster_outlets: L2-normalised hashed
+    # bag of words with the same 384 dimensions and encode() signature; `name` keys its own
+    # embedding store (cluster_outlets.encoder_name)
+    def __init__(self, dim=384):
+        self.dim = dim
+        self.name = f"hashing-encoder-{dim}"
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False, convert_to_numpy=True):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[i, zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
@@ -1,6 +1,32 @@
+import os
+from dataclasses import dataclass
+import argparse
+import numpy as np
 import pandas as pd
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
 import seaborn as sns
+from near_duplicates import mark_stories
+
+# Columns the velocity analysis reads; the rest of the stage file is never parsed
+VELOCITY_COLUMNS = ['datetime', 'outlet', 'title', 'ideological_stance']
+DEDUPE_COLUMNS = ['topic', 'sample_text', 'is_duplicate']
+IDEOLOGIES = ['Liberal', 'Moderate', 'Conservative']
+IDEOLOGY_BINS = [-np.inf, 33, 66, np.inf]
+
+# Plotting: "show" opens interactive windows, "file" renders headless (Agg) to plot_dir,
+# "none" skips plotting. Above SCATTER_MAX_POINTS articles the timeline shows article
+# counts on a TIMELINE_BINS (time x stance) grid instead of one marker per article, so
+# drawing time does not grow with the corpus; daily counts are always drawn from the
+# aggregated table.
+PLOT_MODES = ("show", "file", "none")
+PLOT_DIR = "velocity_plots"
+PLOT_FORMATS = ("png", "svg")
+SCATTER_MAX_POINTS = 5000
+TIMELINE_BINS = (200, 50)
+PALETTE = {'Liberal': 'blue', 'Moderate': 'green', 'Conservative': 'red', 'Unknown': 'gray'}
 
 def score_to_label(score):
     if pd.isna(score):
@@ -12,105 +38,231 @@ def score_to_label(score):
     else:
         return "Conservative"
 
-def analyze_velocity(input_csv="news_bias_articles_scored.csv"):
-    # Load data with datetime parsing
-    df = pd.read_csv(input_csv, parse_dates=['datetime'])
+def ideology_labels(scores):
+    # score_to_label for a whole column in one pd.cut pass (same bins, right-inclusive);
+    # categorical, with "Unknown" for missing scores
+    labels = pd.cut(pd.to_numeric(scores), bins=IDEOLOGY_BINS, labels=IDEOLOGIES)
+    return labels.cat.add_categories("Unknown").fillna("Unknown")
 
-    # Map numeric ideological stance to label
-    df['combined_ideology_label'] = df['ideological_stance'].apply(score_to_label)
+@dataclass
+class VelocityResult:
+    total: int
+    ideology_summary: pd.DataFrame   # per ideology present: articles, first, last
+    lag_hours: pd.DataFrame          # .loc[a, b] = hours from a's first article to b's
+    outlet_first_times: pd.Series    # outlet -> first article, earliest outlet first
+    daily_counts: pd.DataFrame       # date x ideology article counts
+    first_articles: pd.DataFrame     # first 3 articles of each ideology
+    last_articles: pd.DataFrame      # last 3 articles of each ideology
+    frame: pd.DataFrame              # the cleaned articles the metrics came from (input order)
 
-    # Clean dataset
+def velocity_metrics(df, n_examples=3):
+    # All analyze_velocity metrics, each in a single groupby pass. Only the timestamps are
+    # sorted (an argsort); the frame itself, with its string columns, is left in place.
+    df = df.assign(combined_ideology_label=ideology_labels(df['ideological_stance']))
     df = df.dropna(subset=['datetime', 'combined_ideology_label', 'outlet'])
+    df['date'] = df['datetime'].dt.normalize()
+
+    summary = df.groupby('combined_ideology_label', observed=True)['datetime'].agg(
+        articles='size', first='min', last='max')
+    summary = summary.loc[[i for i in IDEOLOGIES if i in summary.index]]
+    first = summary['first'].to_numpy()
+    lag_hours = pd.DataFrame((first[None, :] - first[:, None]) / np.timedelta64(1, 'h'),
+                             index=summary.index, columns=summary.index)
+
+    # Earliest and latest articles of each ideology, by position in time order
+    order = np.argsort(df['datetime'].to_numpy(), kind='stable')
+    codes = df['combined_ideology_label'].cat.codes.to_numpy()[order]
+    heads, tails = [], []
+    for code in range(len(IDEOLOGIES)):
+        positions = order[np.flatnonzero(codes == code)]
+        heads.append(positions[:n_examples])
+        tails.append(positions[-n_examples:])
+
+    return VelocityResult(
+        total=len(df),
+        ideology_summary=summary,
+        lag_hours=lag_hours,
+        outlet_first_times=df.groupby('outlet')['datetime'].min().sort_values(kind='stable'),
+        daily_counts=df.groupby(['date', 'combined_ideology_label'], observed=True).size().unstack(fill_value=0),
+        first_articles=df.iloc[np.concatenate(heads)],
+        last_articles=df.iloc[np.concatenate(tails)],
+        frame=df,
+    )
 
-    # Sort by datetime ascending
-    df = df.sort_values('datetime')
+def load_velocity_frame(source, dedupe=False, topics=None, start=None, end=None):
+    # Only the columns analyze_velocity needs, from a stage CSV or a Parquet dataset directory
+    # written by storage.py. For Parquet, topics/start/end also prune partitions.
+    wanted = VELOCITY_COLUMNS + (DEDUPE_COLUMNS if dedupe else []) + (['topic'] if topics is not None else [])
+    if os.path.isdir(source):
+        from storage import dataset, read_articles
+        columns = [c for c in wanted if c in dataset(source).schema.names]
+        return read_articles(source, columns=columns, topics=topics, start=start, end=end)
+    df = pd.read_csv(source, usecols=lambda c: c in wanted, parse_dates=['datetime'])
+    if topics is not None and 'topic' in df.columns:
+        df = df[df['topic'].isin(topics)]
+    if start is not None:
+        df = df[df['datetime'].dt.normalize() >= pd.Timestamp(start).normalize()]
+    if end is not None:
+        df = df[df['datetime'].dt.normalize() <= pd.Timestamp(end).normalize()]
+    return df
 
-    print(f"Total articles analyzed: {len(df)}\n")
+def new_figure(plot_mode, figsize):
+    # pyplot figures for interactive display; bare Figures (Agg canvas, no pyplot state or
+    # display needed) for files
+    if plot_mode == "show":
+        return plt.figure(figsize=figsize)
+    return Figure(figsize=figsize)
+
+def timeline_density(frame, bins=TIMELINE_BINS):
+    # Article counts per (time bucket, stance bucket), in one bincount over the two columns;
+    # returns the time edges (matplotlib date numbers), stance edges and the count grid
+    stance = frame['ideological_stance'].to_numpy(dtype=float)
+    times = frame['datetime'].to_numpy().astype('datetime64[ns]').astype('int64')
+    scored = ~np.isnan(stance)
+    stance, times = stance[scored], times[scored]
+    n_time, n_stance = bins
+    start, end = (times.min(), times.max()) if len(times) else (0, 0)
+    span = max(end - start, 1)
+    x = np.minimum(((times - start) / span * n_time).astype('int64'), n_time - 1)
+    y = np.clip((stance / 100 * n_stance).astype('int64'), 0, n_stance - 1)
+    counts = np.bincount(x * n_stance + y, minlength=n_time * n_stance).reshape(n_time, n_stance)
+    time_edges = mdates.date2num(pd.to_datetime(np.linspace(start, start + span, n_time + 1).astype('int64')))
+    return time_edges, np.linspace(0, 100, n_stance + 1), counts
+
+def plot_timeline(frame, fig):
+    # Ideological stance over time: one marker per article for small corpora, otherwise
+    # article counts per time/stance bucket with the ideology boundaries marked
+    ax = fig.subplots()
+    if len(frame) <= SCATTER_MAX_POINTS:
+        plotted = set(frame.loc[frame['ideological_stance'].notna(), 'combined_ideology_label'])
+        present = [label for label in PALETTE if label in plotted]
+        sns.scatterplot(
+            data=frame,
+            x='datetime',
+            y='ideological_stance',
+            hue='combined_ideology_label',
+            style='combined_ideology_label',
+            hue_order=present,
+            style_order=present,
+            palette=PALETTE,
+            s=100,
+            alpha=0.7,
+            ax=ax,
+        )
+        ax.legend(title="Ideology")
+    else:
+        time_edges, stance_edges, counts = timeline_density(frame)
+        mesh = ax.pcolormesh(time_edges, stance_edges, np.ma.masked_equal(counts.T, 0),
+                             norm=LogNorm(), cmap='viridis')
+        fig.colorbar(mesh, ax=ax, label="Articles")
+        for boundary in IDEOLOGY_BINS[1:-1]:
+            ax.axhline(boundary, color='gray', linestyle='--', linewidth=0.8)
+        ax.xaxis_date()
+    ax.set_title("Publication Timeline: Ideological Stance Over Time")
+    ax.set_xlabel("Publication DateTime")
+    ax.set_ylabel("Ideological Stance Score (0=Liberal, 100=Conservative)")
+    fig.tight_layout()
+
+def plot_daily_counts(daily_counts, fig):
+    ax = fig.subplots()
+    daily_counts = daily_counts.asfreq('D', fill_value=0) if len(daily_counts) else daily_counts
+    for ideology in daily_counts.columns:
+        ax.plot(daily_counts.index, daily_counts[ideology], label=str(ideology), color=PALETTE.get(str(ideology)))
+    ax.legend(title="Ideology")
+    ax.set_title("Daily Publication Counts by Ideology")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Number of Articles")
+    fig.autofmt_xdate()
+    fig.tight_layout()
+
+def plot_velocity(result, plot_mode="show", plot_dir=PLOT_DIR, plot_format="png"):
+    # Draw the timeline and daily-count plots of a VelocityResult; returns the files written
+    if plot_mode not in PLOT_MODES:
+        raise ValueError(f"plot_mode must be one of {PLOT_MODES}, not {plot_mode!r}")
+    if plot_mode == "none":
+        return []
+    plots = [("velocity_timeline", (14, 7), lambda fig: plot_timeline(result.frame, fig)),
+             ("velocity_daily_counts", (14, 6), lambda fig: plot_daily_counts(result.daily_counts, fig))]
+    paths = []
+    for name, figsize, draw in plots:
+        fig = new_figure(plot_mode, figsize)
+        draw(fig)
+        if plot_mode == "file":
+            os.makedirs(plot_dir, exist_ok=True)
+            path = os.path.join(plot_dir, f"{name}.{plot_format}")
+            fig.savefig(path, format=plot_format)
+            paths.append(path)
+    if plot_mode == "show":
+        plt.show()
+    else:
+        print(f"Saved plots: {', '.join(paths)}")
+    return paths
+
+def analyze_velocity(input_csv="news_bias_articles_scored.csv", dedupe=False, plot_mode="show", plot_dir=PLOT_DIR,
+                     plot_format="png"):
+    # Load data with datetime parsing (input_csv may also be a Parquet dataset directory)
+    df = load_velocity_frame(input_csv, dedupe=dedupe)
+
+    # Count each syndicated story once, at its earliest copy
+    if dedupe:
+        if 'is_duplicate' not in df.columns:
+            mark_stories(df)
+        print(f"Dropping {int(df['is_duplicate'].sum())} near-duplicate articles")
+        df = df[~df['is_duplicate'].astype(bool)]
+
+    result = velocity_metrics(df)
+
+    print(f"Total articles analyzed: {result.total}\n")
 
     # === Per ideology summary ===
-    first_article_times = {}
-    for ideology in ['Liberal', 'Moderate', 'Conservative']:
-        sub = df[df['combined_ideology_label'] == ideology]
-        if len(sub) == 0:
+    columns = ['datetime', 'outlet', 'title']
+    for ideology in IDEOLOGIES:
+        if ideology not in result.ideology_summary.index:
             print(f"No articles found for ideology: {ideology}\n")
             continue
-
-        start_time = sub['datetime'].min()
-        end_time = sub['datetime'].max()
-        count = len(sub)
-        first_article_times[ideology] = start_time
-
+        row = result.ideology_summary.loc[ideology]
         print(f"Ideology: {ideology}")
-        print(f"  Articles: {count}")
-        print(f"  Time range: {start_time} to {end_time}")
+        print(f"  Articles: {row['articles']}")
+        print(f"  Time range: {row['first']} to {row['last']}")
         print(f"  First 3 articles:")
-        print(sub[['datetime', 'outlet', 'title']].head(3).to_string(index=False))
+        first = result.first_articles
+        print(first.loc[first['combined_ideology_label'] == ideology, columns].to_string(index=False))
         print(f"  Last 3 articles:")
-        print(sub[['datetime', 'outlet', 'title']].tail(3).to_string(index=False))
+        last = result.last_articles
+        print(last.loc[last['combined_ideology_label'] == ideology, columns].to_string(index=False))
         print()
 
     # === Publication counts per day per ideology ===
-    df['date'] = df['datetime'].dt.date
-    counts = df.groupby(['date', 'combined_ideology_label']).size().unstack(fill_value=0)
     print("Publication counts per day per ideology:")
-    print(counts)
+    print(result.daily_counts)
     print()
 
-    # === Calculate lag times between first article publications (in hours) per ideology ===
+    # === Lag times between first article publications (in hours) per ideology ===
     print("Lag times between first article publications (hours):")
-    ideologies = ['Liberal', 'Moderate', 'Conservative']
-    for i in range(len(ideologies)):
-        for j in range(i+1, len(ideologies)):
-            a, b = ideologies[i], ideologies[j]
-            if a in first_article_times and b in first_article_times:
-                lag = (first_article_times[b] - first_article_times[a]).total_seconds() / 3600
-                print(f"  {a} -> {b}: {lag:.2f} hours")
+    present = result.lag_hours.index.tolist()
+    for i, a in enumerate(present):
+        for b in present[i + 1:]:
+            print(f"  {a} -> {b}: {result.lag_hours.loc[a, b]:.2f} hours")
     print()
 
     # === Per outlet first article times (to find initiators) ===
     print("First article publication times per outlet:")
-    outlets = df['outlet'].unique()
-    outlet_first_times = {}
-    for outlet in outlets:
-        out_sub = df[df['outlet'] == outlet]
-        first_time = out_sub['datetime'].min()
-        outlet_first_times[outlet] = first_time
+    for outlet, first_time in result.outlet_first_times.items():
         print(f"  {outlet}: {first_time}")
     print()
 
-    # === Visualization: Timeline scatter plot with ideological stance ===
-    plt.figure(figsize=(14, 7))
-    sns.scatterplot(
-        data=df, 
-        x='datetime', 
-        y='ideological_stance', 
-        hue='combined_ideology_label', 
-        style='combined_ideology_label',
-        palette={'Liberal':'blue', 'Moderate':'green', 'Conservative':'red'}, 
-        s=100,
-        alpha=0.7
-    )
-    plt.title("Publication Timeline: Ideological Stance Over Time")
-    plt.xlabel("Publication DateTime")
-    plt.ylabel("Ideological Stance Score (0=Liberal, 100=Conservative)")
-    plt.legend(title="Ideology")
-    plt.tight_layout()
-    plt.show()
-
-    # === Additional Visualization: Article count over time by ideology and outlet ===
-    plt.figure(figsize=(14, 6))
-    sns.lineplot(
-        data=df, 
-        x='date', 
-        y=df.groupby(['date', 'combined_ideology_label']).size().reindex(df['date']).values, 
-        hue='combined_ideology_label',
-        palette={'Liberal':'blue', 'Moderate':'green', 'Conservative':'red'}
-    )
-    plt.title("Daily Publication Counts by Ideology")
-    plt.xlabel("Date")
-    plt.ylabel("Number of Articles")
-    plt.tight_layout()
-    plt.show()
+    plot_velocity(result, plot_mode, plot_dir, plot_format)
+
+    return result
 
 if __name__ == "__main__":
-    analyze_velocity()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Publication velocity per ideology and outlet")
+    parser.add_argument("--input", default="news_bias_articles_scored.csv",
+                        help="stage CSV or Parquet dataset directory (storage.py)")
+    parser.add_argument("--dedupe", action="store_true", help="count each syndicated story once")
+    parser.add_argument("--plot", choices=PLOT_MODES, default="show",
+                        help="show plots interactively, write them to --plot-dir, or skip them")
+    parser.add_argument("--plot-dir", default=PLOT_DIR)
+    parser.add_argument("--format", choices=PLOT_FORMATS, default="png")
+    args = parser.parse_args()
+    analyze_velocity(args.input, args.dedupe, args.plot, args.plot_dir, args.format)
\ No newline at end of file
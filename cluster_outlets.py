@@ -24,20 +24,103 @@
 #
 # This clustering helps group articles into narrative or ideological groups per topic, 
 # enabling analysis of how bias propagates differently across political leanings.
+import argparse
+import os
+from functools import lru_cache
 import pandas as pd
 from sentence_transformers import SentenceTransformer
 from sklearn.cluster import KMeans
+from embedding_store import EmbeddingStore
+from incremental_clusters import load_clusterer, save_clusterer
+from near_duplicates import mark_stories
+from storage import load_table, save_table
+
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+EMBEDDING_STORE_DIR = "embedding_store"
+EMBEDDING_BATCH_SIZE = 256
+CLUSTER_STATE_DIR = "cluster_state"
+
+@lru_cache(maxsize=None)
+def get_embedding_model():
+    # Load Sentence-BERT model for embeddings
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+def encoder_name(model=None, model_name=None):
+    # Name the embedding store and cluster state of an encoder are kept under, so vectors of
+    # different encoders never mix: EMBEDDING_MODEL for the default Sentence-BERT model, else
+    # model_name or the encoder's own `name` attribute
+    if model is None:
+        return model_name or EMBEDDING_MODEL
+    name = model_name or getattr(model, "name", None)
+    if not name:
+        raise ValueError(f"Encoder {type(model).__name__} has no `name`; pass model_name so its vectors "
+                         f"are not stored as {EMBEDDING_MODEL}'s")
+    return name
+
+def encoder_state_dir(state_dir, name):
+    # Cluster state of a substitute encoder goes to its own subdirectory of state_dir
+    if name == EMBEDDING_MODEL:
+        return state_dir
+    return os.path.join(state_dir, name.replace("/", "__"))
+
+def embed_texts(df, store_dir=EMBEDDING_STORE_DIR, batch_size=EMBEDDING_BATCH_SIZE, model=None, store=None,
+                verbose=True, model_name=None):
+    # Store row for every non-empty sample_text (-1 for empty ones). Only texts missing from
+    # the store are encoded, all topics in one batched pass, grouped by topic so that a
+    # topic's new vectors land in consecutive rows. The model is only loaded if needed;
+    # long-running callers pass their own model and open store to reuse them. The store is
+    # the one of the encoder used (see encoder_name).
+    name = encoder_name(model, model_name)
+    if store is None:
+        store = EmbeddingStore(store_dir, name)
+    elif store.model_name != name:
+        raise ValueError(f"Embedding store of {store.model_name} given for encoder {name}")
+    texts = df['sample_text'].fillna("")
+    nonempty = texts[texts.str.strip() != ""]
+    ordered = nonempty.loc[df.loc[nonempty.index, 'topic'].sort_values(kind="stable").index]
+
+    def encode(new_texts):
+        if verbose:
+            print(f"Computing embeddings for {len(new_texts)} new articles...")
+        encoder = model or get_embedding_model()
+        return encoder.encode(new_texts, batch_size=batch_size, show_progress_bar=verbose, convert_to_numpy=True)
+
+    rows = pd.Series(-1, index=df.index, dtype="int64")
+    rows[ordered.index] = store.rows_for(ordered.tolist(), encode)
+    if verbose:
+        print(store.summary())
+    return store, rows
 
 def narrative_clustering_and_labeling(
     input_csv="news_bias_articles_scored.csv", 
     output_csv="news_bias_articles_clustered_labeled.csv", 
-    n_clusters=3
+    n_clusters=3,
+    store_dir=EMBEDDING_STORE_DIR,
+    incremental=False,
+    state_dir=CLUSTER_STATE_DIR,
+    dedupe=False,
+    embedding_model=None,
+    embedding_model_name=None,
 ):
-    # Load the scored CSV with ideological_stance scores
-    df = pd.read_csv(input_csv)
-
-    # Load Sentence-BERT model for embeddings
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+    # With incremental=True, per-topic centroids are kept in state_dir between runs and only
+    # articles not seen before are folded in, so cluster IDs and labels stay stable over time
+    # (see incremental_clusters.TopicClusterer). Otherwise every topic is refit from scratch.
+    # With dedupe=True, syndicated copies (near_duplicates.mark_stories) are left out of the
+    # fit and take the cluster of their story's canonical article. embedding_model replaces
+    # the Sentence-BERT model (anything with its encode(), e.g. for offline benchmarks); its
+    # vectors and cluster state are kept apart under its name (see encoder_name).
+    # input_csv and output_csv may also be Parquet dataset directories (see storage).
+
+    # Load the scored articles with ideological_stance scores
+    df = load_table(input_csv)
+    if dedupe:
+        mark_stories(df)
+        print(f"{int(df['is_duplicate'].sum())} near-duplicate articles in {df['story_id'].nunique()} stories")
+
+    # Embeddings for every article, from the persistent store
+    name = encoder_name(embedding_model, embedding_model_name)
+    state_dir = encoder_state_dir(state_dir, name)
+    store, store_rows = embed_texts(df, store_dir, model=embedding_model, model_name=name)
 
     # Prepare lists for cluster IDs and cluster labels
     cluster_ids = [-1] * len(df)
@@ -52,13 +135,32 @@ def narrative_clustering_and_labeling(
 
         # Filter out empty texts (no embeddings for empty texts)
         valid_indices = [i for i, t in enumerate(texts) if t.strip() != ""]
+        if dedupe:
+            valid_indices = [i for i in valid_indices if not df.at[subset_idx[i], 'is_duplicate']]
         if len(valid_indices) == 0:
             print(f"No valid texts for topic '{topic}', skipping.")
             continue
         texts_nonempty = [texts[i] for i in valid_indices]
 
-        print(f"Computing embeddings for topic '{topic}' with {len(texts_nonempty)} articles...")
-        embeddings = model.encode(texts_nonempty, show_progress_bar=True)
+        # Read vectors straight from the memory-mapped store
+        embeddings = store.vectors(store_rows[[subset_idx[i] for i in valid_indices]].to_numpy())
+
+        if incremental:
+            clusterer = load_clusterer(state_dir, topic, n_clusters)
+            keys = [EmbeddingStore.key(t) for t in texts_nonempty]
+            stances = df.loc[[subset_idx[i] for i in valid_indices], 'ideological_stance'].tolist()
+            seen = len(clusterer.assignments)
+            ids, labels = clusterer.update(keys, embeddings, stances)
+            save_clusterer(state_dir, clusterer)
+            if clusterer.model is None:
+                print(f"Topic '{topic}': {len(clusterer.held)} articles held until there are {n_clusters} to cluster")
+            else:
+                print(f"Topic '{topic}': {len(clusterer.assignments) - seen} new articles folded into "
+                      f"{n_clusters} clusters, label mapping: {clusterer.label_map}")
+            for i, c_id, label in zip(valid_indices, ids, labels):
+                cluster_ids[subset_idx[i]] = c_id
+                cluster_labels[subset_idx[i]] = label
+            continue
 
         # Adjust number of clusters if fewer texts than clusters
         n_clust = min(n_clusters, len(texts_nonempty))
@@ -75,6 +177,8 @@ def narrative_clustering_and_labeling(
         sub_df['cluster_id'] = -1
         for i, label in zip(valid_indices, labels):
             sub_df.at[subset_idx[i], 'cluster_id'] = label
+        if dedupe:
+            sub_df = sub_df[~sub_df['is_duplicate']]
 
         # Calculate mean ideological_stance per cluster to map cluster IDs to labels
         cluster_means = sub_df.groupby('cluster_id')['ideological_stance'].mean().dropna()
@@ -98,13 +202,29 @@ def narrative_clustering_and_labeling(
             else:
                 cluster_labels[idx] = None
 
+    if dedupe:
+        for idx in df.index[df['is_duplicate']]:
+            canonical = df.at[idx, 'story_id']
+            cluster_ids[idx] = cluster_ids[canonical]
+            cluster_labels[idx] = cluster_labels[canonical]
+
     # Add cluster ID and cluster label columns to the DataFrame
     df['cluster_id'] = cluster_ids
     df['cluster_label'] = cluster_labels
 
-    # Save to output CSV
-    df.to_csv(output_csv, index=False)
+    # Save to output CSV (or dataset)
+    save_table(df, output_csv)
     print(f"Saved clustered and labeled articles to {output_csv}")
 
 if __name__ == "__main__":
-    narrative_clustering_and_labeling()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Cluster scored articles into narratives within each topic")
+    parser.add_argument("--input", default="news_bias_articles_scored.csv", help="CSV file or Parquet dataset directory")
+    parser.add_argument("--output", default="news_bias_articles_clustered_labeled.csv",
+                        help="CSV file or Parquet dataset directory")
+    parser.add_argument("--clusters", type=int, default=3)
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"update persisted per-topic clusters in {CLUSTER_STATE_DIR}/ instead of refitting")
+    parser.add_argument("--dedupe", action="store_true", help="group syndicated copies into stories before clustering")
+    args = parser.parse_args()
+    narrative_clustering_and_labeling(args.input, args.output, args.clusters, incremental=args.incremental,
+                                      dedupe=args.dedupe)
\ No newline at end of file
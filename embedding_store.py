@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+class EmbeddingStore:
+    # Persistent sentence embeddings for one model.
+    #
+    # Vectors live in a float32 .npy matrix that is opened as a read-only memory map; rows
+    # beyond `count` are preallocated capacity. An append-only JSONL index maps sha256(text)
+    # to a row, one [key, row] line per vector, so adding a batch costs the batch and not
+    # the size of the store. New vectors are written and flushed before their index lines
+    # are appended, so a crash never leaves the index pointing at rows that were not
+    # written; a last line cut short by a crash is dropped when the store is opened.
+    def __init__(self, directory, model_name):
+        self.directory = directory
+        self.model_name = model_name
+        slug = model_name.replace("/", "__")
+        self.matrix_path = os.path.join(directory, f"{slug}.npy")
+        self.index_path = os.path.join(directory, f"{slug}.index.jsonl")
+        self.rows = {}
+        self.count = 0
+        self.matrix = None
+        self.encoded = 0
+        self.reused = 0
+
+        if os.path.exists(self.index_path):
+            self._load_index()
+
+    def _load_index(self):
+        with open(self.index_path, "rb") as f:
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if complete:
+            self.rows = dict(json.loads(b"[" + data[:complete - 1].replace(b"\n", b",") + b"]"))
+        if complete < len(data):
+            with open(self.index_path, "r+b") as f:
+                f.truncate(complete)
+        self.count = len(self.rows)
+        if self.count:
+            self.matrix = np.load(self.matrix_path, mmap_mode="r")
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def rows_for(self, texts, encode):
+        # Store rows for texts, encoding only the ones not stored yet (each distinct text once).
+        # encode(list_of_texts) must return an (n, dim) array.
+        keys = [self.key(text) for text in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self.rows and key not in missing:
+                missing[key] = text
+        self.reused += len(set(keys)) - len(missing)
+
+        if missing:
+            vectors = np.asarray(encode(list(missing.values())), dtype=np.float32)
+            self._append(list(missing), vectors)
+            self.encoded += len(missing)
+        return np.array([self.rows[key] for key in keys], dtype=np.int64)
+
+    def _append(self, keys, vectors):
+        os.makedirs(self.directory, exist_ok=True)
+        needed = self.count + len(vectors)
+        capacity = 0 if self.matrix is None else self.matrix.shape[0]
+        if needed > capacity:
+            # Grow geometrically into a new file, then swap it in
+            new_capacity = max(needed, 2 * capacity, 1024)
+            tmp_path = self.matrix_path + ".tmp.npy"
+            grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(new_capacity, vectors.shape[1]))
+            if self.count:
+                grown[:self.count] = self.matrix[:self.count]
+            grown.flush()
+            del grown
+            self.matrix = None
+            os.replace(tmp_path, self.matrix_path)
+
+        writable = np.load(self.matrix_path, mmap_mode="r+")
+        writable[self.count:needed] = vectors
+        writable.flush()
+        del writable
+
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps([key, self.count + i]) + "\n" for i, key in enumerate(keys)))
+            f.flush()
+            os.fsync(f.fileno())
+        for i, key in enumerate(keys):
+            self.rows[key] = self.count + i
+        self.count = needed
+        self.matrix = np.load(self.matrix_path, mmap_mode="r")
+
+    def vectors(self, rows):
+        # Vectors for store rows. Consecutive rows come back as a view of the memory map
+        # (no copy); anything else is gathered into a new array.
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) and np.all(np.diff(rows) == 1):
+            return self.matrix[rows[0]:rows[-1] + 1]
+        return self.matrix[rows]
+
+    def summary(self):
+        return (f"embedding store: {self.reused} texts reused, {self.encoded} encoded, "
+                f"{self.count} vectors in {self.matrix_path}")
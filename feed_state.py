@@ -0,0 +1,132 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+import feedparser
+
+def entry_id(entry):
+    return entry.get("id") or entry.get("link") or entry.get("title", "")
+
+class FeedStateStore:
+    # Per-feed polling state in SQLite: ETag, Last-Modified, the last feed body (zlib) and
+    # the IDs of entries the scraper has already handled.
+    #
+    # poll() sends a conditional GET and only returns entries that have not been handled.
+    # A 304 costs no body; when every entry of the stored body has been handled it is not
+    # even parsed. Entries are only marked handled through mark_seen() (i.e. once the
+    # scraper has filtered or downloaded them), so entries left over because a quota filled
+    # are still returned by the next poll, from the stored body if the feed is unchanged.
+    def __init__(self, path, max_seen_ids=2000):
+        self.path = path
+        self.max_seen_ids = max_seen_ids
+        self.states = {}
+        self.dirty = set()
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes = 0
+        self.saved_bytes = 0
+        self.returned_entries = 0
+        self.skipped_entries = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS feeds ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB, "
+            "seen TEXT NOT NULL, pending INTEGER NOT NULL, polled REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def _state(self, feed_url):
+        # Called with the lock held
+        if feed_url not in self.states:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, body, seen, pending FROM feeds WHERE url = ?", (feed_url,)
+            ).fetchone()
+            if row:
+                etag, last_modified, body, seen, pending = row
+                seen = json.loads(seen)
+            else:
+                etag, last_modified, body, seen, pending = None, None, None, [], 0
+            self.states[feed_url] = {
+                "etag": etag, "last_modified": last_modified, "body": body,
+                "seen": dict.fromkeys(seen), "pending": pending,
+            }
+        return self.states[feed_url]
+
+    def poll(self, feed_url, session, timeout):
+        # Entries of the feed not handled yet; raises requests exceptions like session.get
+        with self.lock:
+            state = self._state(feed_url)
+            headers = {}
+            if state["etag"]:
+                headers["If-None-Match"] = state["etag"]
+            if state["last_modified"]:
+                headers["If-Modified-Since"] = state["last_modified"]
+
+        response = session.get(feed_url, headers=headers, timeout=timeout)
+        header_bytes = sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+
+        with self.lock:
+            self.requests += 1
+            self.bytes += header_bytes + len(response.content)
+            if response.status_code == 304:
+                self.not_modified += 1
+                body = zlib.decompress(state["body"]) if state["body"] else b""
+                self.saved_bytes += len(body)
+                if not state["pending"] or not body:
+                    return []
+            else:
+                response.raise_for_status()
+                body = response.content
+                state["etag"] = response.headers.get("ETag")
+                state["last_modified"] = response.headers.get("Last-Modified")
+                state["body"] = zlib.compress(body)
+
+        parsed = feedparser.parse(body)
+        with self.lock:
+            entries = [entry for entry in parsed.entries if entry_id(entry) not in state["seen"]]
+            self.skipped_entries += len(parsed.entries) - len(entries)
+            self.returned_entries += len(entries)
+            state["pending"] = len(entries)
+            self.dirty.add(feed_url)
+        return entries
+
+    def mark_seen(self, feed_url, entry):
+        with self.lock:
+            state = self._state(feed_url)
+            key = entry_id(entry)
+            if key not in state["seen"]:
+                state["seen"][key] = None
+                state["pending"] = max(0, state["pending"] - 1)
+                # Oldest IDs go first; they have long dropped out of the feed
+                while len(state["seen"]) > self.max_seen_ids:
+                    del state["seen"][next(iter(state["seen"]))]
+                self.dirty.add(feed_url)
+
+    def save(self):
+        with self.lock:
+            now = time.time()
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO feeds (url, etag, last_modified, body, seen, pending, polled) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (url, state["etag"], state["last_modified"], state["body"], json.dumps(list(state["seen"])),
+                     state["pending"], now)
+                    for url, state in ((url, self.states[url]) for url in self.dirty)
+                ],
+            )
+            self.conn.commit()
+            self.dirty.clear()
+
+    def summary(self):
+        return (
+            f"feed polls: {self.requests} requests, {self.not_modified} not modified (304), "
+            f"{self.bytes / 1024:.1f} KB downloaded, ~{self.saved_bytes / 1024:.1f} KB saved; "
+            f"{self.returned_entries} entries returned, {self.skipped_entries} already-handled entries skipped"
+        )
+
+    def close(self):
+        self.save()
+        self.conn.close()
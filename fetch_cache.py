@@ -0,0 +1,247 @@
+# On-disk cache of the scraper's raw HTTP responses (feed XML and article HTML).
+#
+# FetchCache keeps one row per URL (status, the headers the scraper relies on, fetch and
+# access times) pointing at a body stored once per distinct content: bodies are keyed by
+# their SHA-256 and zlib-compressed, so an unchanged feed polled a hundred times or one
+# article reachable under several URLs costs a single blob. Responses older than
+# max_age_days are evicted when the cache is opened, and the least recently used ones
+# whenever the compressed bodies outgrow max_bytes.
+#
+# CachingAdapter plugs the cache into a requests session (see scrape_outlets.make_session)
+# below redirects and conditional GETs, so feeds, articles and every redirect hop go through
+# it unchanged:
+#   record   fetch from the network and store every response (the default)
+#   prefer   serve what the cache has, fetch and store the rest
+#   replay   serve only from the cache, never touch the network; a miss is a 504
+# A replayed conditional GET whose validator matches the stored response gets a 304, as
+# the outlet would have answered.
+#
+#   python fetch_cache.py --stats
+#   python fetch_cache.py --evict --max-mb 512
+import argparse
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from http import HTTPStatus
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+FETCH_CACHE_PATH = "fetch_cache.sqlite"
+FETCH_CACHE_MAX_AGE_DAYS = 30
+FETCH_CACHE_MAX_MB = 2048
+CACHE_MODES = ("record", "prefer", "replay")
+# Headers kept with a response; the body is stored decoded, so no Content-Encoding/Length
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Location")
+# Statuses worth replaying: pages, redirects and definite misses
+CACHED_STATUSES = {200, 301, 302, 303, 307, 308, 404, 410}
+
+class FetchCache:
+    # Thread-safe like SeenUrlStore: one connection shared under a lock. A read-only cache
+    # (used for replays) never evicts or records access times, so a capture stays intact.
+    def __init__(self, path=FETCH_CACHE_PATH, max_age_days=FETCH_CACHE_MAX_AGE_DAYS, max_bytes=FETCH_CACHE_MAX_MB * 2**20,
+                 read_only=False):
+        self.path = path
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        self.max_bytes = max_bytes
+        self.read_only = read_only
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.deduplicated = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS bodies ("
+            "hash TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL, stored INTEGER NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, status INTEGER NOT NULL, headers TEXT NOT NULL, hash TEXT NOT NULL, "
+            "fetched REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(stored), 0) FROM bodies").fetchone()[0]
+        self.evicted = 0 if read_only else self.evict()
+
+    def get(self, url):
+        # (status, headers, body, fetched) or None
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT r.status, r.headers, b.data, r.fetched FROM responses r JOIN bodies b ON b.hash = r.hash "
+                "WHERE r.url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if not self.read_only:
+                self.conn.execute("UPDATE responses SET accessed = ? WHERE url = ?", (time.time(), url))
+                self.conn.commit()
+        status, headers, data, fetched = row
+        return status, json.loads(headers), zlib.decompress(data), fetched
+
+    def put(self, url, status, headers, body):
+        if self.read_only:
+            return
+        digest = hashlib.sha256(body).hexdigest()
+        kept = {name: headers[name] for name in KEPT_HEADERS if name in headers}
+        now = time.time()
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM bodies WHERE hash = ?", (digest,)).fetchone() is None:
+                data = zlib.compress(body, 6)
+                self.conn.execute("INSERT INTO bodies (hash, data, size, stored) VALUES (?, ?, ?, ?)",
+                                  (digest, data, len(body), len(data)))
+                self.total_bytes += len(data)
+            else:
+                self.deduplicated += 1
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (url, status, headers, hash, fetched, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, status, json.dumps(kept), digest, now, now),
+            )
+            self.conn.commit()
+            self.stored += 1
+            over = self.max_bytes and self.total_bytes > self.max_bytes
+        if over:
+            self.evict()
+
+    def touch(self, url):
+        # The stored response was confirmed current (a live 304)
+        if self.read_only:
+            return
+        now = time.time()
+        with self.lock:
+            self.conn.execute("UPDATE responses SET fetched = ?, accessed = ? WHERE url = ?", (now, now, url))
+            self.conn.commit()
+
+    def evict(self):
+        # Drop responses past max_age, then the least recently used ones until the bodies fit
+        # in 90% of max_bytes, then bodies no response points to; returns responses dropped
+        with self.lock:
+            removed = 0
+            if self.max_age:
+                removed += self.conn.execute("DELETE FROM responses WHERE fetched < ?",
+                                             (time.time() - self.max_age,)).rowcount
+            self._drop_orphans()
+            while self.max_bytes and self.total_bytes > self.max_bytes * 0.9:
+                batch = self.conn.execute(
+                    "DELETE FROM responses WHERE url IN (SELECT url FROM responses ORDER BY accessed LIMIT 100)"
+                ).rowcount
+                if not batch:
+                    break
+                removed += batch
+                self._drop_orphans()
+            self.conn.commit()
+        return removed
+
+    def _drop_orphans(self):
+        # Called with the lock held
+        self.conn.execute("DELETE FROM bodies WHERE hash NOT IN (SELECT hash FROM responses)")
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(stored), 0) FROM bodies").fetchone()[0]
+
+    def responses(self, status=200, content_type=None):
+        # (url, body) of every cached response with this status (and Content-Type prefix)
+        with self.lock:
+            rows = self.conn.execute("SELECT url, headers, hash FROM responses WHERE status = ? ORDER BY url",
+                                     (status,)).fetchall()
+        for url, headers, digest in rows:
+            if content_type and not json.loads(headers).get("Content-Type", "").startswith(content_type):
+                continue
+            with self.lock:
+                data = self.conn.execute("SELECT data FROM bodies WHERE hash = ?", (digest,)).fetchone()
+            if data is not None:
+                yield url, zlib.decompress(data[0])
+
+    def newest_fetch(self):
+        with self.lock:
+            return self.conn.execute("SELECT MAX(fetched) FROM responses").fetchone()[0]
+
+    def stats(self):
+        with self.lock:
+            responses = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            bodies, raw, stored = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored), 0) FROM bodies").fetchone()
+        return {"responses": responses, "bodies": bodies, "raw_bytes": raw, "stored_bytes": stored}
+
+    def summary(self):
+        s = self.stats()
+        return (f"fetch cache: {self.hits} hits, {self.misses} misses, {self.stored} responses stored "
+                f"({self.deduplicated} with a body already cached), {self.evicted} evicted on open; "
+                f"{s['responses']} responses over {s['bodies']} bodies, {s['raw_bytes'] / 2**20:.1f} MB "
+                f"stored as {s['stored_bytes'] / 2**20:.1f} MB in {self.path}")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class CachingAdapter(HTTPAdapter):
+    def __init__(self, cache, mode="record", **kwargs):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"cache mode must be one of {CACHE_MODES}, not {mode!r}")
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.mode = mode
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if request.method not in ("GET", "HEAD"):
+            return super().send(request, stream, timeout, verify, cert, proxies)
+
+        if self.mode != "record":
+            hit = self.cache.get(request.url)
+            if hit is not None:
+                return self.cached_response(request, *hit[:3])
+            if self.mode == "replay":
+                return self.build(request, 504, {}, b"", reason="Not in fetch cache")
+
+        response = super().send(request, stream, timeout, verify, cert, proxies)
+        if request.method == "GET":
+            if response.status_code in CACHED_STATUSES:
+                self.cache.put(request.url, response.status_code, response.headers, response.content)
+            elif response.status_code == 304:
+                self.cache.touch(request.url)
+        return response
+
+    def cached_response(self, request, status, headers, body):
+        headers = CaseInsensitiveDict(headers)
+        etag = request.headers.get("If-None-Match")
+        modified = request.headers.get("If-Modified-Since")
+        if status == 200 and ((etag and etag == headers.get("ETag"))
+                              or (modified and not etag and modified == headers.get("Last-Modified"))):
+            return self.build(request, 304, headers, b"")
+        return self.build(request, status, headers, b"" if request.method == "HEAD" else body)
+
+    def build(self, request, status, headers, body, reason=None):
+        response = requests.Response()
+        response.status_code = status
+        response.reason = reason or HTTPStatus(status).phrase
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or trim the scraper's fetch cache")
+    parser.add_argument("--path", default=FETCH_CACHE_PATH)
+    parser.add_argument("--max-age-days", type=float, default=FETCH_CACHE_MAX_AGE_DAYS)
+    parser.add_argument("--max-mb", type=float, default=FETCH_CACHE_MAX_MB)
+    parser.add_argument("--evict", action="store_true", help="apply the age and size limits now")
+    parser.add_argument("--stats", action="store_true")
+    args = parser.parse_args()
+
+    cache = FetchCache(args.path, args.max_age_days, int(args.max_mb * 2**20), read_only=not args.evict)
+    if args.evict:
+        print(f"{cache.evicted} responses evicted")
+    print(json.dumps(cache.stats(), indent=2) if args.stats else cache.summary())
+    cache.close()
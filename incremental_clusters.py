@@ -0,0 +1,113 @@
+import os
+import pickle
+
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+
+BIAS_LABELS = ["Liberal", "Unbiased", "Conservative"]
+
+class TopicClusterer:
+    # Incremental narrative clustering for one topic.
+    #
+    # Until the topic has n_clusters distinct articles they are held back, unassigned
+    # (cluster -1, no label). The first fit is a MiniBatchKMeans on every article held so
+    # far; later updates fold only unseen articles into the existing centroids with
+    # partial_fit. Centroid indices never move, every article keeps the cluster it was
+    # first assigned, and the Liberal/Unbiased/Conservative label of a cluster is fixed when
+    # the cluster is created, so cluster IDs and labels can be followed across days.
+    # Running ideological_stance means per cluster are kept for reference.
+    def __init__(self, topic, n_clusters=3, random_state=42, batch_size=1024):
+        self.topic = topic
+        self.n_clusters = n_clusters
+        self.random_state = random_state
+        self.batch_size = batch_size
+        self.model = None
+        self.held = {}
+        self.assignments = {}
+        self.label_map = {}
+        self.stance_sum = {}
+        self.stance_count = {}
+
+    def update(self, keys, embeddings, stances):
+        # keys identify articles (e.g. text hashes); already-seen keys keep their assignment.
+        # Returns (cluster_ids, cluster_labels) for every key passed in.
+        new_idx = []
+        pending = set()
+        for i, key in enumerate(keys):
+            if key not in self.assignments and key not in self.held and key not in pending:
+                pending.add(key)
+                new_idx.append(i)
+
+        if new_idx:
+            new_embeddings = np.asarray(embeddings[new_idx], dtype=np.float32)
+            new_stances = np.asarray([stances[i] for i in new_idx], dtype=float)
+
+            if self.model is None:
+                for i, vector, stance in zip(new_idx, new_embeddings, new_stances):
+                    self.held[keys[i]] = (vector, stance)
+                if len(self.held) >= self.n_clusters:
+                    self._fit()
+            else:
+                self.model.partial_fit(new_embeddings)
+                labels = self.model.predict(new_embeddings)
+                for i, label in zip(new_idx, labels):
+                    self.assignments[keys[i]] = int(label)
+                self._add_stances(labels, new_stances)
+                self._label_new_clusters()
+
+        cluster_ids = [self.assignments.get(key, -1) for key in keys]
+        return cluster_ids, [self.label_map.get(c) for c in cluster_ids]
+
+    def _fit(self):
+        # First fit, on every held article
+        held_keys = list(self.held)
+        X = np.stack([self.held[key][0] for key in held_keys])
+        self.model = MiniBatchKMeans(n_clusters=self.n_clusters, random_state=self.random_state,
+                                     batch_size=self.batch_size, n_init=3)
+        labels = self.model.fit_predict(X)
+        self.assignments = {key: int(label) for key, label in zip(held_keys, labels)}
+        self._add_stances(labels, np.array([self.held[key][1] for key in held_keys], dtype=float))
+        self._label_new_clusters()
+        self.held = {}
+
+    def _add_stances(self, labels, stances):
+        for label, stance in zip(labels, stances):
+            if not np.isnan(stance):
+                self.stance_sum[int(label)] = self.stance_sum.get(int(label), 0.0) + stance
+                self.stance_count[int(label)] = self.stance_count.get(int(label), 0) + 1
+
+    def _label_new_clusters(self):
+        # Clusters are labelled the first time they have a stance mean: the unlabelled ones
+        # are ranked by mean ideological_stance and take the unused labels in order
+        means = {c: self.stance_sum[c] / self.stance_count[c] for c in self.stance_count if c not in self.label_map}
+        free = [label for label in BIAS_LABELS if label not in self.label_map.values()]
+        for c in sorted(means, key=means.get):
+            self.label_map[c] = free.pop(0) if free else f"Cluster_{c}"
+
+    def cluster_means(self):
+        return {c: self.stance_sum[c] / self.stance_count[c] for c in self.stance_count}
+
+def state_path(state_dir, topic):
+    safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in str(topic))
+    return os.path.join(state_dir, f"{safe}.pkl")
+
+def load_clusterer(state_dir, topic, n_clusters=3):
+    path = state_path(state_dir, topic)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            clusterer = pickle.load(f)
+        # States saved before articles were held back may hold a model fit on fewer clusters
+        fitted = clusterer.n_clusters if clusterer.model is None else clusterer.model.n_clusters
+        if clusterer.n_clusters == fitted == n_clusters:
+            clusterer.__dict__.setdefault("held", {})
+            return clusterer
+        print(f"Cluster state for '{topic}' was built with {fitted} clusters, starting over")
+    return TopicClusterer(topic, n_clusters)
+
+def save_clusterer(state_dir, clusterer):
+    os.makedirs(state_dir, exist_ok=True)
+    path = state_path(state_dir, clusterer.topic)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(clusterer, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,39 @@
+import re
+
+class KeywordMatcher:
+    # Whole-word keyword matching compiled once into a single regex alternation.
+    #
+    # Keywords are lowercased and deduplicated, then sorted longest first so that at any
+    # position the regex reports the longest keyword that matches there. Because the regex
+    # backtracks through the alternatives, matches() is equivalent to running
+    # re.search(r'\b' + re.escape(kw) + r'\b') for every keyword in turn.
+    def __init__(self, keywords):
+        self.keywords = sorted({kw.lower() for kw in keywords if kw.strip()}, key=lambda kw: (-len(kw), kw))
+        # With no keywords, "(?!)" keeps the pattern from matching the empty string everywhere
+        alternation = "|".join(re.escape(kw) for kw in self.keywords) or "(?!)"
+        self.pattern = re.compile(r"\b(?:" + alternation + r")\b")
+        # Lookahead version to find matches at every position, including overlapping ones
+        self.scan_pattern = re.compile(r"(?=\b(" + alternation + r")\b)")
+
+        # Shorter keywords that also match wherever a longer keyword matches, e.g. "border"
+        # inside "border patrol". The trailing word boundary of the shorter keyword falls
+        # inside the longer one, so whether it holds depends only on the keyword itself.
+        self.prefixes = {}
+        for kw in self.keywords:
+            self.prefixes[kw] = [
+                other for other in self.keywords
+                if len(other) < len(kw) and kw.startswith(other) and re.match(re.escape(other) + r"\b", kw)
+            ]
+
+    def matches(self, title):
+        return self.pattern.search(title.lower()) is not None
+
+    def find(self, title):
+        # All keywords that occur as whole words in the title, in order of first appearance
+        found = {}
+        for match in self.scan_pattern.finditer(title.lower()):
+            kw = match.group(1)
+            found.setdefault(kw, None)
+            for prefix in self.prefixes[kw]:
+                found.setdefault(prefix, None)
+        return list(found)
@@ -0,0 +1,237 @@
+# Narrative velocity per cluster: who initiates, amplifies and responds to each narrative.
+#
+# NarrativeVelocity keeps hourly publication counts for every (topic, cluster) narrative,
+# broken down by ideology and outlet, plus the first publication time of each. Articles are
+# folded in as they arrive (update() touches only the new rows; already-counted URLs are
+# skipped), so the state never has to be rebuilt from the full history. Counted URLs are
+# kept for SEEN_URL_HORIZON behind the newest article; articles older than that are
+# skipped, so re-reading a whole CSV counts nothing twice while the URL set stays bounded.
+# Everything else is derived from the hourly counts on demand:
+#   series()        hourly or daily counts per ideology / outlet for one narrative
+#   rates()         rolling publication rate (articles per hour over a trailing window)
+#   lead_lag()      lag of maximum cross-correlation between every pair of series
+#   roles()         initiator / amplifier / responder per ideology or outlet
+#
+#   python narrative_velocity.py --input news_bias_articles_clustered_labeled.csv --by outlet
+import argparse
+import collections
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from cluster_narratives import IDEOLOGIES, ideology_labels
+
+VELOCITY_STATE_PATH = "velocity_state.pkl"
+RATE_WINDOW = "24h"
+MAX_LAG_HOURS = 48
+# How far behind the newest article URLs are remembered; the scraper only keeps articles
+# from the last 30 days, and this must exceed RATE_WINDOW and MAX_LAG_HOURS
+SEEN_URL_HORIZON = "30D"
+# An article dated this far past the clock cannot move the horizon (bad dates would
+# otherwise expire every URL)
+MAX_CLOCK_SKEW = "1D"
+LEVELS = {"ideology": 0, "outlet": 1}
+
+def cross_correlation(x, y, max_lag=MAX_LAG_HOURS):
+    # Normalized cross-correlation of two equally long series for lags -max_lag..max_lag;
+    # the value at lag k pairs x[t] with y[t + k], so a peak at k > 0 means y follows x
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    x = (x - x.mean()) / (x.std() or 1.0)
+    y = (y - y.mean()) / (y.std() or 1.0)
+    n = len(x)
+    lags = np.arange(-min(max_lag, n - 1), min(max_lag, n - 1) + 1)
+    values = [np.dot(x[max(0, -k):n - max(0, k)], y[max(0, k):n - max(0, -k)]) / n for k in lags]
+    return pd.Series(values, index=lags)
+
+class NarrativeVelocity:
+    def __init__(self, horizon=SEEN_URL_HORIZON):
+        self.counts = collections.defaultdict(lambda: collections.defaultdict(collections.Counter))
+        self.first_seen = collections.defaultdict(dict)
+        self.horizon = pd.Timedelta(horizon)
+        self.seen_urls = {}      # url -> publication time (ns), newer than watermark
+        self.watermark = None    # articles before this are skipped
+        self.articles = 0
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["counts"] = {key: {group: dict(c) for group, c in groups.items()} for key, groups in self.counts.items()}
+        state["first_seen"] = dict(self.first_seen)
+        return state
+
+    def __setstate__(self, state):
+        self.__init__()
+        for key, groups in state.pop("counts").items():
+            for group, counter in groups.items():
+                self.counts[key][group].update(counter)
+        self.first_seen.update(state.pop("first_seen"))
+        if isinstance(state.get("seen_urls"), set):
+            # Saved before URLs expired: they are given the newest hour counted
+            hours = [hour for groups in self.counts.values() for c in groups.values() for hour in c]
+            newest = max(hours).value if hours else 0
+            state["seen_urls"] = dict.fromkeys(state["seen_urls"], newest)
+        self.__dict__.update(state)
+
+    @staticmethod
+    def cluster_column(df):
+        for col in ("cluster_label", "cluster_id", "cluster"):
+            if col in df.columns:
+                return col
+        raise KeyError("no cluster column (cluster_label, cluster_id or cluster) in articles")
+
+    def update(self, df):
+        # Fold a batch of clustered articles in; returns how many were new. Articles without
+        # a cluster, a timestamp or a stance are not part of any narrative and are skipped.
+        col = self.cluster_column(df)
+        df = df.assign(datetime=pd.to_datetime(df['datetime'], errors='coerce'),
+                       ideology=ideology_labels(df['ideological_stance']))
+        df = df[df['ideology'] != "Unknown"].dropna(subset=['datetime', 'outlet', col])
+        df = df[df[col].astype(str) != "-1"]
+        if 'url' in df.columns:
+            if self.watermark is not None:
+                df = df[df['datetime'] >= self.watermark]
+            df = df[~df['url'].map(self.seen_urls.__contains__).astype(bool) & ~df['url'].duplicated()]
+            self.seen_urls.update(zip(df['url'], df['datetime'].astype("datetime64[ns]").astype("int64")))
+            if not df.empty:
+                self._expire(df['datetime'].max())
+        if df.empty:
+            return 0
+        df = df.assign(topic=df['topic'] if 'topic' in df.columns else "",
+                       narrative=df[col].astype(str), hour=df['datetime'].dt.floor('h'))
+
+        keys = ['topic', 'narrative', 'ideology', 'outlet']
+        for (topic, narrative, ideology, outlet, hour), n in df.groupby(keys + ['hour'], observed=True).size().items():
+            self.counts[(topic, narrative)][(ideology, outlet)][hour] += n
+        for (topic, narrative, ideology, outlet), when in df.groupby(keys, observed=True)['datetime'].min().items():
+            first = self.first_seen[(topic, narrative)]
+            if (ideology, outlet) not in first or when < first[(ideology, outlet)]:
+                first[(ideology, outlet)] = when
+        self.articles += len(df)
+        return len(df)
+
+    def _expire(self, newest):
+        # Move the watermark to the newest article minus the horizon and forget older URLs
+        newest = min(newest, pd.Timestamp.now() + pd.Timedelta(MAX_CLOCK_SKEW))
+        watermark = newest.floor("h") - self.horizon
+        if self.watermark is not None and watermark <= self.watermark:
+            return
+        self.watermark = watermark
+        self.seen_urls = {url: when for url, when in self.seen_urls.items() if when >= watermark.value}
+
+    def narratives(self):
+        return sorted(self.counts)
+
+    def series(self, topic, narrative, by="ideology", freq="h"):
+        # Publication counts per ideology or outlet, one row per hour (or per freq bucket)
+        # from the narrative's first to its last article, zeros included
+        level = LEVELS[by]
+        merged = collections.defaultdict(collections.Counter)
+        for group, counter in self.counts.get((topic, narrative), {}).items():
+            merged[group[level]].update(counter)
+        if not merged:
+            return pd.DataFrame()
+        df = pd.DataFrame({group: pd.Series(counter, dtype="int64") for group, counter in merged.items()})
+        order = IDEOLOGIES if by == "ideology" else sorted(df.columns)
+        df = df[[g for g in order if g in df.columns]].sort_index()
+        df = df.reindex(pd.date_range(df.index.min(), df.index.max(), freq="h"), fill_value=0).fillna(0)
+        if freq != "h":
+            df = df.resample(freq).sum()
+        return df.astype("int64")
+
+    def rates(self, topic, narrative, by="ideology", window=RATE_WINDOW):
+        # Trailing-window publication rate in articles per hour
+        series = self.series(topic, narrative, by)
+        return series.rolling(window).sum() / (pd.Timedelta(window) / pd.Timedelta("1h"))
+
+    def onsets(self, topic, narrative, by="ideology"):
+        level = LEVELS[by]
+        first = pd.Series(self.first_seen.get((topic, narrative), {}), dtype="datetime64[ns]")
+        if first.empty:
+            return first
+        return first.groupby(level=level).min()
+
+    def lead_lag(self, topic, narrative, by="ideology", max_lag=MAX_LAG_HOURS):
+        # lags.loc[a, b] = hours by which b trails a at their maximum cross-correlation
+        series = self.series(topic, narrative, by)
+        groups = list(series.columns)
+        lags = pd.DataFrame(0, index=groups, columns=groups, dtype="int64")
+        for i, a in enumerate(groups):
+            for b in groups[i + 1:]:
+                lag = int(cross_correlation(series[a], series[b], max_lag).idxmax())
+                lags.loc[a, b], lags.loc[b, a] = lag, -lag
+        return lags
+
+    def roles(self, topic, narrative, by="ideology", window=RATE_WINDOW, max_lag=MAX_LAG_HOURS):
+        # The group publishing first initiates the narrative (ties: the larger one). Of the
+        # others, those contributing at least an even share of its articles amplify it and
+        # the rest respond to it. lag_hours is the cross-correlation lag behind the initiator.
+        series = self.series(topic, narrative, by)
+        if series.empty:
+            return pd.DataFrame()
+        onsets = self.onsets(topic, narrative, by)
+        articles = series.sum()
+        table = pd.DataFrame({
+            "first_seen": onsets,
+            "articles": articles,
+            "share": articles / articles.sum(),
+            "peak_rate": self.rates(topic, narrative, by, window).max(),
+        })
+        table = table.sort_values(["first_seen", "articles"], ascending=[True, False], kind="stable")
+        initiator = table.index[0]
+        table["onset_hours"] = (table["first_seen"] - table["first_seen"].iloc[0]) / pd.Timedelta("1h")
+        table["lag_hours"] = [0 if g == initiator else int(cross_correlation(series[initiator], series[g], max_lag).idxmax())
+                              for g in table.index]
+        table["role"] = np.where(table["share"] >= 1 / len(table), "amplifier", "responder")
+        table.loc[initiator, "role"] = "initiator"
+        table.index.name = by
+        return table
+
+    def roles_table(self, by="ideology", window=RATE_WINDOW, max_lag=MAX_LAG_HOURS):
+        frames = []
+        for topic, narrative in self.narratives():
+            roles = self.roles(topic, narrative, by, window, max_lag)
+            frames.append(roles.reset_index().assign(topic=topic, narrative=narrative))
+        if not frames:
+            return pd.DataFrame()
+        table = pd.concat(frames, ignore_index=True)
+        return table[["topic", "narrative", by] + [c for c in table.columns if c not in ("topic", "narrative", by)]]
+
+    def summary(self):
+        return f"narrative velocity: {self.articles} articles in {len(self.counts)} narratives"
+
+def load_velocity_state(path=VELOCITY_STATE_PATH):
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    return NarrativeVelocity()
+
+def save_velocity_state(velocity, path=VELOCITY_STATE_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(velocity, f)
+    os.replace(tmp_path, path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-narrative velocity and initiator/amplifier/responder roles")
+    parser.add_argument("--input", default="news_bias_articles_clustered_labeled.csv")
+    parser.add_argument("--state", default=VELOCITY_STATE_PATH, help="incremental state; '' to start fresh and not save")
+    parser.add_argument("--by", choices=sorted(LEVELS), default="ideology")
+    parser.add_argument("--window", default=RATE_WINDOW, help="rolling rate window, e.g. 6h or 24h")
+    parser.add_argument("--max-lag", type=int, default=MAX_LAG_HOURS, help="cross-correlation lags to search (hours)")
+    args = parser.parse_args()
+
+    velocity = load_velocity_state(args.state) if args.state else NarrativeVelocity()
+    added = velocity.update(pd.read_csv(args.input))
+    print(f"{added} new articles folded in; {velocity.summary()}")
+    if args.state:
+        save_velocity_state(velocity, args.state)
+
+    pd.set_option("display.width", 200)
+    for topic, narrative in velocity.narratives():
+        print(f"\nTopic '{topic}', narrative '{narrative}':")
+        print(velocity.roles(topic, narrative, args.by, args.window, args.max_lag).to_string(float_format="%.2f"))
+        if args.by == "ideology":
+            print("Lead/lag (hours b trails a, rows a, columns b):")
+            print(velocity.lead_lag(topic, narrative, "ideology", args.max_lag).to_string())
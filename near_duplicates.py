@@ -0,0 +1,192 @@
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+WORD_RE = re.compile(r"\w+")
+
+class NearDuplicateIndex:
+    # MinHash/LSH index for near-duplicate (syndicated / wire copy) article detection.
+    #
+    # Each text becomes a set of word 3-gram shingles, summarised by num_perm MinHash values
+    # (multiply-shift hashes of the CRC32 of each shingle). The signature is cut into `bands`
+    # bands; texts that agree on every value of at least one band become candidates, and
+    # candidates are kept if their estimated Jaccard similarity reaches `threshold`. With
+    # 64 values in 16 bands, pairs above ~0.5 similarity are very likely to collide.
+    #
+    # Each band keeps a sorted array of band hashes (binary-searched) plus a small dict of
+    # recent inserts; the dict is merged into the arrays once it grows past a fraction of
+    # them, so queries cost O(bands * log n) and inserts stay amortised cheap.
+    def __init__(self, num_perm=64, bands=16, threshold=0.7, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.threshold = threshold
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        # Odd 64-bit multipliers for the MinHash permutations and for hashing a band
+        self.mult = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.offsets = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+        self.band_mult = rng.integers(1, 2**63, size=self.rows_per_band, dtype=np.uint64) | np.uint64(1)
+
+        self.count = 0
+        self.sig_matrix = np.empty((0, num_perm), dtype=np.uint32)
+        self.sorted_keys = [np.empty(0, dtype=np.uint64) for _ in range(bands)]
+        self.sorted_ids = [np.empty(0, dtype=np.int64) for _ in range(bands)]
+        self.buffer = [{} for _ in range(bands)]
+        self.buffered = 0
+
+    @staticmethod
+    def shingles(text, k=3):
+        words = WORD_RE.findall(str(text).lower())
+        if len(words) < k:
+            grams = words
+        else:
+            grams = [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+        return np.array(sorted({zlib.crc32(g.encode("utf-8")) for g in grams}), dtype=np.uint64)
+
+    def signature(self, text):
+        # MinHash signature (uint32[num_perm]), or None for a text without any words
+        hashes = self.shingles(text)
+        if len(hashes) == 0:
+            return None
+        permuted = (hashes[:, None] * self.mult + self.offsets) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def band_keys(self, signatures):
+        # (n, bands) uint64 hash of each band of each signature
+        sig = np.asarray(signatures, dtype=np.uint64).reshape(-1, self.bands, self.rows_per_band)
+        return (sig * self.band_mult).sum(axis=2, dtype=np.uint64)
+
+    def query(self, signature):
+        # (doc_id, estimated similarity) of the most similar indexed text at or above the
+        # threshold, or None
+        keys = self.band_keys(signature)[0]
+        candidates = set()
+        for band, key in enumerate(keys):
+            # key stays a np.uint64: a Python int above 2**63 would make searchsorted
+            # convert the whole band array on every call
+            sorted_keys = self.sorted_keys[band]
+            lo = sorted_keys.searchsorted(key, side="left")
+            hi = sorted_keys.searchsorted(key, side="right")
+            if hi > lo:
+                candidates.update(self.sorted_ids[band][lo:hi].tolist())
+            candidates.update(self.buffer[band].get(int(key), ()))
+        if not candidates:
+            return None
+        ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarity = (self.sig_matrix[ids] == signature).mean(axis=1)
+        best = int(np.argmax(similarity))
+        if similarity[best] < self.threshold:
+            return None
+        return int(ids[best]), float(similarity[best])
+
+    def add(self, signature):
+        doc_id = self.count
+        if doc_id == len(self.sig_matrix):
+            grown = np.empty((max(1024, 2 * len(self.sig_matrix)), self.num_perm), dtype=np.uint32)
+            grown[:doc_id] = self.sig_matrix[:doc_id]
+            self.sig_matrix = grown
+        self.sig_matrix[doc_id] = signature
+        self.count += 1
+
+        for band, key in enumerate(self.band_keys(signature)[0].tolist()):
+            self.buffer[band].setdefault(key, []).append(doc_id)
+        self.buffered += 1
+        if self.buffered > max(4096, len(self.sorted_keys[0]) // 8):
+            self._merge_buffer()
+        return doc_id
+
+    def add_many(self, signatures):
+        # Bulk insert of an (n, num_perm) signature array, bypassing the buffer
+        signatures = np.asarray(signatures, dtype=np.uint32)
+        self._merge_buffer()
+        start = self.count
+        self.sig_matrix = np.concatenate([self.sig_matrix[:start], signatures])
+        self.count += len(signatures)
+        ids = np.arange(start, self.count, dtype=np.int64)
+        keys = self.band_keys(signatures)
+        for band in range(self.bands):
+            self._merge_band(band, keys[:, band], ids)
+
+    def _merge_buffer(self):
+        if not self.buffered:
+            return
+        for band in range(self.bands):
+            items = [(key, doc_id) for key, doc_ids in self.buffer[band].items() for doc_id in doc_ids]
+            keys = np.array([key for key, _ in items], dtype=np.uint64)
+            ids = np.array([doc_id for _, doc_id in items], dtype=np.int64)
+            self._merge_band(band, keys, ids)
+            self.buffer[band] = {}
+        self.buffered = 0
+
+    def _merge_band(self, band, keys, ids):
+        order = np.argsort(keys, kind="stable")
+        keys, ids = keys[order], ids[order]
+        positions = np.searchsorted(self.sorted_keys[band], keys, side="right")
+        self.sorted_keys[band] = np.insert(self.sorted_keys[band], positions, keys)
+        self.sorted_ids[band] = np.insert(self.sorted_ids[band], positions, ids)
+
+    def __len__(self):
+        return self.count
+
+class StoryTracker:
+    # Groups near-duplicate articles into stories. Articles are numbered in the order they
+    # are assigned; the first article of a story is its canonical article and the story ID
+    # is that article's number. first_seen is the earliest publication time in the story.
+    def __init__(self, index=None):
+        self.index = index or NearDuplicateIndex()
+        self.story_of = []
+        self.doc_story = []
+        self.first_seen = {}
+
+    def assign(self, text, published=None):
+        # (story_id, is_duplicate) for a new article; articles without text are never
+        # indexed and always start their own story
+        number = len(self.story_of)
+        signature = self.index.signature(text)
+        match = None
+        if signature is not None:
+            match = self.index.query(signature)
+            self.index.add(signature)
+        story_id = self.doc_story[match[0]] if match else number
+        if signature is not None:
+            self.doc_story.append(story_id)
+        self.story_of.append(story_id)
+
+        if published is not None and not pd.isna(published):
+            seen = self.first_seen.get(story_id)
+            if seen is None or published < seen:
+                self.first_seen[story_id] = published
+        return story_id, match is not None
+
+def mark_stories(df, text_column="sample_text", time_column="datetime", threshold=0.7):
+    # Adds story_id, story_first_seen and is_duplicate columns. Rows are visited in
+    # publication order within each topic, so a story's canonical row is its earliest copy;
+    # story_id is the DataFrame index of that row.
+    published = pd.to_datetime(df[time_column], errors="coerce")
+    story_ids = pd.Series(df.index, index=df.index)
+    duplicate = pd.Series(False, index=df.index)
+    first_seen = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+
+    for _, group in df.groupby("topic", sort=False):
+        tracker = StoryTracker(NearDuplicateIndex(threshold=threshold))
+        order = published[group.index].sort_values(kind="stable", na_position="last").index
+        canonical = []
+        for idx in order:
+            text = df.at[idx, text_column]
+            if pd.isna(text) or not str(text).strip():
+                text = ""
+            story, is_dup = tracker.assign(text, published[idx])
+            canonical.append(order[story])
+            duplicate[idx] = is_dup
+        story_ids[order] = canonical
+        first_seen[order] = [tracker.first_seen.get(tracker.story_of[i], pd.NaT) for i in range(len(order))]
+
+    df["story_id"] = story_ids
+    df["story_first_seen"] = first_seen
+    df["is_duplicate"] = duplicate
+    return df
@@ -1,73 +1,18 @@
 # Step 2: Bias Scoring
+import argparse
+import os
 import pandas as pd
 from transformers import pipeline
+from types import SimpleNamespace
 import numpy as np
+import torch
 import time
+import topics_config
+from score_cache import ScoreCache
+from storage import load_table, save_table
 
-OUTLET_TO_IDEOLOGY = {
-    # Conservative outlets (matching your new keys exactly)
-    "Fox News Politics": "conservative",
-    "Fox News US Immigration": "conservative",
-    "The Daily Caller": "conservative",
-    "The Blaze": "conservative",
-    "Breitbart": "conservative",
-    "Breitbart Politics": "conservative",
-    "National Review": "conservative",
-    "The Washington Times": "conservative",
-    "The Epoch Times": "conservative",
-    "Newsmax": "conservative",
-    "Townhall": "conservative",
-    "The Federalist": "conservative",
-    "Daily Wire": "conservative",
-    "One America News": "conservative",
-    "Washington Examiner": "conservative",
-    "American Thinker": "conservative",
-    "The American Conservative": "conservative",
-    "The Daily Signal": "conservative",
-
-    # Moderate outlets
-    "Reuters": "moderate",
-    "Associated Press Top News": "moderate",
-    "Associated Press Politics": "moderate",
-    "NPR General": "moderate",
-    "NPR Politics": "moderate",
-    "USA Today Nation": "moderate",
-    "USA Today Politics": "moderate",
-    "PBS NewsHour": "moderate",
-    "PBS Newshour Politics": "moderate",
-    "Bloomberg Politics": "moderate",
-    "Politico": "moderate",
-    "The Hill": "moderate",
-    "CBS News Politics": "moderate",
-    "ABC News Politics": "moderate",
-    "The Wall Street Journal General": "moderate",
-    "The Wall Street Journal Politics": "moderate",
-    "Financial Times": "moderate",
-    "The Christian Science Monitor": "moderate",
-    "Axios Politics": "moderate",
-    "BBC News US & Canada": "moderate",
-    "Al Jazeera English": "moderate",
-
-    # Liberal outlets
-    "CNN Politics": "liberal",
-    "CNN Immigration": "liberal",
-    "The Guardian Immigration": "liberal",
-    "Mother Jones": "liberal",
-    "MSNBC Latest": "liberal",
-    "HuffPost Politics": "liberal",
-    "Vox": "liberal",
-    "Daily Kos": "liberal",
-    "Salon": "liberal",
-    "The New Republic": "liberal",
-    "The Atlantic": "liberal",
-    "Slate": "liberal",
-    "ThinkProgress (Archive)": "liberal",
-    "The Nation": "liberal",
-    "Common Dreams": "liberal",
-    "Raw Story": "liberal",
-    "Truthout": "liberal",
-    "Democracy Now": "liberal",
-}
+# Outlets of every topic in topics.json
+OUTLET_TO_IDEOLOGY = topics_config.outlet_ideologies(topics_config.load_config())
 
 
 # Bias dimensions, model returns lowercase labels, so lowercase here
@@ -79,40 +24,365 @@ BIAS_DIMENSIONS = {
     "source_transparency": ["opaque", "moderate", "transparent"]
 }
 
-# Load zero-shot classifier pipeline once
-classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+MODEL_NAME = "facebook/bart-large-mnli"
+HYPOTHESIS_TEMPLATE = "This example is {}."  # zero-shot pipeline default
+
+# Articles per forward pass; each article expands to one premise/hypothesis pair per
+# label in BIAS_DIMENSIONS (15 pairs), so keep this small for BART-large on CPU
+SCORING_BATCH_SIZE = 4
+
+# How article text is presented to the model:
+#   "full"    - the whole stored text, truncated by the tokenizer at the model limit
+#               (1024 tokens for BART), so long articles are judged on their opening only
+#   "lead"    - only the first LEAD_TOKENS tokens, cut by tokens rather than characters
+#   "chunked" - the whole text as windows of CHUNK_TOKENS tokens overlapping by CHUNK_STRIDE,
+#               scored in batches and combined per dimension with CHUNK_AGGREGATION:
+#               "mean", "max" or "length-weighted" (mean weighted by window token count)
+SCORING_MODES = ["full", "lead", "chunked"]
+CHUNK_AGGREGATIONS = ["mean", "max", "length-weighted"]
+SCORING_MODE = "full"
+LEAD_TOKENS = 256
+CHUNK_TOKENS = 400
+CHUNK_STRIDE = 50
+CHUNK_AGGREGATION = "mean"
+
+# Persistent score cache; entries are keyed by text, model and BIAS_DIMENSIONS
+SCORE_CACHE_PATH = "score_cache.sqlite"
+SCORE_CACHE_MAX_ENTRIES = 500000
+
+# CPU inference backend:
+#   "pytorch"      - the fp32 pipeline as loaded from the hub
+#   "pytorch-int8" - dynamic int8 quantization of every nn.Linear (weights int8, activations
+#                    quantized on the fly)
+#   "onnx"         - the model exported to an ONNX graph and run with ONNX Runtime
+#                    (needs the onnxruntime, onnx and onnxscript packages)
+INFERENCE_BACKENDS = ["pytorch", "pytorch-int8", "onnx"]
+INFERENCE_BACKEND = "pytorch"
+INFERENCE_THREADS = None  # intra-op threads; None keeps the library default
+ONNX_EXPORT_DIR = "onnx_models"
+
+# Zero-shot classifier pipeline, loaded once on first use
+classifier = None
+
+def get_classifier():
+    global classifier
+    if classifier is None:
+        classifier = load_classifier(INFERENCE_BACKEND, INFERENCE_THREADS)
+    return classifier
+
+class OnnxSequenceClassifier:
+    # Stands in for the PyTorch model inside the pipeline: same config, same call signature,
+    # logits computed by an ONNX Runtime session
+    def __init__(self, session, config):
+        self.session = session
+        self.config = config
+
+    def __call__(self, input_ids, attention_mask, **kwargs):
+        logits = self.session.run(["logits"], {
+            "input_ids": input_ids.cpu().numpy(),
+            "attention_mask": attention_mask.cpu().numpy(),
+        })[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+class _LogitsOnly(torch.nn.Module):
+    # Export wrapper: (input_ids, attention_mask) -> logits
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask, use_cache=False).logits
+
+def export_onnx(clf, path):
+    sample = clf.tokenizer(["A short example."] * 2, ["This example is left."] * 2, return_tensors="pt")
+    batch = torch.export.Dim("batch")
+    sequence = torch.export.Dim("sequence", max=clf.model.config.max_position_embeddings)
+    torch.onnx.export(
+        _LogitsOnly(clf.model).eval(),
+        (sample["input_ids"], sample["attention_mask"]),
+        path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_shapes={"input_ids": {0: batch, 1: sequence}, "attention_mask": {0: batch, 1: sequence}},
+        dynamo=True,
+    )
+
+def apply_backend(clf, backend=INFERENCE_BACKEND, num_threads=INFERENCE_THREADS, onnx_path=None):
+    # Convert an fp32 pipeline to the requested backend in place and return it
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {INFERENCE_BACKENDS}")
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+
+    if backend == "pytorch-int8":
+        clf.model = torch.ao.quantization.quantize_dynamic(clf.model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend == "onnx":
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The 'onnx' backend needs onnxruntime: pip install onnxruntime onnx onnxscript")
+
+        model_name = clf.model.config.name_or_path or MODEL_NAME
+        onnx_path = onnx_path or os.path.join(ONNX_EXPORT_DIR, model_name.replace("/", "__") + ".onnx")
+        if not os.path.exists(onnx_path):
+            print(f"Exporting model to {onnx_path}...")
+            os.makedirs(os.path.dirname(onnx_path) or ".", exist_ok=True)
+            export_onnx(clf, onnx_path)
+
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        session = onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        clf.model = OnnxSequenceClassifier(session, clf.model.config)
+    return clf
+
+def load_classifier(backend=INFERENCE_BACKEND, num_threads=INFERENCE_THREADS):
+    clf = pipeline("zero-shot-classification", model=MODEL_NAME, device="cpu")
+    return apply_backend(clf, backend, num_threads)
 
 # Map model labels to numeric ideology scores
 model_label_to_score = {"left": 0, "center": 50, "right": 100}
 # Map outlet labels (lowercase) to numeric ideology scores to match your ideology labels in data
 outlet_label_to_score = {"liberal": 0, "moderate": 50, "conservative": 100}
 
-def score_text(text, max_retries=3):
-    results = {}
+def _score_batch(texts, clf):
+    # Pair every text with the hypotheses for all dimensions and run them through the model
+    # together. Entailment logits are softmaxed over each dimension's labels, exactly as the
+    # pipeline does for a single call with multi_label=False.
+    hypotheses = [HYPOTHESIS_TEMPLATE.format(label) for labels in BIAS_DIMENSIONS.values() for label in labels]
+    premises = [text for text in texts for _ in hypotheses]
+    inputs = clf.tokenizer(
+        premises,
+        hypotheses * len(texts),
+        padding=True,
+        truncation="only_first",
+        return_tensors="pt",
+    )
+    model_inputs = {k: v.to(clf.device) for k, v in inputs.items() if k in clf.tokenizer.model_input_names}
+    with torch.no_grad():
+        logits = clf.model(**model_inputs).logits
+    entail_logits = logits[:, clf.entailment_id].float().cpu().numpy().reshape(len(texts), len(hypotheses))
+
+    results = [{} for _ in texts]
+    offset = 0
     for dim, labels in BIAS_DIMENSIONS.items():
+        dim_logits = entail_logits[:, offset:offset + len(labels)]
+        offset += len(labels)
+        probs = np.exp(dim_logits - dim_logits.max(axis=1, keepdims=True))
+        probs = probs / probs.sum(axis=1, keepdims=True)  # normalize
+        label_scores = np.arange(len(labels)) * 50
+        weighted_scores = probs @ label_scores
+        for result, weighted_score in zip(results, weighted_scores):
+            result[dim] = float(weighted_score)
+    return results
+
+def _score_in_batches(texts, batch_size, clf, max_retries, log_every, unit="texts"):
+    # Batch texts of similar length together to keep padding down
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    results = [None] * len(texts)
+    done = 0
+    for start in range(0, len(order), batch_size):
+        batch_idx = order[start:start + batch_size]
+        batch = [texts[i] for i in batch_idx]
         for attempt in range(max_retries):
             try:
-                res = classifier(text, labels, multi_label=False)
-                returned_labels = [label.lower() for label in res['labels']]
-                probs = np.array(res['scores'])
-                probs = probs / probs.sum()  # normalize
-                
-                label_to_score = {label: idx * 50 for idx, label in enumerate(labels)}
-                weighted_score = sum(probs[i] * label_to_score[returned_labels[i]] for i in range(len(labels)))
-                
-                results[dim] = round(weighted_score, 2)
+                scores = _score_batch(batch, clf)
                 break
             except Exception as e:
-                print(f"Error scoring '{dim}', attempt {attempt + 1}/{max_retries}: {e}")
+                print(f"Error scoring batch of {len(batch)}, attempt {attempt + 1}/{max_retries}: {e}")
                 time.sleep(1)
                 if attempt == max_retries - 1:
-                    results[dim] = None
+                    scores = [{dim: None for dim in BIAS_DIMENSIONS} for _ in batch]
+        for i, score in zip(batch_idx, scores):
+            results[i] = score
+
+        previous, done = done, done + len(batch)
+        if log_every and (done // log_every > previous // log_every or done == len(texts)):
+            print(f"Scored {done}/{len(texts)} {unit} ({done / len(texts) * 100:.1f}%)")
     return results
 
-def main():
-    df = pd.read_csv("news_bias_articles.csv")
-    total_rows = len(df)
-    print(f"Total articles to process: {total_rows}")
+def split_tokens(text, tokenizer, max_tokens, stride=0, max_windows=None):
+    # Cut text into windows of at most max_tokens tokens (overlapping by stride), slicing the
+    # original string at token offsets. Returns [(window_text, n_tokens), ...].
+    if max_windows == 1:
+        # Only the lead is needed, so avoid tokenizing the rest: try a generous character
+        # prefix first and fall back to the full text if it holds fewer tokens than needed
+        prefix = text[:max_tokens * 10]
+        offsets = tokenizer(prefix, add_special_tokens=False, return_offsets_mapping=True, verbose=False)["offset_mapping"]
+        if len(offsets) < max_tokens and len(prefix) < len(text):
+            offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)["offset_mapping"]
+    else:
+        offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)["offset_mapping"]
+    if not offsets:
+        return [(text, 0)]
+
+    windows = []
+    step = max(1, max_tokens - stride)
+    for start in range(0, len(offsets), step):
+        end = min(start + max_tokens, len(offsets))
+        windows.append((text[offsets[start][0]:offsets[end - 1][1]], end - start))
+        if end == len(offsets) or (max_windows and len(windows) >= max_windows):
+            break
+    return windows
+
+def aggregate_windows(window_scores, weights, aggregation):
+    # Combine per-window scores into one score per dimension, ignoring failed windows
+    result = {}
+    for dim in BIAS_DIMENSIONS:
+        pairs = [(score[dim], weight) for score, weight in zip(window_scores, weights) if score[dim] is not None]
+        if not pairs:
+            result[dim] = None
+            continue
+        values = np.array([value for value, _ in pairs])
+        if aggregation == "max":
+            result[dim] = float(values.max())
+        elif aggregation == "length-weighted":
+            w = np.array([weight for _, weight in pairs], dtype=float)
+            result[dim] = float(values @ w / w.sum()) if w.sum() > 0 else float(values.mean())
+        else:
+            result[dim] = float(values.mean())
+    return result
+
+def score_texts(texts, batch_size=SCORING_BATCH_SIZE, clf=None, max_retries=3, log_every=10, mode=None, aggregation=None):
+    # Batched scoring: returns one {dimension: score} dict per text, in input order.
+    # mode and aggregation default to SCORING_MODE and CHUNK_AGGREGATION.
+    clf = clf or get_classifier()
+    mode = mode or SCORING_MODE
+    aggregation = aggregation or CHUNK_AGGREGATION
+    if mode not in SCORING_MODES:
+        raise ValueError(f"Unknown scoring mode '{mode}', expected one of {SCORING_MODES}")
+    if aggregation not in CHUNK_AGGREGATIONS:
+        raise ValueError(f"Unknown chunk aggregation '{aggregation}', expected one of {CHUNK_AGGREGATIONS}")
+
+    if mode == "full":
+        results = _score_in_batches(texts, batch_size, clf, max_retries, log_every)
+    else:
+        # Every window is scored independently; batch_size counts windows here
+        if mode == "lead":
+            windows = [split_tokens(text, clf.tokenizer, LEAD_TOKENS, max_windows=1) for text in texts]
+        else:
+            windows = [split_tokens(text, clf.tokenizer, CHUNK_TOKENS, CHUNK_STRIDE) for text in texts]
+        flat = [window_text for article in windows for window_text, _ in article]
+        window_scores = _score_in_batches(flat, batch_size, clf, max_retries, log_every, unit="windows")
+
+        results = []
+        offset = 0
+        for article in windows:
+            article_scores = window_scores[offset:offset + len(article)]
+            offset += len(article)
+            results.append(aggregate_windows(article_scores, [n for _, n in article], aggregation))
+
+    return [{dim: None if value is None else round(value, 2) for dim, value in result.items()} for result in results]
+
+def scoring_signature():
+    # Everything besides the text that changes the scores, for the score cache key
+    signature = f"{MODEL_NAME}:{INFERENCE_BACKEND}:{SCORING_MODE}"
+    if SCORING_MODE == "lead":
+        signature += f":{LEAD_TOKENS}"
+    elif SCORING_MODE == "chunked":
+        signature += f":{CHUNK_TOKENS}:{CHUNK_STRIDE}:{CHUNK_AGGREGATION}"
+    return signature
+
+def score_text(text, max_retries=3):
+    return score_texts([text], max_retries=max_retries, log_every=0)[0]
+
+def score_texts_cached(texts, cache, **kwargs):
+    # Only texts without a cache entry go to the model, each distinct text once
+    results = cache.get_many(texts)
+    missing = {}
+    for i, result in enumerate(results):
+        if result is None:
+            missing.setdefault(cache.key(texts[i]), []).append(i)
+
+    if missing:
+        print(f"Scoring {len(missing)} new or changed articles ({len(texts) - sum(map(len, missing.values()))} cached)")
+        first = [indices[0] for indices in missing.values()]
+        new_scores = score_texts([texts[i] for i in first], **kwargs)
+        cache.put_many([texts[i] for i in first], new_scores)
+        for indices, scores in zip(missing.values(), new_scores):
+            for i in indices:
+                results[i] = scores
+    return results
+
+def compare_backends(texts, backends=INFERENCE_BACKENDS, num_threads=INFERENCE_THREADS, make_classifier=None,
+                     batch_size=SCORING_BATCH_SIZE):
+    # Accuracy-vs-speed report: each backend's five-dimension scores against the fp32
+    # PyTorch baseline on the same texts. make_classifier() must return a fresh fp32
+    # pipeline; by default the configured model is loaded from the hub.
+    make_classifier = make_classifier or (lambda: load_classifier("pytorch", num_threads))
+    dims = list(BIAS_DIMENSIONS.keys())
+    rows = []
+    baseline = None
+    for backend in ["pytorch"] + [b for b in backends if b != "pytorch"]:
+        clf = apply_backend(make_classifier(), backend, num_threads)
+        score_texts(texts[:1], clf=clf, log_every=0)  # warm-up
+        start = time.perf_counter()
+        scores = score_texts(texts, batch_size=batch_size, clf=clf, log_every=0)
+        elapsed = time.perf_counter() - start
+        matrix = np.array([[score.get(dim) for dim in dims] for score in scores], dtype=float)
+        if baseline is None:
+            baseline = matrix
+        errors = np.abs(matrix - baseline)
+        row = {"backend": backend, "articles_per_sec": len(texts) / elapsed}
+        row["speedup"] = row["articles_per_sec"] / rows[0]["articles_per_sec"] if rows else 1.0
+        row["mean_abs_diff"] = np.nanmean(errors)
+        row["max_abs_diff"] = np.nanmax(errors)
+        for j, dim in enumerate(dims):
+            row[f"mae_{dim}"] = np.nanmean(errors[:, j])
+        rows.append(row)
+
+    report = pd.DataFrame(rows).set_index("backend")
+    print(f"Backend comparison on {len(texts)} articles ({torch.get_num_threads()} torch threads), "
+          "score differences against fp32 PyTorch on the 0-100 scale:")
+    print(report.round(3).to_string())
+    return report
+
+def compare_scoring_modes(texts, clf=None, batch_size=SCORING_BATCH_SIZE, reference=("chunked", "mean")):
+    # Latency/quality report for each scoring mode. There are no gold labels, so quality is
+    # agreement with a reference that reads the whole article (chunked mean by default) and
+    # with the legacy "full" mode.
+    clf = clf or get_classifier()
+    configs = [("full", None), ("lead", None)] + [("chunked", aggregation) for aggregation in CHUNK_AGGREGATIONS]
+    dims = list(BIAS_DIMENSIONS.keys())
+    model_limit = min(clf.tokenizer.model_max_length, 1024)
+    token_counts = [len(clf.tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"]) for text in texts]
+
+    score_texts(texts[:1], batch_size, clf, log_every=0)  # warm-up
+    runs = {}
+    for mode, aggregation in configs:
+        start = time.perf_counter()
+        scores = score_texts(texts, batch_size, clf, log_every=0, mode=mode, aggregation=aggregation)
+        elapsed = time.perf_counter() - start
+        if mode == "full":
+            tokens = sum(min(n, model_limit) for n in token_counts)
+        elif mode == "lead":
+            tokens = sum(min(n, LEAD_TOKENS) for n in token_counts)
+        else:
+            tokens = sum(n for text in texts for _, n in split_tokens(text, clf.tokenizer, CHUNK_TOKENS, CHUNK_STRIDE))
+        matrix = np.array([[score.get(dim) for dim in dims] for score in scores], dtype=float)
+        runs[(mode, aggregation)] = (matrix, elapsed, tokens)
+
+    rows = []
+    for (mode, aggregation), (matrix, elapsed, tokens) in runs.items():
+        rows.append({
+            "mode": mode if aggregation is None else f"{mode} ({aggregation})",
+            "ms_per_article": elapsed / len(texts) * 1000,
+            "tokens_per_article": tokens / len(texts),
+            "mae_vs_reference": np.nanmean(np.abs(matrix - runs[reference][0])),
+            "max_vs_reference": np.nanmax(np.abs(matrix - runs[reference][0])),
+            "mae_vs_full": np.nanmean(np.abs(matrix - runs[("full", None)][0])),
+        })
+
+    report = pd.DataFrame(rows).set_index("mode")
+    print(f"Scoring mode comparison on {len(texts)} articles "
+          f"(avg {np.mean(token_counts):.0f} tokens, reference: {reference[0]} {reference[1] or ''}):")
+    print(report.round(2).to_string())
+    return report
+
+def prepare_articles(df, verbose=True):
+    # Normalize outlets, add missing score columns and store the outlet ideology label.
+    # Returns the stripped texts, the outlet labels and the mask of rows to score.
 
     # Do NOT lowercase outlet names — keep as is for matching
     df['outlet'] = df['outlet'].str.strip()  # Just strip spaces, no lowercase
@@ -122,46 +392,104 @@ def main():
         if col not in df.columns:
             df[col] = np.nan
 
-    weight_outlet = 0.7  # weight of outlet ideology in final score
-    weight_model = 0.3   # weight of model predicted ideology in final score
+    # The scraper writes the outlet's ideology name into ideological_stance; it is kept as
+    # the ideology_label, so the score columns hold only numbers (NaN until scored)
+    for col in BIAS_DIMENSIONS:
+        numeric = pd.to_numeric(df[col], errors='coerce').astype(float)
+        if col == "ideological_stance":
+            names = df[col].where(numeric.isna() & df[col].notna())
+            df['ideology_label'] = df['ideology_label'].astype(object).where(df['ideology_label'].notna(), names)
+        df[col] = numeric
 
-    for idx, row in df.iterrows():
-        text = row.get('sample_text', "")
-        if pd.isna(text) or not text.strip():
-            print(f"Skipping empty text at index {idx}")
-            continue
+    # Skip empty texts and outlets without a known ideology
+    texts = df.get('sample_text', pd.Series("", index=df.index)).fillna("").astype(str).str.strip()
+    outlet_labels = df['outlet'].map(OUTLET_TO_IDEOLOGY)
+    empty = texts == ""
+    unknown = ~empty & outlet_labels.isna()
+    if verbose and empty.any():
+        print(f"Skipping {empty.sum()} empty texts at indices {df.index[empty].tolist()}")
+    if verbose and unknown.any():
+        print(f"Unknown outlet ideology for {sorted(df.loc[unknown, 'outlet'].astype(str).unique())}, "
+              f"skipping {unknown.sum()} articles...")
+    valid = ~empty & ~unknown
 
-        outlet = row.get('outlet', "")
-        outlet_label = OUTLET_TO_IDEOLOGY.get(outlet)
-        if outlet_label is None:
-            print(f"Unknown outlet ideology for '{outlet}' at index {idx}, skipping...")
-            continue
+    # Store outlet ideology label (lowercase)
+    df['ideology_label'] = df['ideology_label'].where(~valid, outlet_labels)
+    return texts, outlet_labels, valid
 
-        # Store outlet ideology label (lowercase)
-        df.at[idx, "ideology_label"] = outlet_label
+def assign_scores(df, valid, outlet_labels, all_scores):
+    # Write model scores (one dict per valid row, in row order) and the combined stance
+    weight_outlet = 0.7  # weight of outlet ideology in final score
+    weight_model = 0.3   # weight of model predicted ideology in final score
 
-        # Get outlet ideology numeric score
-        outlet_score = outlet_label_to_score[outlet_label]
+    # One (articles x dimensions) array, failed scores as NaN, assigned column by column
+    dims = list(BIAS_DIMENSIONS.keys())
+    score_matrix = np.array([[scores.get(dim) for dim in dims] for scores in all_scores], dtype=float).reshape(-1, len(dims))
+    for j, dim in enumerate(dims):
+        df[dim] = df[dim].where(~valid, pd.Series(score_matrix[:, j], index=df.index[valid]))
 
-        # Get model scores for all dimensions, including ideological_stance
-        scores = score_text(text.strip())
-        for dim in BIAS_DIMENSIONS.keys():
-            df.at[idx, dim] = scores.get(dim)
+    # Combine outlet and model ideological stance scores, falling back to the outlet
+    # score where the model failed. Python's round() per element, not np.round(): they
+    # round halfway values differently and the published scores use round().
+    outlet_scores = outlet_labels[valid].map(outlet_label_to_score).to_numpy(dtype=float)
+    model_scores = score_matrix[:, dims.index("ideological_stance")]
+    weighted = weight_outlet * outlet_scores + weight_model * model_scores
+    combined_scores = np.where(
+        np.isnan(model_scores),
+        outlet_scores,
+        np.array([round(x, 2) for x in weighted.tolist()], dtype=float),
+    )
+    df['combined_ideological_stance'] = df['combined_ideological_stance'].where(
+        ~valid, pd.Series(combined_scores, index=df.index[valid])
+    )
 
-        # Combine outlet and model ideological stance scores
-        model_score = scores.get("ideological_stance")
-        if model_score is None:
-            combined_score = outlet_score  # fallback if model failed
-        else:
-            combined_score = round(weight_outlet * outlet_score + weight_model * model_score, 2)
+def main(cache_path=SCORE_CACHE_PATH, input_path="news_bias_articles.csv", output_path="news_bias_articles_scored.csv"):
+    # input_path and output_path are CSV files or Parquet dataset directories (see storage)
+    df = load_table(input_path)
+    total_rows = len(df)
+    print(f"Total articles to process: {total_rows}")
+
+    texts, outlet_labels, valid = prepare_articles(df)
 
-        df.at[idx, "combined_ideological_stance"] = combined_score
+    # Get model scores for all dimensions, including ideological_stance, in batches,
+    # reusing cached scores for articles seen in earlier runs
+    valid_texts = texts[valid].tolist()
+    if cache_path:
+        cache = ScoreCache(cache_path, scoring_signature(), BIAS_DIMENSIONS, SCORE_CACHE_MAX_ENTRIES)
+        all_scores = score_texts_cached(valid_texts, cache)
+        print(cache.summary())
+        cache.close()
+    else:
+        all_scores = score_texts(valid_texts)
 
-        if (idx + 1) % 10 == 0 or (idx + 1) == total_rows:
-            print(f"Processed {idx + 1}/{total_rows} ({(idx + 1) / total_rows * 100:.1f}%)")
+    assign_scores(df, valid, outlet_labels, all_scores)
+    print(f"Processed {valid.sum()}/{total_rows} articles")
 
-    df.to_csv("news_bias_articles_scored.csv", index=False)
-    print("Saved scored CSV as news_bias_articles_scored.csv")
+    save_table(df, output_path)
+    print(f"Saved scored articles to {output_path}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Score news articles for bias")
+    parser.add_argument("--input", default="news_bias_articles.csv", help="CSV file or Parquet dataset directory")
+    parser.add_argument("--output", default="news_bias_articles_scored.csv", help="CSV file or Parquet dataset directory")
+    parser.add_argument("--backend", choices=INFERENCE_BACKENDS, default=INFERENCE_BACKEND)
+    parser.add_argument("--threads", type=int, default=INFERENCE_THREADS)
+    parser.add_argument("--mode", choices=SCORING_MODES, default=SCORING_MODE)
+    parser.add_argument("--aggregation", choices=CHUNK_AGGREGATIONS, default=CHUNK_AGGREGATION)
+    parser.add_argument("--compare-backends", action="store_true",
+                        help="print the accuracy-vs-speed report on news_bias_articles_scored.csv and exit")
+    parser.add_argument("--compare-modes", action="store_true",
+                        help="print the scoring mode latency/quality report on news_bias_articles_scored.csv and exit")
+    args = parser.parse_args()
+    INFERENCE_BACKEND, INFERENCE_THREADS = args.backend, args.threads
+    SCORING_MODE, CHUNK_AGGREGATION = args.mode, args.aggregation
+
+    if args.compare_backends or args.compare_modes:
+        texts = pd.read_csv("news_bias_articles_scored.csv")['sample_text'].dropna().str.strip().tolist()
+        texts = [t for t in texts if t]
+        if args.compare_backends:
+            compare_backends(texts, num_threads=args.threads)
+        if args.compare_modes:
+            compare_scoring_modes(texts)
+    else:
+        main(input_path=args.input, output_path=args.output)
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+def normalize_text(text):
+    # Whitespace differences should not force a re-score
+    return " ".join(text.split())
+
+class ScoreCache:
+    # Persistent bias score cache in SQLite.
+    #
+    # Keys hash the normalized text together with the model name and the full dimension ->
+    # labels mapping, so changing either one makes every old entry unreachable. Those
+    # entries are never read again and age out through the least-recently-used eviction
+    # that keeps the table under max_entries.
+    def __init__(self, path, model_name, dimensions, max_entries=500000):
+        self.path = path
+        self.max_entries = max_entries
+        self.namespace = hashlib.sha256(json.dumps([model_name, dimensions]).encode("utf-8")).hexdigest()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        # Sharded scoring workers may share one cache file, so wait on locks rather than fail
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "key TEXT PRIMARY KEY, scores TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+        self.conn.commit()
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.namespace}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts):
+        # Cached scores for each text, or None where there is no entry
+        keys = [self.key(text) for text in texts]
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), 500):
+            chunk = unique_keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(f"SELECT key, scores FROM scores WHERE key IN ({placeholders})", chunk)
+            found.update((key, json.loads(scores)) for key, scores in rows)
+
+        now = time.time()
+        self.conn.executemany("UPDATE scores SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+        self.conn.commit()
+
+        results = [found.get(key) for key in keys]
+        hits = sum(result is not None for result in results)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(self, texts, scores):
+        # Failed scores (any dimension None) are not cached so they get retried next run
+        now = time.time()
+        rows = [
+            (self.key(text), json.dumps(score), now)
+            for text, score in zip(texts, scores)
+            if score and all(value is not None for value in score.values())
+        ]
+        self.conn.executemany("INSERT OR REPLACE INTO scores (key, scores, last_used) VALUES (?, ?, ?)", rows)
+        self.conn.commit()
+        self.evict()
+
+    def evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)", (excess,)
+            )
+            self.conn.commit()
+            self.evicted += excess
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups * 100 if lookups else 0.0
+        return (
+            f"score cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hit rate), "
+            f"{self.evicted} evicted, {len(self)} entries in {self.path}"
+        )
+
+    def close(self):
+        self.conn.close()
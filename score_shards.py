@@ -0,0 +1,214 @@
+# Sharded bias scoring with resumable checkpoints.
+#
+# The rows of the input table (a CSV file or Parquet dataset, see storage) that score_bias
+# would score are dealt round-robin to N worker processes. Each worker loads its own model
+# with its own thread limit and appends every scored batch to a JSON-lines checkpoint for
+# its shard, flushed and fsynced as it goes. Rows whose text still failed after
+# score_texts()'s retries are not checkpointed. After a crash, re-running the same command
+# skips rows already in the checkpoints and retries the rest. Once every shard is complete
+# the checkpoints are merged in row order, so the output does not depend on which worker
+# finished first.
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import time
+
+import score_bias
+from storage import load_table, save_table
+
+# score_bias settings that change the scores; workers are started with spawn, so they are
+# passed explicitly instead of relying on module state
+CONFIG_NAMES = [
+    "MODEL_NAME", "INFERENCE_BACKEND", "SCORING_MODE", "SCORING_BATCH_SIZE",
+    "LEAD_TOKENS", "CHUNK_TOKENS", "CHUNK_STRIDE", "CHUNK_AGGREGATION", "ONNX_EXPORT_DIR",
+]
+
+def scoring_config():
+    return {name: getattr(score_bias, name) for name in CONFIG_NAMES}
+
+def file_digest(path):
+    # Of a file, or of every file (and its relative path) in a dataset directory
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        files = sorted(os.path.join(d, name) for d, _, names in os.walk(path) for name in names)
+    else:
+        files = [path]
+    for name in files:
+        if name != path:
+            digest.update(os.path.relpath(name, path).encode("utf-8") + b"\0")
+        with open(name, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+def shard_path(checkpoint_dir, shard, n_shards):
+    return os.path.join(checkpoint_dir, f"shard-{shard:03d}-of-{n_shards:03d}.jsonl")
+
+def check_manifest(checkpoint_dir, input_csv, n_shards, config):
+    # Checkpoints are only valid for the same input file, shard count and scoring settings
+    manifest = {"input_digest": file_digest(input_csv), "n_shards": n_shards, "config": config}
+    path = os.path.join(checkpoint_dir, "manifest.json")
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            existing = json.load(f)
+        if existing != manifest:
+            raise RuntimeError(
+                f"Checkpoints in {checkpoint_dir} were written for a different input or configuration; "
+                "remove the directory to start over"
+            )
+    else:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+def scored(scores):
+    # score_texts() returns None for every dimension of a text that failed after its retries
+    return scores is not None and all(value is not None for value in scores.values())
+
+def load_checkpoint(path):
+    # {row: scores} from a shard checkpoint. A crash can leave a torn last line; the file is
+    # truncated back to the last complete line so new records append cleanly. Failed scores
+    # (written by earlier versions) are left out, so those rows are scored again.
+    done = {}
+    if not os.path.exists(path):
+        return done
+    good_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if scored(record["scores"]):
+                done[record["row"]] = record["scores"]
+            good_bytes += len(line)
+    if good_bytes < os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(good_bytes)
+    return done
+
+def shard_rows(valid, shard, n_shards):
+    # Row positions (0-based, in file order) owned by a shard
+    positions = [i for i, ok in enumerate(valid.tolist()) if ok]
+    return positions[shard::n_shards]
+
+def score_shard(shard, n_shards, input_csv, checkpoint_dir, num_threads, checkpoint_every, config, cache_path,
+                make_classifier=None):
+    for name, value in config.items():
+        setattr(score_bias, name, value)
+
+    df = load_table(input_csv)
+    texts, _, valid = score_bias.prepare_articles(df, verbose=False)
+    path = shard_path(checkpoint_dir, shard, n_shards)
+    done = load_checkpoint(path)
+    todo = [row for row in shard_rows(valid, shard, n_shards) if row not in done]
+    print(f"[shard {shard}] {len(done)} rows already checkpointed, {len(todo)} to score")
+    if not todo:
+        return
+
+    if make_classifier is not None:
+        clf = score_bias.apply_backend(make_classifier(), score_bias.INFERENCE_BACKEND, num_threads)
+    else:
+        clf = score_bias.load_classifier(score_bias.INFERENCE_BACKEND, num_threads)
+    cache = None
+    if cache_path:
+        cache = score_bias.ScoreCache(cache_path, score_bias.scoring_signature(), score_bias.BIAS_DIMENSIONS,
+                                      score_bias.SCORE_CACHE_MAX_ENTRIES)
+
+    start = time.perf_counter()
+    failed = 0
+    with open(path, "a", encoding="utf-8") as f:
+        for offset in range(0, len(todo), checkpoint_every):
+            rows = todo[offset:offset + checkpoint_every]
+            batch_texts = [texts.iloc[row] for row in rows]
+            if cache is not None:
+                scores = score_bias.score_texts_cached(batch_texts, cache, clf=clf, log_every=0)
+            else:
+                scores = score_bias.score_texts(batch_texts, clf=clf, log_every=0)
+            records = [(row, score) for row, score in zip(rows, scores) if scored(score)]
+            failed += len(rows) - len(records)
+            f.write("".join(json.dumps({"row": row, "scores": score}) + "\n" for row, score in records))
+            f.flush()
+            os.fsync(f.fileno())
+
+            done_rows = offset + len(rows)
+            rate = done_rows / (time.perf_counter() - start)
+            print(f"[shard {shard}] {done_rows}/{len(todo)} rows ({rate:.2f} rows/s)")
+
+    if cache is not None:
+        cache.close()
+    if failed:
+        print(f"[shard {shard}] {failed} rows failed to score and are left for the next run")
+
+def merge_shards(input_csv, output_csv, checkpoint_dir, n_shards, allow_missing=False):
+    # Rows without checkpointed scores stop the merge, unless allow_missing: then they get
+    # no model scores and the outlet's stance, as score_bias gives a text that failed
+    df = load_table(input_csv)
+    texts, outlet_labels, valid = score_bias.prepare_articles(df)
+
+    scores_by_row = {}
+    for shard in range(n_shards):
+        scores_by_row.update(load_checkpoint(shard_path(checkpoint_dir, shard, n_shards)))
+
+    rows = [i for i, ok in enumerate(valid.tolist()) if ok]
+    missing = [row for row in rows if row not in scores_by_row]
+    if missing and not allow_missing:
+        raise RuntimeError(f"{len(missing)} rows have no checkpointed scores (first: {missing[:5]}); re-run to resume")
+
+    score_bias.assign_scores(df, valid, outlet_labels, [scores_by_row.get(row, {}) for row in rows])
+    save_table(df, output_csv)
+    print(f"Merged {len(rows) - len(missing)} scored rows from {n_shards} shards into {output_csv}"
+          + (f", {len(missing)} rows without scores" if missing else ""))
+
+def run_sharded(input_csv="news_bias_articles.csv", output_csv="news_bias_articles_scored.csv",
+                n_shards=2, threads_per_worker=1, checkpoint_dir="scoring_checkpoints",
+                checkpoint_every=32, cache_path=None, make_classifier=None, allow_missing=False):
+    # make_classifier, if given, must be a module-level function returning an fp32 zero-shot
+    # pipeline; each worker calls it instead of loading MODEL_NAME from the hub
+    config = scoring_config()
+    check_manifest(checkpoint_dir, input_csv, n_shards, config)
+
+    context = mp.get_context("spawn")
+    workers = []
+    for shard in range(n_shards):
+        worker = context.Process(
+            target=score_shard,
+            args=(shard, n_shards, input_csv, checkpoint_dir, threads_per_worker, checkpoint_every, config, cache_path,
+                  make_classifier),
+        )
+        worker.start()
+        workers.append(worker)
+    for worker in workers:
+        worker.join()
+
+    failed = [shard for shard, worker in enumerate(workers) if worker.exitcode != 0]
+    if failed:
+        raise RuntimeError(f"Shards {failed} failed; re-run the same command to resume from the checkpoints")
+
+    merge_shards(input_csv, output_csv, checkpoint_dir, n_shards, allow_missing)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score news articles for bias across worker processes")
+    parser.add_argument("--input", default="news_bias_articles.csv", help="CSV file or Parquet dataset directory")
+    parser.add_argument("--output", default="news_bias_articles_scored.csv", help="CSV file or Parquet dataset directory")
+    parser.add_argument("--shards", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=1, help="torch/ORT threads per worker")
+    parser.add_argument("--checkpoint-dir", default="scoring_checkpoints")
+    parser.add_argument("--checkpoint-every", type=int, default=32, help="rows per checkpointed batch")
+    parser.add_argument("--cache", default=None, help="optional shared score cache (SQLite path)")
+    parser.add_argument("--backend", choices=score_bias.INFERENCE_BACKENDS, default=score_bias.INFERENCE_BACKEND)
+    parser.add_argument("--mode", choices=score_bias.SCORING_MODES, default=score_bias.SCORING_MODE)
+    parser.add_argument("--allow-missing", action="store_true",
+                        help="merge even if some rows could not be scored (they get no model scores)")
+    args = parser.parse_args()
+    score_bias.INFERENCE_BACKEND = args.backend
+    score_bias.SCORING_MODE = args.mode
+
+    run_sharded(args.input, args.output, args.shards, args.threads, args.checkpoint_dir,
+                args.checkpoint_every, args.cache, allow_missing=args.allow_missing)
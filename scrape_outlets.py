@@ -1,218 +1,56 @@
+import argparse
 import feedparser
-from newspaper import Article
-import csv
 from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from functools import lru_cache
+from urllib.parse import urlparse
+import threading
+import time
 import requests
-import re
+from requests.adapters import HTTPAdapter
+import topics_config
+from keyword_matcher import KeywordMatcher
+from url_store import SeenUrlStore, normalize_url
+from feed_state import FeedStateStore
+from article_writer import ArticleWriter
+from article_parser import MAX_PARSE_IN_FLIGHT, PARSE_WORKERS, ParsePool, parse_article_html
+from fetch_cache import CACHE_MODES, FETCH_CACHE_PATH, CachingAdapter, FetchCache
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (compatible; NewsScraper/1.0; +http://yourdomain.com)'
 }
 
-topics = {
-    "immigration": {
-        "conservative": {
-            "Fox News Politics": "http://feeds.foxnews.com/foxnews/politics",
-            "Fox News US Immigration": "https://www.foxnews.com/category/us/immigration/feed",
-            "The Daily Caller": "https://dailycaller.com/feed/",
-            "The Blaze": "https://www.theblaze.com/rss",
-            "Breitbart": "http://feeds.feedburner.com/breitbart",
-            "Breitbart Politics": "https://www.breitbart.com/politics/feed/",
-            "National Review": "https://www.nationalreview.com/feed/",
-            "The Washington Times": "https://www.washingtontimes.com/rss/feed/",
-            "The Epoch Times": "https://www.theepochtimes.com/feed.xml",
-            "Newsmax": "https://www.newsmax.com/rss/",
-            "Townhall": "https://townhall.com/rss/rss.xml",
-            "The Federalist": "https://thefederalist.com/feed/",
-            "Daily Wire": "https://www.dailywire.com/rss",
-            "One America News": "https://www.oann.com/feed/",
-            "Washington Examiner": "https://www.washingtonexaminer.com/feed/rss",
-            "American Thinker": "https://www.americanthinker.com/rss.xml",
-            "The American Conservative": "https://www.theamericanconservative.com/feed/",
-            "The Daily Signal": "https://www.dailysignal.com/feed/"
-        },
-        "moderate": {
-            "Reuters": "https://www.reutersagency.com/feed/?best-topics=politics",
-            "Associated Press Top News": "https://apnews.com/apf-topnews?format=rss",
-            "Associated Press Politics": "https://apnews.com/apf-topnews?format=rss",
-            "NPR General": "https://www.npr.org/rss/rss.php?id=1001",
-            "NPR Politics": "https://www.npr.org/rss/rss.php?id=1014",
-            "USA Today Nation": "https://rssfeeds.usatoday.com/UsatodaycomNation-TopStories",
-            "USA Today Politics": "https://rssfeeds.usatoday.com/UsatodaycomPolitics-TopStories",
-            "PBS NewsHour": "https://www.pbs.org/newshour/feed/",
-            "PBS Newshour Politics": "https://www.pbs.org/newshour/politics/feed/",
-            "Bloomberg Politics": "https://www.bloomberg.com/feed/podcast/politics.xml",
-            "Politico": "https://www.politico.com/rss/politics08.xml",
-            "The Hill": "https://thehill.com/rss/syndicator/19109",
-            "CBS News Politics": "https://www.cbsnews.com/latest/rss/politics",
-            "ABC News Politics": "https://abcnews.go.com/abcnews/politicsheadlines",
-            "The Wall Street Journal General": "https://www.wsj.com/xml/rss/3_7014.xml",
-            "The Wall Street Journal Politics": "https://www.wsj.com/xml/rss/3_7014.xml",
-            "Financial Times": "https://www.ft.com/?format=rss",
-            "The Christian Science Monitor": "https://www.csmonitor.com/feeds/rss",
-            "Axios Politics": "https://www.axios.com/feed.xml",
-            "BBC News US & Canada": "http://feeds.bbci.co.uk/news/world/us_and_canada/rss.xml",
-            "Al Jazeera English": "https://www.aljazeera.com/xml/rss/all.xml"
-        },
-        "liberal": {
-            "CNN Politics": "http://rss.cnn.com/rss/edition_politics.rss",
-            "CNN Immigration": "http://rss.cnn.com/rss/edition_us_immigration.rss",
-            "The Guardian Immigration": "https://www.theguardian.com/us-news/immigration/rss",
-            "Mother Jones": "https://www.motherjones.com/feed/",
-            "MSNBC Latest": "http://www.msnbc.com/feeds/latest",
-            "HuffPost Politics": "https://www.huffpost.com/section/politics/feed",
-            "Vox": "https://www.vox.com/rss/index.xml",
-            "Daily Kos": "https://www.dailykos.com/rss/main",
-            "Salon": "https://www.salon.com/feed/",
-            "The New Republic": "https://newrepublic.com/rss.xml",
-            "The Atlantic": "https://www.theatlantic.com/feed/all/",
-            "Slate": "https://slate.com/feed",
-            "ThinkProgress (Archive)": "https://archive.thinkprogress.org/feed/",
-            "The Nation": "https://www.thenation.com/feed/",
-            "Common Dreams": "https://www.commondreams.org/feed/rss.xml",
-            "Raw Story": "https://www.rawstory.com/rss/",
-            "Truthout": "https://truthout.org/feed/",
-            "Democracy Now": "https://www.democracynow.org/democracynow.rss"
-        }
-    }
-}
+# Outlets and title keywords per topic, from topics.json (see topics_config)
+TOPICS_CONFIG = topics_config.load_config()
+topics = topics_config.topic_outlets(TOPICS_CONFIG)
+TOPIC_KEYWORDS = topics_config.topic_keywords(TOPICS_CONFIG)
 
 MAX_ARTICLES_PER_IDEOLOGY = 3
 MAX_ARTICLES_PER_OUTLET = 4
 
-KEYWORDS = [
-    "ice",
-    "immigration and customs enforcement",
-    "immigration enforcement",
-    "deportation",
-    "border patrol",
-    "customs and border protection",
-    "cbp",
-    "detention center",
-    "immigrant detention",
-    "immigration raids",
-    "immigration crackdown",
-    "immigration policy",
-    "immigration reform",
-    "immigration laws",
-    "immigration agents",
-    "immigration officials",
-    "border security",
-    "migrant detention",
-    "immigration detention facility",
-    "immigration court",
-    "immigrant rights",
-    "family separation",
-    "sanctuary cities",
-    "deportee",
-    "ice agents",
-    "undocumented immigrants",
-    "migrant caravan",
-    "asylum seekers",
-    "border crossing",
-    "illegal immigration",
-    "immigration ban",
-    "visa policy",
-    "naturalization",
-    "immigration detention center",
-    "immigration raid",
-    "deportee",
-    "migration policy",
-    "refugee status",
-    "immigration",
-    "border",
-    "border security",
-    "asylum",
-    "visa",
-    "green card",
-    "immigration reform",
-    "deportation",
-    "ICE",
-    "CBP",
-    "citizenship",
-    "migrant policy",
-    "migrant caravan",
-    "border wall",
-    "refugee",
-    "work permit",
-    "naturalization",
-    "detention center",
-    "family separation",
-    "Title 42",
-    "parole program",
-    "illegal immigration",
-    "mass migration",
-    "undocumented immigrants",
-    "sanctuary city",
-    "sanctuary cities",
-    "amnesty",
-    "open borders",
-    "migrant surge",
-    "immigration",
-    "border",
-    "border security",
-    "asylum",
-    "visa",
-    "green card",
-    "immigration reform",
-    "deportation",
-    "ICE",
-    "CBP",
-    "citizenship",
-    "migrant policy",
-    "migrant caravan",
-    "border wall",
-    "refugee",
-    "work permit",
-    "naturalization",
-    "detention center",
-    "family separation",
-    "Title 42",
-    "parole program",
-    "illegal immigration",
-    "mass migration",
-    "undocumented immigrants",
-    "sanctuary city",
-    "sanctuary cities",
-    "amnesty",
-    "open borders",
-    "migrant surge",
-    "border patrol",
-    "immigration raid",
-    "ICE raid",
-    "removal proceedings",
-    "immigration detention",
-    "immigration enforcement",
-    "immigration crackdown",
-    "expedited removal",
-    "temporary protected status",
-    "TPS",
-    "DACA",
-    "Dreamers",
-    "E-Verify",
-    "immigration court",
-    "customs enforcement",
-    "ICE facility",
-    "immigration prison",
-    "deferred action",
-    "catch and release",
-    "migrant processing",
-    "detention facility",
-    "ICE detention",
-
+# Fetch engine limits
+MAX_WORKERS = 16                # threads shared by feed fetches and article downloads
+MAX_CONNECTIONS_PER_HOST = 2    # simultaneous requests to any one host
+MAX_REQUESTS_PER_SECOND = 10.0  # global rate limit across all hosts
+MAX_PENDING_PER_OUTLET = 4      # article downloads in flight per outlet
+REQUEST_TIMEOUT = 7             # seconds, same as newspaper3k's default
+
+# URLs scraped in earlier runs are skipped before download; None disables the store
+SEEN_URL_STORE_PATH = "seen_urls.sqlite"
+SEEN_URL_MAX_AGE_DAYS = 30
+# Feeds are polled with conditional GETs and only unhandled entries are returned; None
+# disables the state and every poll downloads and returns the whole feed
+FEED_STATE_PATH = "feed_state.sqlite"
+
+CSV_COLUMNS = [
+    "topic", "outlet", "datetime", "title", "url", "sample_text",
+    "ideological_stance", "factual_grounding", "framing_choices", "emotional_tone", "source_transparency"
 ]
 
-KEYWORDS = [k.lower() for k in KEYWORDS]
-
-def url_exists(url):
-    try:
-        response = requests.head(url, allow_redirects=True, timeout=5, headers=HEADERS)
-        if response.status_code == 200:
-            return True
-        response = requests.get(url, stream=True, timeout=5, headers=HEADERS)
-        return response.status_code == 200
-    except requests.RequestException:
-        return False
+# Default topic's keywords, for callers that do not pick a topic
+KEYWORDS = TOPIC_KEYWORDS["immigration"]
+KEYWORD_MATCHER = KeywordMatcher(KEYWORDS)
 
 def to_naive(dt):
     if dt is None:
@@ -221,116 +59,507 @@ def to_naive(dt):
         return dt.astimezone(timezone.utc).replace(tzinfo=None)
     return dt
 
+# Naive UTC time is_recent() measures from; None means now. Replays set it to when the
+# cached pages were fetched, so they keep the articles the recorded run kept.
+recency_reference = None
+
 def is_recent(publish_date, days=30):
     publish_date_naive = to_naive(publish_date)
-    now_naive = datetime.utcnow()
+    now_naive = recency_reference or datetime.utcnow()
     if not publish_date_naive:
         return False
     return publish_date_naive >= now_naive - timedelta(days=days)
 
+@lru_cache(maxsize=None)
+def get_keyword_matcher(keywords):
+    return KeywordMatcher(keywords)
+
 def contains_keyword_in_title(title, keywords):
-    title = title.lower()
-    for kw in keywords:
-        pattern = r'\b' + re.escape(kw) + r'\b'
-        if re.search(pattern, title):
-            return True
-    return False
+    return get_keyword_matcher(tuple(keywords)).matches(title)
+
+def topic_matcher(topic):
+    # Matcher over the topic's keywords, KEYWORDS for a topic topics.json does not define
+    return get_keyword_matcher(tuple(TOPIC_KEYWORDS.get(topic, KEYWORDS)))
+
+class RateLimiter:
+    # Token bucket shared by all worker threads
+    def __init__(self, rate):
+        self.rate = rate
+        self.capacity = max(1.0, rate or 0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+class HostLimiter:
+    # Caps in-flight requests per host and paces every request through the global rate limit
+    def __init__(self, per_host=MAX_CONNECTIONS_PER_HOST, rate=MAX_REQUESTS_PER_SECOND):
+        self.per_host = per_host
+        self.rate_limiter = RateLimiter(rate)
+        self.semaphores = {}
+        self.lock = threading.Lock()
+
+    def _semaphore(self, url):
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            if host not in self.semaphores:
+                self.semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self.semaphores[host]
+
+    @contextmanager
+    def slot(self, url):
+        with self._semaphore(url):
+            self.rate_limiter.acquire()
+            yield
+
+class FetchStats:
+    # Request and byte counters for a run, compared with the old url_exists() probe followed
+    # by Article.download(), which cost a HEAD (plus a GET when the HEAD was not a 200)
+    # before the page itself was fetched again
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.failures = 0
+        self.saved_requests = 0
+        self.saved_bytes = 0
+        self.lock = threading.Lock()
+
+    def record(self, response):
+        header_bytes = sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+        hops = len(response.history) + 1
+        with self.lock:
+            self.requests += hops
+            self.bytes += header_bytes + len(response.content)
+            # The probe walked the same redirect chain with a HEAD...
+            self.saved_requests += hops
+            self.saved_bytes += hops * header_bytes
+            if response.status_code != 200:
+                # ...and retried missing pages with a streaming GET
+                self.failures += 1
+                self.saved_requests += 1
+                self.saved_bytes += header_bytes
+
+    def record_error(self):
+        # A connection error ends the old probe after one request too, so nothing is saved
+        with self.lock:
+            self.requests += 1
+            self.failures += 1
+
+    def summary(self):
+        return (
+            f"{self.requests} article requests ({self.bytes / 1024:.1f} KB, {self.failures} failed); "
+            f"saved {self.saved_requests} requests (~{self.saved_bytes / 1024:.1f} KB) versus probe + re-download"
+        )
+
+def make_session(pool_size=MAX_WORKERS, cache=None, cache_mode="record"):
+    # Shared keep-alive session; urllib3 keeps a connection pool per host (enough hosts
+    # for every outlet) that all worker threads draw from. With a FetchCache every request
+    # goes through it (see fetch_cache.CachingAdapter for the modes).
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    if cache is not None:
+        adapter = CachingAdapter(cache, cache_mode, pool_connections=128, pool_maxsize=pool_size)
+    else:
+        adapter = HTTPAdapter(pool_connections=128, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_html(url, session, stats):
+    # One GET per article: the response doubles as the existence check
+    try:
+        response = session.get(url, timeout=REQUEST_TIMEOUT, allow_redirects=True)
+    except requests.RequestException:
+        stats.record_error()
+        return None
+    stats.record(response)
+    if response.status_code != 200:
+        return None
+    return response.text
+
+class FilterStats:
+    # Entries dropped by each pre-download stage (i.e. downloads avoided) and entries whose
+    # feed metadata was missing, so the check had to wait for the downloaded page
+    def __init__(self):
+        self.checked = 0
+        self.skipped_stale = 0
+        self.skipped_title = 0
+        self.undated = 0
+        self.untitled = 0
+
+    def summary(self):
+        return (
+            f"{self.checked} feed entries checked; downloads avoided by recency stage: {self.skipped_stale}, "
+            f"by title keyword stage: {self.skipped_title}; "
+            f"fell back to full download: {self.undated} without feed date, {self.untitled} without feed title"
+        )
+
+def prefilter_entry(entry, stats, matcher=KEYWORD_MATCHER):
+    # Recency and title keyword checks on the feed entry itself, before any HTTP fetch.
+    # Entries missing the metadata pass through and are checked again after download.
+    stats.checked += 1
+
+    published = entry.get("published_parsed")
+    if published:
+        if not is_recent(datetime(*published[:6])):
+            stats.skipped_stale += 1
+            return False
+    else:
+        stats.undated += 1
+
+    title = entry.get("title", "")
+    if title:
+        if not matcher.matches(title):
+            stats.skipped_title += 1
+            return False
+    else:
+        stats.untitled += 1
+
+    return True
+
+class QuotaTracker:
+    # Per-ideology and per-outlet article quotas; rows are only accepted under the lock,
+    # so the limits hold exactly no matter how many downloads finish at once. With a
+    # writer (an ArticleWriter) accepted rows are streamed to it instead of kept in rows.
+    def __init__(self, ideologies, max_per_ideology=MAX_ARTICLES_PER_IDEOLOGY, max_per_outlet=MAX_ARTICLES_PER_OUTLET,
+                 writer=None):
+        self.max_per_ideology = max_per_ideology
+        self.max_per_outlet = max_per_outlet
+        self.counts = {ideo: 0 for ideo in ideologies}
+        self.outlet_counts = {ideo: {outlet: 0 for outlet in outlets} for ideo, outlets in ideologies.items()}
+        self.writer = writer
+        self.rows = []
+        self.added = 0
+        self.urls = set()
+        self.duplicates = 0
+        self.lock = threading.Lock()
+
+    def ideology_full(self, ideology):
+        return self.counts[ideology] >= self.max_per_ideology
+
+    def outlet_full(self, ideology, outlet):
+        return self.ideology_full(ideology) or self.outlet_counts[ideology][outlet] >= self.max_per_outlet
+
+    def all_full(self):
+        return all(self.ideology_full(ideo) for ideo in self.counts)
+
+    def remaining(self, ideology, outlet):
+        # Articles the outlet can still add before it or its ideology is full
+        return min(self.max_per_ideology - self.counts[ideology],
+                   self.max_per_outlet - self.outlet_counts[ideology][outlet])
+
+    def has_url(self, url):
+        return normalize_url(url) in self.urls
+
+    def try_add(self, ideology, outlet, row, canonical_url=None):
+        keys = {normalize_url(row["url"])}
+        if canonical_url:
+            keys.add(normalize_url(canonical_url))
+        with self.lock:
+            if self.outlet_full(ideology, outlet):
+                return False
+
+            # Skip duplicates, by feed link or canonical link
+            if not keys.isdisjoint(self.urls):
+                self.duplicates += 1
+                return False
+
+            self.urls |= keys
+            if self.writer is None:
+                self.rows.append(row)
+            self.added += 1
+            self.counts[ideology] += 1
+            self.outlet_counts[ideology][outlet] += 1
+        if self.writer is not None:
+            self.writer.write(row)
+        return True
+
+def fetch_feed(feed_url, limiter, session, feed_state=None):
+    # Feed entries to consider, fetched through the shared session
+    with limiter.slot(feed_url):
+        if feed_state is not None:
+            return feed_state.poll(feed_url, session, REQUEST_TIMEOUT)
+        response = session.get(feed_url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return feedparser.parse(response.content).entries
+
+def download_article(url, limiter, session, stats, parser=None):
+    # Download and parse one page (in the ParsePool if given, else inline); returns a
+    # ParsedArticle, or None if either step fails
+    with limiter.slot(url):
+        html = fetch_html(url, session, stats)
+    if html is None:
+        return None
+    if parser is not None:
+        return parser.parse(url, html)
+    return parse_article_html(url, html)
+
+def fetch_article(entry, topic, ideology, outlet, limiter, session, stats, url_store=None, parser=None,
+                  matcher=KEYWORD_MATCHER):
+    # Download, parse and filter a single feed entry; returns (output row, canonical link),
+    # with row None if the page was rejected, or None if the download or parse failed.
+    # Rejected pages are recorded in url_store so later runs skip them; failed downloads are
+    # not, so they get retried.
+    url = entry.link
+    article = download_article(url, limiter, session, stats, parser)
+    if article is None:
+        return None
+
+    canonical_url = article.canonical_link or None
+    if url_store is not None and canonical_url and normalize_url(canonical_url) != normalize_url(url):
+        if url_store.seen(canonical_url, canonical=True):
+            url_store.add(url)
+            return None, canonical_url
 
-output_rows = []
-topic = "immigration"
-ideologies = topics[topic]
+    row = filter_article(article, entry, topic, ideology, outlet, url, matcher)
+    if row is None and url_store is not None:
+        url_store.add(url, canonical_url)
+    return row, canonical_url
 
-counts = {ideo: 0 for ideo in ideologies}
-outlet_counts = {ideo: {outlet: 0 for outlet in outlets} for ideo, outlets in ideologies.items()}
+def filter_article(article, entry, topic, ideology, outlet, url, matcher=KEYWORD_MATCHER):
+    # Recency, text and title keyword checks on a parsed article; returns the output row or None
 
-print(f"Starting scraping articles on '{topic}' topic...")
+    # Get publish date
+    publish_date = None
+    if hasattr(article, 'publish_date') and article.publish_date:
+        publish_date = article.publish_date
+    elif hasattr(entry, 'published_parsed'):
+        publish_date = datetime(*entry.published_parsed[:6])
+
+    if not is_recent(publish_date):
+        return None
+
+    title = article.title if article and article.title else (entry.title if hasattr(entry, 'title') else "")
+    sample_text = article.text[:10000].strip() if article and article.text else ""
+
+    if not sample_text:
+        return None
+
+    # STRICT keyword check only in title (whole word matching)
+    if not matcher.matches(title):
+        return None
+
+    datetime_str = publish_date.strftime("%Y-%m-%d %H:%M") if publish_date else ""
+
+    return {
+        "topic": topic,
+        "outlet": outlet,
+        "datetime": datetime_str,
+        "title": title,
+        "url": url,
+        "sample_text": sample_text,
+        "ideological_stance": ideology,
+        "factual_grounding": "",
+        "framing_choices": "",
+        "emotional_tone": "",
+        "source_transparency": ""
+    }
+
+def scrape_pass(topic, ideologies, quota, executor, limiter, session, stats, filter_stats, url_store=None,
+                feed_state=None, parser=None, matcher=KEYWORD_MATCHER):
+    # One pass over every outlet that still has quota left. Feeds are fetched in parallel and
+    # each feed's entries that survive the pre-download filters, and were not scraped already
+    # in this run or (per url_store) an earlier one, are downloaded with at most
+    # MAX_PENDING_PER_OUTLET in flight. Downloads in flight count against the quotas, so an
+    # ideology one article short of its quota has one download running, not one per outlet.
+    pending = {}
+    entry_iters = {}
+    in_flight = {}
+    ideology_in_flight = {ideology: 0 for ideology in ideologies}
+
+    def mark_handled(ideology, outlet, entry):
+        # Entries are only marked in feed_state once their outcome is final: filtered out,
+        # saved, or a duplicate. Failed downloads and articles turned away by a full quota
+        # come back on the next poll.
+        if feed_state is not None:
+            feed_state.mark_seen(ideologies[ideology][outlet], entry)
+
+    def open_slots(ideology, outlet):
+        key = (ideology, outlet)
+        return min(MAX_PENDING_PER_OUTLET - in_flight[key],
+                   quota.remaining(ideology, outlet) - in_flight[key],
+                   quota.max_per_ideology - quota.counts[ideology] - ideology_in_flight[ideology])
+
+    def submit_entries(ideology, outlet):
+        key = (ideology, outlet)
+        entries = entry_iters.get(key)
+        while entries is not None and open_slots(ideology, outlet) > 0:
+            entry = next(entries, None)
+            if entry is None:
+                entry_iters[key] = None
+                break
+            link = entry.get("link")
+            if (not prefilter_entry(entry, filter_stats, matcher) or not link or quota.has_url(link)
+                    or (url_store is not None and url_store.seen(link))):
+                mark_handled(ideology, outlet, entry)
+                continue
+            future = executor.submit(fetch_article, entry, topic, ideology, outlet, limiter, session, stats, url_store,
+                                     parser, matcher)
+            pending[future] = ("article", ideology, outlet, entry)
+            in_flight[key] += 1
+            ideology_in_flight[ideology] += 1
 
-# Loop until each ideology reaches max article count
-while any(counts[ideo] < MAX_ARTICLES_PER_IDEOLOGY for ideo in counts):
     for ideology, outlets in ideologies.items():
-        if counts[ideology] >= MAX_ARTICLES_PER_IDEOLOGY:
+        if quota.ideology_full(ideology):
             continue
 
         for outlet, feed_url in outlets.items():
-            if outlet_counts[ideology][outlet] >= MAX_ARTICLES_PER_OUTLET:
+            if quota.outlet_full(ideology, outlet):
                 continue
 
             print(f"Fetching feed: {outlet} ({ideology})")
-            feed = feedparser.parse(feed_url)
-            for entry in feed.entries:
-                if counts[ideology] >= MAX_ARTICLES_PER_IDEOLOGY or outlet_counts[ideology][outlet] >= MAX_ARTICLES_PER_OUTLET:
-                    break
-
-                url = entry.link
-                if not url_exists(url):
-                    continue
-
-                try:
-                    article = Article(url)
-                    article.download()
-                    article.parse()
-                except Exception:
-                    continue
-
-                # Get publish date
-                publish_date = None
-                if hasattr(article, 'publish_date') and article.publish_date:
-                    publish_date = article.publish_date
-                elif hasattr(entry, 'published_parsed'):
-                    publish_date = datetime(*entry.published_parsed[:6])
-
-                if not is_recent(publish_date):
-                    continue
-
-                title = article.title if article and article.title else (entry.title if hasattr(entry, 'title') else "")
-                sample_text = article.text[:10000].strip() if article and article.text else ""
-
-                if not sample_text:
-                    continue
-
-                # STRICT keyword check only in title (whole word matching)
-                if not contains_keyword_in_title(title, KEYWORDS):
-                    continue
-
-                # Skip duplicates
-                if any(row["url"] == url for row in output_rows):
-                    continue
-
-                datetime_str = publish_date.strftime("%Y-%m-%d %H:%M") if publish_date else ""
-
-                output_rows.append({
-                    "topic": topic,
-                    "outlet": outlet,
-                    "datetime": datetime_str,
-                    "title": title,
-                    "url": url,
-                    "sample_text": sample_text,
-                    "ideological_stance": ideology,
-                    "factual_grounding": "",
-                    "framing_choices": "",
-                    "emotional_tone": "",
-                    "source_transparency": ""
-                })
-
-                counts[ideology] += 1
-                outlet_counts[ideology][outlet] += 1
-
-                print(f"Added article ({counts[ideology]}/{MAX_ARTICLES_PER_IDEOLOGY}) from {outlet} ({ideology})")
-
-            if counts[ideology] >= MAX_ARTICLES_PER_IDEOLOGY:
-                print(f"Reached max articles for {ideology}")
-
-print("Scraping done. Saving to CSV...")
-
-csv_columns = [
-    "topic", "outlet", "datetime", "title", "url", "sample_text",
-    "ideological_stance", "factual_grounding", "framing_choices", "emotional_tone", "source_transparency"
-]
-
-with open("news_bias_articles.csv", "w", newline="", encoding="utf-8") as csvfile:
-    writer = csv.DictWriter(csvfile, fieldnames=csv_columns)
-    writer.writeheader()
-    writer.writerows(output_rows)
-
-print("Done! Articles saved to news_bias_articles.csv")
-
+            future = executor.submit(fetch_feed, feed_url, limiter, session, feed_state)
+            pending[future] = ("feed", ideology, outlet, None)
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            kind, ideology, outlet, entry = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error fetching {kind} for {outlet} ({ideology}): {e}")
+                result = None
+
+            if kind == "feed":
+                entry_iters[(ideology, outlet)] = iter(result) if result is not None else None
+                in_flight[(ideology, outlet)] = 0
+            else:
+                in_flight[(ideology, outlet)] -= 1
+                ideology_in_flight[ideology] -= 1
+                if result is not None:
+                    row, canonical_url = result
+                    if row is None:
+                        mark_handled(ideology, outlet, entry)
+                    elif quota.try_add(ideology, outlet, row, canonical_url):
+                        mark_handled(ideology, outlet, entry)
+                        if url_store is not None:
+                            url_store.add(row["url"], canonical_url)
+                        print(f"Added article ({quota.counts[ideology]}/{quota.max_per_ideology}) from {outlet} ({ideology})")
+                        if quota.ideology_full(ideology):
+                            print(f"Reached max articles for {ideology}")
+                    elif quota.has_url(row["url"]):
+                        mark_handled(ideology, outlet, entry)
+
+            # A download that did not add an article frees a slot of the ideology's quota,
+            # which any of its outlets may take up
+            submit_entries(ideology, outlet)
+            for other in ideologies[ideology]:
+                if other != outlet:
+                    submit_entries(ideology, other)
+
+        # Drop queued work for outlets whose quota has filled up meanwhile
+        for future, (kind, ideology, outlet, _) in list(pending.items()):
+            if quota.outlet_full(ideology, outlet) and future.cancel():
+                del pending[future]
+                if kind == "article":
+                    in_flight[(ideology, outlet)] -= 1
+                    ideology_in_flight[ideology] -= 1
+
+def main(topic="immigration", topic_feeds=topics, output_csv="news_bias_articles.csv", max_workers=MAX_WORKERS,
+         max_per_ideology=MAX_ARTICLES_PER_IDEOLOGY, max_per_outlet=MAX_ARTICLES_PER_OUTLET,
+         requests_per_second=MAX_REQUESTS_PER_SECOND, seen_url_store=SEEN_URL_STORE_PATH,
+         feed_state_path=FEED_STATE_PATH, fetch_cache=None, cache_mode="record", parse_workers=PARSE_WORKERS,
+         max_parse_in_flight=MAX_PARSE_IN_FLIGHT, dataset=None, keywords=None):
+    # Articles are written to output_csv as they are accepted (see article_writer); returns
+    # the CSV files written. With the seen-URL store a run only saves articles no earlier
+    # run saved, so they are appended to output_csv; without it output_csv is replaced.
+    # With a dataset directory the saved articles are also appended to that Parquet dataset.
+    # fetch_cache is the path of a FetchCache to record into or
+    # serve from; cache_mode="replay" runs offline from it, without rate limit and without
+    # reading or updating the seen-URL store and feed state, so it repeats the recorded run.
+    # Pages are parsed in parse_workers processes (see article_parser); 0 parses inline.
+    # Titles are matched against keywords, by default the topic's keywords in topics.json.
+    global recency_reference
+    recency_reference = None
+    cache = None
+    if fetch_cache:
+        cache = FetchCache(fetch_cache, read_only=cache_mode == "replay")
+        if cache_mode == "replay":
+            requests_per_second = seen_url_store = feed_state_path = None
+            newest = cache.newest_fetch()
+            if newest:
+                recency_reference = datetime.fromtimestamp(newest, timezone.utc).replace(tzinfo=None)
+    ideologies = topic_feeds[topic]
+    matcher = topic_matcher(topic) if keywords is None else get_keyword_matcher(tuple(kw.lower() for kw in keywords))
+    writer = ArticleWriter(output_csv, CSV_COLUMNS, append=bool(seen_url_store), dataset=dataset)
+    quota = QuotaTracker(ideologies, max_per_ideology, max_per_outlet, writer)
+    limiter = HostLimiter(MAX_CONNECTIONS_PER_HOST, requests_per_second)
+    session = make_session(max_workers, cache, cache_mode)
+    stats = FetchStats()
+    filter_stats = FilterStats()
+    url_store = SeenUrlStore(seen_url_store, SEEN_URL_MAX_AGE_DAYS) if seen_url_store else None
+    feed_state = FeedStateStore(feed_state_path) if feed_state_path else None
+    parser = ParsePool(parse_workers, max_parse_in_flight) if parse_workers else None
+
+    print(f"Starting scraping articles on '{topic}' topic...")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Loop until each ideology reaches max article count, or the feeds have nothing new
+        while not quota.all_full():
+            added = quota.added
+            try:
+                scrape_pass(topic, ideologies, quota, executor, limiter, session, stats, filter_stats, url_store,
+                            feed_state, parser, matcher)
+            finally:
+                writer.commit()
+            if feed_state is not None:
+                feed_state.save()
+            if quota.added == added:
+                print("No new articles in this pass, stopping with quotas unfilled")
+                break
+    session.close()
+    if parser is not None:
+        parser.close()
+
+    print(f"Scraping done: {stats.summary()}")
+    if parser is not None:
+        print(parser.summary())
+    print(f"Pre-download filters: {filter_stats.summary()}")
+    print(f"Duplicate articles dropped in this run: {quota.duplicates}")
+    if url_store is not None:
+        print(url_store.summary())
+        url_store.close()
+    if feed_state is not None:
+        print(feed_state.summary())
+        feed_state.close()
+    if cache is not None:
+        print(cache.summary())
+        cache.close()
+    writer.close()
+    print(f"Done! Articles saved: {writer.summary()}")
+    return writer.files
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape one topic from the outlets' feeds")
+    parser.add_argument("--topic", choices=sorted(topics), default="immigration")
+    parser.add_argument("--output", help="default news_bias_articles.csv, or news_bias_articles_replay.csv for replays")
+    parser.add_argument("--cache", help=f"fetch cache to record into or replay from (default {FETCH_CACHE_PATH} "
+                                        "when --cache-mode is given)")
+    parser.add_argument("--cache-mode", choices=CACHE_MODES,
+                        help="record: fetch live and store; prefer: serve cached pages, fetch the rest; "
+                             "replay: offline, only from the cache")
+    parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS,
+                        help="processes parsing downloaded pages; 0 parses in the download threads")
+    parser.add_argument("--max-parse-in-flight", type=int, default=MAX_PARSE_IN_FLIGHT)
+    parser.add_argument("--dataset", help="also append the saved articles to this Parquet dataset (storage.py)")
+    args = parser.parse_args()
+
+    cache_path = args.cache or (FETCH_CACHE_PATH if args.cache_mode else None)
+    replay = args.cache_mode == "replay"
+    main(args.topic, output_csv=args.output or ("news_bias_articles_replay.csv" if replay else "news_bias_articles.csv"),
+         fetch_cache=cache_path, cache_mode=args.cache_mode or "record", parse_workers=args.parse_workers,
+         max_parse_in_flight=args.max_parse_in_flight, dataset=args.dataset)
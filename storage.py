@@ -0,0 +1,196 @@
+# Columnar storage for the article tables handed between stages.
+#
+# Articles are written as a Parquet dataset partitioned by topic and publication date
+# (root/topic=<topic>/date=<YYYY-MM-DD>/part-*.parquet) with a fixed schema for the known
+# columns: datetime as a timestamp, the five bias dimensions and stances as float64,
+# cluster IDs as int64 and the rest as strings. Columns the schema does not know (e.g.
+# story_id) are stored with their inferred type, and so is a float column holding values
+# that are not numbers (the scraper's ideology names in ideological_stance): it is stored as
+# text rather than nulled. Readers ask for the columns, topics and date range they need; the
+# other columns are never decoded and the other partitions never opened.
+#
+# The stages read and write their tables through load_table() / save_table(), which take a
+# path ending in .csv as a CSV file and any other path as a dataset directory, so every
+# hand-off can be Parquet. CSV stays available through import_csv() / export_csv().
+#
+#   python storage.py import news_bias_articles_clustered.csv articles_parquet
+#   python storage.py export articles_parquet news_bias_articles_clustered.csv
+import argparse
+import os
+import shutil
+import uuid
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - only the CSV path works without pyarrow
+    pa = None
+
+BIAS_COLUMNS = ["ideological_stance", "factual_grounding", "framing_choices", "emotional_tone", "source_transparency"]
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet storage needs pyarrow: pip install pyarrow")
+
+def article_schema():
+    _require_pyarrow()
+    fields = [
+        ("topic", pa.string()),
+        ("outlet", pa.string()),
+        ("datetime", pa.timestamp("ns")),
+        ("title", pa.string()),
+        ("url", pa.string()),
+        ("sample_text", pa.string()),
+    ]
+    fields += [(col, pa.float64()) for col in BIAS_COLUMNS]
+    fields += [
+        ("ideology_label", pa.string()),
+        ("combined_ideological_stance", pa.float64()),
+        ("cluster", pa.int64()),
+        ("cluster_id", pa.int64()),
+        ("cluster_label", pa.string()),
+        ("date", pa.string()),
+    ]
+    return pa.schema(fields)
+
+def partitioning():
+    return ds.partitioning(pa.schema([("topic", pa.string()), ("date", pa.string())]), flavor="hive")
+
+def _to_table(df):
+    # Coerce df to the schema; unknown columns keep the type pyarrow infers for them. Blank
+    # strings in a float column are missing values; any other value that is not a number
+    # makes the column text.
+    df = df.copy()
+    df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce")
+    df["date"] = df["datetime"].dt.strftime("%Y-%m-%d").fillna("unknown")
+    schema = article_schema()
+    known = {field.name: field for field in schema}
+    text = set()
+    for col in df.columns:
+        if col in known and pa.types.is_floating(known[col].type) and not pd.api.types.is_numeric_dtype(df[col]):
+            values = df[col].mask(df[col].astype("string").str.strip() == "")
+            numeric = pd.to_numeric(values, errors="coerce")
+            if (numeric.isna() & values.notna()).any():
+                df[col] = values.astype("string")
+                text.add(col)
+            else:
+                df[col] = numeric
+    fields = []
+    for col in df.columns:
+        if col in text:
+            fields.append(pa.field(col, pa.string()))
+        elif col in known:
+            fields.append(known[col])
+        else:
+            fields.append(pa.field(col, pa.Array.from_pandas(df[col]).type))
+    return pa.Table.from_pandas(df, schema=pa.schema(fields), preserve_index=False)
+
+def write_articles(df, root, overwrite=False):
+    # Append df to the dataset at root. With overwrite=True, the topic/date partitions that
+    # df touches are replaced; other partitions are kept.
+    _require_pyarrow()
+    table = _to_table(df)
+    pq.write_to_dataset(
+        table, root, partitioning=partitioning(),
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="delete_matching" if overwrite else "overwrite_or_ignore",
+    )
+
+def write_rows(rows, root, columns=None):
+    # Append row dicts (e.g. a batch of the scraper's CSV rows) to the dataset at root
+    write_articles(pd.DataFrame(rows, columns=columns), root)
+
+def _filter(topics=None, start=None, end=None):
+    # Partition filter on topic and on the date partition (dates are YYYY-MM-DD strings, so
+    # string order is date order); end is inclusive
+    expression = None
+    def combine(part):
+        return part if expression is None else expression & part
+    if topics is not None:
+        expression = combine(ds.field("topic").isin(list(topics)))
+    if start is not None:
+        expression = combine(ds.field("date") >= pd.Timestamp(start).strftime("%Y-%m-%d"))
+    if end is not None:
+        expression = combine(ds.field("date") <= pd.Timestamp(end).strftime("%Y-%m-%d"))
+    return expression
+
+def dataset(root):
+    _require_pyarrow()
+    return ds.dataset(root, format="parquet", partitioning=partitioning())
+
+def read_articles(root, columns=None, topics=None, start=None, end=None):
+    # DataFrame of the requested columns (all by default) for the given topics and dates
+    data = dataset(root)
+    table = data.to_table(columns=columns, filter=_filter(topics, start, end))
+    df = table.to_pandas()
+    if "date" in df.columns and (columns is None or "date" not in columns):
+        df = df.drop(columns="date")
+    return df
+
+def is_dataset(path):
+    return not os.fspath(path).lower().endswith(".csv")
+
+def load_table(path):
+    # A stage table, from a CSV file or a dataset directory
+    if is_dataset(path):
+        return read_articles(path)
+    return pd.read_csv(path)
+
+def save_table(df, path):
+    # Replace the stage table at path. The CSV or dataset is written next to it and swapped
+    # in, so readers never see a half-written one.
+    if not is_dataset(path):
+        tmp_path = path + ".tmp"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return
+    path = os.path.normpath(path)
+    tmp_path, old_path = path + ".tmp", path + ".old"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    write_articles(df, tmp_path)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def import_csv(csv_path, root, chunksize=500_000):
+    # Convert a stage CSV, chunk by chunk, into the dataset at root
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        write_articles(chunk, root)
+
+def export_csv(root, csv_path, columns=None, topics=None, start=None, end=None):
+    # Write (part of) the dataset back out as CSV, one record batch at a time, in the
+    # format of the stage CSVs (datetime as "YYYY-MM-DD HH:MM", no date column)
+    data = dataset(root)
+    if columns is None:
+        columns = [name for name in data.schema.names if name != "date"]
+    scanner = data.scanner(columns=columns, filter=_filter(topics, start, end))
+    header = True
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        for batch in scanner.to_batches():
+            chunk = batch.to_pandas()
+            if "datetime" in chunk.columns:
+                chunk["datetime"] = chunk["datetime"].dt.strftime("%Y-%m-%d %H:%M")
+            chunk.to_csv(f, header=header, index=False)
+            header = False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert article tables between CSV and partitioned Parquet")
+    sub = parser.add_subparsers(dest="command", required=True)
+    to_parquet = sub.add_parser("import", help="CSV -> Parquet dataset")
+    to_parquet.add_argument("csv")
+    to_parquet.add_argument("root")
+    to_csv = sub.add_parser("export", help="Parquet dataset -> CSV")
+    to_csv.add_argument("root")
+    to_csv.add_argument("csv")
+    to_csv.add_argument("--topics", nargs="*")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        import_csv(args.csv, args.root)
+    else:
+        export_csv(args.root, args.csv, topics=args.topics)
+    print(f"Done: {args.command} {args.csv if args.command == 'import' else args.root}")
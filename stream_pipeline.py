@@ -0,0 +1,515 @@
+# Streaming mode: scrape -> score -> cluster -> velocity as one long-running process.
+#
+# Each stage runs in its own thread and hands articles to the next through a bounded
+# queue, so a slow stage blocks the ones before it instead of letting work pile up. The
+# stages reuse the batch code: scrape_pass() with the seen-URL store and feed state (only
+# new articles), prepare_articles()/score_texts()/assign_scores() on micro-batches,
+# embed_texts() with the persistent embedding store plus the incremental per-topic
+# clusterers, and a running version of the analyze_velocity() summaries. Every stage
+# reports throughput, time blocked on its output queue, and latency since the article
+# was scraped.
+#
+# Articles are marked handled (seen-URL store, feed state) as soon as they are scraped, so
+# a later stage must not lose them: a batch that fails is retried article by article, and
+# articles that still fail go to a dead-letter file that a later run can replay.
+import argparse
+import collections
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import cluster_outlets
+import score_bias
+import scrape_outlets
+from article_parser import PARSE_WORKERS, ParsePool
+from cluster_narratives import IDEOLOGIES, ideology_labels
+from embedding_store import EmbeddingStore
+from feed_state import FeedStateStore
+from incremental_clusters import load_clusterer, save_clusterer
+from narrative_velocity import NarrativeVelocity
+from score_cache import ScoreCache
+from url_store import SeenUrlStore
+
+QUEUE_SIZE = 256          # articles waiting between two stages
+SCORE_BATCH_SIZE = 16     # articles per scoring micro-batch
+CLUSTER_BATCH_SIZE = 64   # articles per embedding/clustering micro-batch
+MAX_BATCH_WAIT = 2.0      # seconds a stage waits to fill a micro-batch
+POLL_INTERVAL = 300       # seconds between scrape cycles
+STATE_SAVE_INTERVAL = 30  # seconds between cluster state snapshots
+METRICS_INTERVAL = 30     # seconds between metrics reports
+DEAD_LETTER_PATH = "stream_dead_letters.jsonl"
+REPLAY_SUFFIX = ".replaying"
+
+# Marks the end of the stream; each stage passes it on once its input is drained
+STOP = object()
+
+class StageMetrics:
+    def __init__(self, name, inbox=None):
+        self.name = name
+        self.inbox = inbox
+        self.items_in = 0
+        self.items_out = 0
+        self.batches = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.latencies = collections.deque(maxlen=10000)
+        self.lock = threading.Lock()
+
+    def record(self, n_out, created, busy):
+        # created: scrape times of the articles the stage has just finished with
+        now = time.time()
+        with self.lock:
+            self.items_in += len(created)
+            self.items_out += n_out
+            self.batches += 1
+            self.busy += busy
+            self.latencies.extend(now - t for t in created)
+
+    def summary(self):
+        with self.lock:
+            rate = self.items_in / self.busy if self.busy else 0.0
+            per_batch = self.items_in / self.batches if self.batches else 0.0
+            latency = ""
+            if self.latencies:
+                p50, p95 = np.percentile(list(self.latencies), [50, 95])
+                latency = f", latency since scrape p50 {p50:.2f}s p95 {p95:.2f}s"
+            depth = f", queue {self.inbox.qsize()}/{self.inbox.maxsize}" if self.inbox is not None else ""
+            return (
+                f"{self.name:8s} {self.items_in} in, {self.items_out} out, {self.batches} batches "
+                f"(avg {per_batch:.1f}), {self.errors} failed; busy {self.busy:.1f}s ({rate:.1f} articles/s), "
+                f"blocked on output {self.blocked:.1f}s{depth}{latency}"
+            )
+
+def _json_value(value):
+    # numpy scalars and timestamps in a row, for json.dumps
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+class DeadLetters:
+    # Articles a stage failed on even when processed on their own, one JSON line each
+    # ({"stage", "row", "scraped_at", "error"}), appended and fsynced as they fail
+    def __init__(self, path=DEAD_LETTER_PATH):
+        self.path = path
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def add(self, stage, row, scraped_at, error):
+        line = json.dumps({"stage": stage, "row": row, "scraped_at": scraped_at, "error": repr(error)},
+                          default=_json_value)
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.count += 1
+
+    @staticmethod
+    def take(path=DEAD_LETTER_PATH):
+        # Moves the dead letters to <path>.replaying (after any left there by a replay that
+        # did not finish) and returns them; articles that fail again go to a new file at path.
+        # finish_replay() removes them once the replay is done.
+        replay_path = path + REPLAY_SUFFIX
+        if os.path.exists(path):
+            with open(path, "rb") as src, open(replay_path, "ab") as dst:
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(path)
+        if not os.path.exists(replay_path):
+            return []
+        with open(replay_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.endswith("\n")]
+
+    @staticmethod
+    def finish_replay(path=DEAD_LETTER_PATH):
+        if os.path.exists(path + REPLAY_SUFFIX):
+            os.remove(path + REPLAY_SUFFIX)
+
+class Stage(threading.Thread):
+    # Pulls (row, scraped_at) items from inbox in micro-batches of up to batch_size, waiting
+    # at most max_wait for a batch to fill, and puts process(rows)'s results on outbox. A
+    # batch that raises is retried article by article so one bad article cannot stop the
+    # service or take its batch with it; articles that still fail are counted and, with
+    # dead_letters, kept for a replay.
+    def __init__(self, name, process, inbox, outbox=None, batch_size=1, max_wait=MAX_BATCH_WAIT,
+                 dead_letters=None):
+        super().__init__(name=name, daemon=True)
+        self.process = process
+        self.inbox = inbox
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.dead_letters = dead_letters
+        self.metrics = StageMetrics(name, inbox)
+
+    def _next_batch(self):
+        item = self.inbox.get()
+        if item is STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            try:
+                item = self.inbox.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def run(self):
+        done = False
+        while not done:
+            batch, done = self._next_batch()
+            if not batch:
+                continue
+            start = time.perf_counter()
+            try:
+                results = self.process([row for row, _ in batch])
+                outputs = [(row, scraped_at) for row, (_, scraped_at) in zip(results, batch) if row is not None]
+            except Exception as e:
+                print(f"[{self.name}] batch of {len(batch)} failed ({e}), retrying its articles one by one")
+                outputs = self._process_singly(batch)
+            self.metrics.record(len(outputs), [scraped_at for _, scraped_at in batch], time.perf_counter() - start)
+            if self.outbox is not None:
+                start = time.perf_counter()
+                for item in outputs:
+                    self.outbox.put(item)
+                self.metrics.blocked += time.perf_counter() - start
+
+        if hasattr(self.process, "close"):
+            self.process.close()
+        if self.outbox is not None:
+            self.outbox.put(STOP)
+
+    def _process_singly(self, batch):
+        outputs = []
+        for row, scraped_at in batch:
+            try:
+                results = self.process([row])
+            except Exception as e:
+                self.metrics.errors += 1
+                print(f"[{self.name}] article {row.get('url', '')} failed: {e}")
+                if self.dead_letters is not None:
+                    self.dead_letters.add(self.name, row, scraped_at, e)
+                continue
+            outputs.extend((result, scraped_at) for result in results[:1] if result is not None)
+        return outputs
+
+class StreamingQuota(scrape_outlets.QuotaTracker):
+    # Hands every accepted article straight to the scorer. try_add() runs on the scrape
+    # thread, so a full queue stops it from submitting more downloads (backpressure).
+    def __init__(self, ideologies, max_per_ideology, max_per_outlet, outbox, metrics):
+        super().__init__(ideologies, max_per_ideology, max_per_outlet)
+        self.outbox = outbox
+        self.metrics = metrics
+
+    def try_add(self, ideology, outlet, row, canonical_url=None):
+        if not super().try_add(ideology, outlet, row, canonical_url):
+            return False
+        scraped_at = time.time()
+        self.metrics.record(1, [scraped_at], 0.0)
+        start = time.perf_counter()
+        self.outbox.put((row, scraped_at))
+        self.metrics.blocked += time.perf_counter() - start
+        return True
+
+class ScrapeStage(threading.Thread):
+    # Runs scrape_pass() every poll_interval seconds with fresh per-cycle quotas; the
+    # seen-URL store and feed state make each cycle pick up only new articles
+    def __init__(self, topic, topic_feeds, outbox, cycles=None, poll_interval=POLL_INTERVAL,
+                 max_per_ideology=10**6, max_per_outlet=10**6, max_workers=scrape_outlets.MAX_WORKERS,
+                 requests_per_second=scrape_outlets.MAX_REQUESTS_PER_SECOND,
+                 seen_url_store=scrape_outlets.SEEN_URL_STORE_PATH, feed_state_path=scrape_outlets.FEED_STATE_PATH,
+                 parse_workers=PARSE_WORKERS):
+        super().__init__(name="scrape", daemon=True)
+        self.topic = topic
+        self.ideologies = topic_feeds[topic]
+        self.matcher = scrape_outlets.topic_matcher(topic)
+        self.outbox = outbox
+        self.cycles = cycles
+        self.poll_interval = poll_interval
+        self.max_per_ideology = max_per_ideology
+        self.max_per_outlet = max_per_outlet
+        self.max_workers = max_workers
+        self.requests_per_second = requests_per_second
+        self.seen_url_store = seen_url_store
+        self.feed_state_path = feed_state_path
+        self.parse_workers = parse_workers
+        self.stop_event = threading.Event()
+        self.metrics = StageMetrics("scrape")
+
+    def run(self):
+        limiter = scrape_outlets.HostLimiter(scrape_outlets.MAX_CONNECTIONS_PER_HOST, self.requests_per_second)
+        session = scrape_outlets.make_session(self.max_workers)
+        stats = scrape_outlets.FetchStats()
+        filter_stats = scrape_outlets.FilterStats()
+        url_store = SeenUrlStore(self.seen_url_store, scrape_outlets.SEEN_URL_MAX_AGE_DAYS) if self.seen_url_store else None
+        feed_state = FeedStateStore(self.feed_state_path) if self.feed_state_path else None
+        parser = ParsePool(self.parse_workers) if self.parse_workers else None
+
+        cycle = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while not self.stop_event.is_set() and (self.cycles is None or cycle < self.cycles):
+                start = time.perf_counter()
+                quota = StreamingQuota(self.ideologies, self.max_per_ideology, self.max_per_outlet,
+                                       self.outbox, self.metrics)
+                try:
+                    scrape_outlets.scrape_pass(self.topic, self.ideologies, quota, executor, limiter, session,
+                                               stats, filter_stats, url_store, feed_state, parser, self.matcher)
+                except Exception as e:
+                    print(f"[scrape] cycle {cycle + 1} failed: {e}")
+                if feed_state is not None:
+                    feed_state.save()
+                elapsed = time.perf_counter() - start
+                self.metrics.busy += elapsed
+                cycle += 1
+                print(f"[scrape] cycle {cycle}: {quota.added} new articles in {elapsed:.1f}s")
+                if self.cycles is None or cycle < self.cycles:
+                    self.stop_event.wait(max(0.0, self.poll_interval - elapsed))
+
+        session.close()
+        print(f"[scrape] {stats.summary()}")
+        if parser is not None:
+            parser.close()
+            print(f"[scrape] {parser.summary()}")
+        print(f"[scrape] Pre-download filters: {filter_stats.summary()}")
+        if url_store is not None:
+            print(f"[scrape] {url_store.summary()}")
+            url_store.close()
+        if feed_state is not None:
+            print(f"[scrape] {feed_state.summary()}")
+            feed_state.close()
+        self.outbox.put(STOP)
+
+class Scorer:
+    # score_bias on a micro-batch of scraped rows; rows that score_bias would skip (empty
+    # text, unknown outlet) pass through unscored, as they do in the batch CSV
+    def __init__(self, clf=None, cache_path=None, batch_size=score_bias.SCORING_BATCH_SIZE):
+        self.clf = clf or score_bias.get_classifier()
+        self.batch_size = batch_size
+        self.cache = None
+        if cache_path:
+            self.cache = ScoreCache(cache_path, score_bias.scoring_signature(), score_bias.BIAS_DIMENSIONS,
+                                    score_bias.SCORE_CACHE_MAX_ENTRIES)
+
+    def __call__(self, rows):
+        df = pd.DataFrame(rows)
+        texts, outlet_labels, valid = score_bias.prepare_articles(df, verbose=False)
+        valid_texts = texts[valid].tolist()
+        if self.cache is not None:
+            scores = score_bias.score_texts_cached(valid_texts, self.cache, batch_size=self.batch_size,
+                                                   clf=self.clf, log_every=0)
+        else:
+            scores = score_bias.score_texts(valid_texts, batch_size=self.batch_size, clf=self.clf, log_every=0)
+        score_bias.assign_scores(df, valid, outlet_labels, scores)
+        return df.to_dict("records")
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+
+class Clusterer:
+    # Embeds a micro-batch through the persistent store and folds it into the incremental
+    # per-topic clusterers; cluster state is saved every STATE_SAVE_INTERVAL seconds and on close
+    def __init__(self, n_clusters=3, store_dir=cluster_outlets.EMBEDDING_STORE_DIR,
+                 state_dir=cluster_outlets.CLUSTER_STATE_DIR, model=None, model_name=None):
+        self.n_clusters = n_clusters
+        self.model = model
+        self.model_name = cluster_outlets.encoder_name(model, model_name)
+        self.state_dir = cluster_outlets.encoder_state_dir(state_dir, self.model_name)
+        self.store = EmbeddingStore(store_dir, self.model_name)
+        self.clusterers = {}
+        self.last_save = time.monotonic()
+
+    def __call__(self, rows):
+        df = pd.DataFrame(rows)
+        _, store_rows = cluster_outlets.embed_texts(df, model=self.model, store=self.store, verbose=False,
+                                                    model_name=self.model_name)
+        df['cluster_id'] = -1
+        df['cluster_label'] = None
+        for topic, group in df[store_rows >= 0].groupby('topic', sort=False):
+            if topic not in self.clusterers:
+                self.clusterers[topic] = load_clusterer(self.state_dir, topic, self.n_clusters)
+            keys = [EmbeddingStore.key(text) for text in group['sample_text']]
+            embeddings = self.store.vectors(store_rows[group.index].to_numpy())
+            ids, labels = self.clusterers[topic].update(keys, embeddings, group['ideological_stance'].tolist())
+            df.loc[group.index, 'cluster_id'] = ids
+            df.loc[group.index, 'cluster_label'] = labels
+
+        if time.monotonic() - self.last_save >= STATE_SAVE_INTERVAL:
+            self.save()
+        return df.to_dict("records")
+
+    def save(self):
+        for clusterer in self.clusterers.values():
+            save_clusterer(self.state_dir, clusterer)
+        self.last_save = time.monotonic()
+
+    def close(self):
+        self.save()
+
+class VelocityAggregator:
+    # Running version of the analyze_velocity() summaries: publications per day and
+    # ideology, first publication per ideology and outlet, and articles per cluster label.
+    # Per-narrative series and roles are kept in a NarrativeVelocity. Optionally appends
+    # every finished article to output_csv.
+    def __init__(self, output_csv=None):
+        self.output_csv = output_csv
+        self.total = 0
+        self.daily_counts = collections.Counter()
+        self.cluster_counts = collections.Counter()
+        self.first_seen = {}
+        self.outlet_first_seen = {}
+        self.narratives = NarrativeVelocity()
+        self.lock = threading.Lock()
+
+    def __call__(self, rows):
+        df = pd.DataFrame(rows)
+        df['datetime'] = pd.to_datetime(df['datetime'], errors='coerce')
+        df['combined_ideology_label'] = ideology_labels(df['ideological_stance'])
+        counted = df.dropna(subset=['datetime', 'combined_ideology_label', 'outlet'])
+
+        with self.lock:
+            self.total += len(counted)
+            for row in counted.itertuples(index=False):
+                label, when = row.combined_ideology_label, row.datetime
+                self.daily_counts[(when.date(), label)] += 1
+                self.cluster_counts[(row.topic, row.cluster_label, label)] += 1
+                if label not in self.first_seen or when < self.first_seen[label]:
+                    self.first_seen[label] = when
+                if row.outlet not in self.outlet_first_seen or when < self.outlet_first_seen[row.outlet]:
+                    self.outlet_first_seen[row.outlet] = when
+            self.narratives.update(counted)
+
+        if self.output_csv:
+            df.drop(columns=['combined_ideology_label']).to_csv(
+                self.output_csv, mode="a", header=not os.path.exists(self.output_csv), index=False)
+        return []
+
+    def lags(self):
+        # Hours between the first publications of each pair of ideologies
+        with self.lock:
+            lags = {}
+            for i, a in enumerate(IDEOLOGIES):
+                for b in IDEOLOGIES[i + 1:]:
+                    if a in self.first_seen and b in self.first_seen:
+                        lags[(a, b)] = (self.first_seen[b] - self.first_seen[a]).total_seconds() / 3600
+            return lags
+
+    def summary(self):
+        with self.lock:
+            lines = [f"velocity: {self.total} articles"]
+            for (day, label), count in sorted(self.daily_counts.items(), key=lambda item: (item[0][0], item[0][1])):
+                lines.append(f"  {day} {label:12s} {count}")
+        for (a, b), lag in self.lags().items():
+            lines.append(f"  {a} -> {b}: {lag:.2f} hours")
+        with self.lock:
+            roles = self.narratives.roles_table()
+        for row in roles.itertuples(index=False):
+            lines.append(f"  {row.topic}/{row.narrative}: {row.ideology} {row.role} ({row.articles} articles)")
+        return "\n".join(lines)
+
+def replay_dead_letters_into(records, stages):
+    # Queues dead-lettered articles on the inbox of the stage each failed in; returns how many
+    inboxes = {stage.name: stage.inbox for stage in stages}
+    replayed = 0
+    for record in records:
+        if record["stage"] in inboxes:
+            inboxes[record["stage"]].put((record["row"], record["scraped_at"]))
+            replayed += 1
+    return replayed
+
+def run_pipeline(topic="immigration", topic_feeds=scrape_outlets.topics, cycles=None, poll_interval=POLL_INTERVAL,
+                 queue_size=QUEUE_SIZE, score_batch_size=SCORE_BATCH_SIZE, cluster_batch_size=CLUSTER_BATCH_SIZE,
+                 max_wait=MAX_BATCH_WAIT, metrics_interval=METRICS_INTERVAL, output_csv=None, clf=None,
+                 embedding_model=None, score_cache_path=score_bias.SCORE_CACHE_PATH,
+                 store_dir=cluster_outlets.EMBEDDING_STORE_DIR, state_dir=cluster_outlets.CLUSTER_STATE_DIR,
+                 seen_url_store=scrape_outlets.SEEN_URL_STORE_PATH, feed_state_path=scrape_outlets.FEED_STATE_PATH,
+                 requests_per_second=scrape_outlets.MAX_REQUESTS_PER_SECOND, embedding_model_name=None,
+                 dead_letter_path=DEAD_LETTER_PATH, replay_dead_letters=False):
+    # Runs until `cycles` scrape cycles are done (forever if None) or Ctrl+C, then drains
+    # the queues. Returns the velocity aggregator and every stage's metrics. An
+    # embedding_model other than the default is stored under its own name (see
+    # cluster_outlets.encoder_name). Articles a stage fails on are appended to
+    # dead_letter_path (None drops them); replay_dead_letters first feeds the ones there
+    # back to the stages they failed in.
+    to_score, to_cluster, to_velocity = (queue.Queue(maxsize=queue_size) for _ in range(3))
+    velocity = VelocityAggregator(output_csv)
+
+    dead_letters = DeadLetters(dead_letter_path) if dead_letter_path else None
+
+    scraper = ScrapeStage(topic, topic_feeds, to_score, cycles, poll_interval,
+                          requests_per_second=requests_per_second, seen_url_store=seen_url_store,
+                          feed_state_path=feed_state_path)
+    stages = [
+        scraper,
+        Stage("score", Scorer(clf, score_cache_path, score_bias.SCORING_BATCH_SIZE), to_score, to_cluster,
+              score_batch_size, max_wait, dead_letters),
+        Stage("cluster", Clusterer(store_dir=store_dir, state_dir=state_dir, model=embedding_model,
+                                   model_name=embedding_model_name),
+              to_cluster, to_velocity, cluster_batch_size, max_wait, dead_letters),
+        Stage("velocity", velocity, to_velocity, None, cluster_batch_size, max_wait, dead_letters),
+    ]
+
+    def report():
+        for stage in stages:
+            print(f"[metrics] {stage.metrics.summary()}")
+
+    # The processing stages start first and replayed articles are queued before the scraper
+    # starts, so they are ahead of the STOP it sends when its cycles are done
+    for stage in stages[1:]:
+        stage.start()
+    if dead_letters is not None and replay_dead_letters:
+        replay = replay_dead_letters_into(DeadLetters.take(dead_letter_path), stages[1:])
+        print(f"Replaying {replay} dead-lettered articles from {dead_letter_path}")
+    scraper.start()
+    try:
+        while stages[-1].is_alive():
+            stages[-1].join(metrics_interval)
+            report()
+    except KeyboardInterrupt:
+        print("Stopping: finishing the current scrape cycle and draining the queues...")
+        scraper.stop_event.set()
+        for stage in stages:
+            stage.join()
+        report()
+
+    if dead_letters is not None and replay_dead_letters:
+        DeadLetters.finish_replay(dead_letter_path)
+    if dead_letters is not None and dead_letters.count:
+        print(f"{dead_letters.count} articles failed and were written to {dead_letter_path} "
+              f"(rerun with --replay-dead-letters)")
+    print(velocity.summary())
+    return velocity, {stage.name: stage.metrics for stage in stages}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run scrape -> score -> cluster -> velocity as a streaming service")
+    parser.add_argument("--topic", default="immigration")
+    parser.add_argument("--cycles", type=int, default=None, help="scrape cycles before exiting (default: run forever)")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL)
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--score-batch", type=int, default=SCORE_BATCH_SIZE)
+    parser.add_argument("--cluster-batch", type=int, default=CLUSTER_BATCH_SIZE)
+    parser.add_argument("--metrics-interval", type=float, default=METRICS_INTERVAL)
+    parser.add_argument("--output", default=None, help="append finished articles to this CSV")
+    parser.add_argument("--dead-letters", default=DEAD_LETTER_PATH, help="articles a stage failed on go here")
+    parser.add_argument("--replay-dead-letters", action="store_true",
+                        help="feed the articles in --dead-letters back to their stages first")
+    args = parser.parse_args()
+
+    run_pipeline(args.topic, cycles=args.cycles, poll_interval=args.poll_interval, queue_size=args.queue_size,
+                 score_batch_size=args.score_batch, cluster_batch_size=args.cluster_batch,
+                 metrics_interval=args.metrics_interval, output_csv=args.output,
+                 dead_letter_path=args.dead_letters, replay_dead_letters=args.replay_dead_letters)
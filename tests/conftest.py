@@ -0,0 +1,35 @@
+# The modules are top-level scripts, so the repository root goes on sys.path. Scraper tests
+# run against the local stand-in outlets of benchmarks.local_feed_server.
+#
+#   python -m pytest tests
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.local_feed_server import LocalOutlets  # noqa: E402
+
+@pytest.fixture
+def local_outlets():
+    with LocalOutlets(outlets_per_ideology=4, entries_per_feed=12, delay=0.0) as local:
+        yield local
+
+@pytest.fixture
+def scrape(local_outlets, tmp_path):
+    # Runs scrape_outlets.main() on the local outlets; returns the files it wrote and the
+    # article requests it made
+    import scrape_outlets
+
+    def run(output_csv=None, **kwargs):
+        output_csv = output_csv or str(tmp_path / "articles.csv")
+        options = dict(max_per_ideology=4, max_per_outlet=2, requests_per_second=None, parse_workers=0,
+                       seen_url_store=str(tmp_path / "seen_urls.sqlite"),
+                       feed_state_path=str(tmp_path / "feed_state.sqlite"))
+        options.update(kwargs)
+        before = local_outlets.request_counts()["article"]
+        files = scrape_outlets.main(local_outlets.topic, local_outlets.topics, output_csv, **options)
+        requests = local_outlets.request_counts()["article"] - before
+        return files, requests
+    return run
@@ -0,0 +1,127 @@
+import os
+
+from article_writer import COMMITTED_SUFFIX, PARTIAL_SUFFIX, ArticleTail, ArticleWriter, read_committed
+
+COLUMNS = ["outlet", "title", "url"]
+
+def make_rows(start, n):
+    return [{"outlet": "Vox", "title": f"Story, part {i}\nwith a line break", "url": f"https://example.com/{i}"}
+            for i in range(start, start + n)]
+
+def write(writer, rows):
+    for row in rows:
+        writer.write(row)
+    writer.commit()
+
+def crash(writer):
+    # What a killed process leaves: the partial file and sidecar, and no close()
+    writer.file.close()
+
+def test_resume_after_crash_matches_an_uninterrupted_run(tmp_path):
+    reference = str(tmp_path / "reference.csv")
+    with ArticleWriter(reference, COLUMNS, batch_size=100) as writer:
+        write(writer, make_rows(0, 5))
+        write(writer, make_rows(5, 5))
+
+    path = str(tmp_path / "articles.csv")
+    writer = ArticleWriter(path, COLUMNS, batch_size=100)
+    write(writer, make_rows(0, 5))
+    committed = read_committed(path)
+    with open(path + PARTIAL_SUFFIX, "ab") as f:
+        f.write(b'Vox,"Half a ro')
+    crash(writer)
+
+    with ArticleWriter(path, COLUMNS, batch_size=100) as writer:
+        assert writer.recovered_bytes == committed
+        write(writer, make_rows(5, 5))
+
+    with open(path, "rb") as f, open(reference, "rb") as g:
+        assert f.read() == g.read()
+    assert not os.path.exists(path + PARTIAL_SUFFIX) and not os.path.exists(path + COMMITTED_SUFFIX)
+
+def test_tail_reads_only_committed_rows(tmp_path):
+    path = str(tmp_path / "articles.csv")
+    tail = ArticleTail(path)
+    writer = ArticleWriter(path, COLUMNS, batch_size=100)
+    writer.write(make_rows(0, 1)[0])
+    assert tail.read() == []
+
+    writer.commit()
+    with open(path + PARTIAL_SUFFIX, "ab") as f:
+        f.write(b"Vox,uncommitted")
+    assert tail.read() == make_rows(0, 1)
+    assert tail.read() == []
+    crash(writer)
+
+    with ArticleWriter(path, COLUMNS, batch_size=100) as writer:
+        write(writer, make_rows(1, 2))
+    assert tail.read() == make_rows(1, 2)
+
+def test_rotation_keeps_every_row_once_and_in_order(tmp_path):
+    path = str(tmp_path / "articles.csv")
+    state = str(tmp_path / "tail.json")
+    tail = ArticleTail(path, state)
+    rows = []
+    with ArticleWriter(path, COLUMNS, batch_size=3, rotate_bytes=400) as writer:
+        for start in range(0, 30, 3):
+            write(writer, make_rows(start, 3))
+            rows.extend(tail.read())
+            tail.save()
+            if start == 15:
+                # A restarted reader continues from the saved position
+                tail = ArticleTail(path, state)
+
+    rows.extend(tail.read())
+    assert rows == make_rows(0, 30)
+    assert len(writer.files) > 1 and not os.path.exists(path)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(PARTIAL_SUFFIX)]
+    assert ArticleTail(path).read() == make_rows(0, 30)
+
+def test_append_continues_the_file_and_replace_starts_over(tmp_path):
+    path = str(tmp_path / "articles.csv")
+    with ArticleWriter(path, COLUMNS) as writer:
+        write(writer, make_rows(0, 2))
+    with ArticleWriter(path, COLUMNS, append=True) as writer:
+        write(writer, make_rows(2, 2))
+    assert ArticleTail(path).read() == make_rows(0, 4)
+
+    with ArticleWriter(path, COLUMNS) as writer:
+        write(writer, make_rows(4, 1))
+    assert ArticleTail(path).read() == make_rows(4, 1)
+
+def test_appending_keeps_the_published_file_readable(tmp_path):
+    path = str(tmp_path / "articles.csv")
+    with ArticleWriter(path, COLUMNS) as writer:
+        write(writer, make_rows(0, 2))
+    tail = ArticleTail(path)
+    assert tail.read() == make_rows(0, 2)
+
+    writer = ArticleWriter(path, COLUMNS, batch_size=100, append=True)
+    assert ArticleTail(path).read() == make_rows(0, 2)
+    writer.write(make_rows(2, 1)[0])
+    assert ArticleTail(path).read() == make_rows(0, 2)
+    writer.commit()
+    assert ArticleTail(path).read() == make_rows(0, 3)
+    assert tail.read() == make_rows(2, 1)
+    write(writer, make_rows(3, 2))
+    assert tail.read() == make_rows(3, 2)
+    assert not os.path.exists(path + PARTIAL_SUFFIX)
+
+    # A crash loses only the uncommitted batch; the published file stays whole
+    writer.write(make_rows(5, 1)[0])
+    assert ArticleTail(path).read() == make_rows(0, 5)
+    with ArticleWriter(path, COLUMNS, append=True) as writer:
+        write(writer, make_rows(5, 1))
+    assert tail.read() == make_rows(5, 1)
+    assert writer.files == [path]
+
+def test_tail_starts_over_when_a_new_run_replaces_the_file(tmp_path):
+    path = str(tmp_path / "articles.csv")
+    tail = ArticleTail(path)
+    with ArticleWriter(path, COLUMNS) as writer:
+        write(writer, make_rows(0, 3))
+    assert tail.read() == make_rows(0, 3)
+
+    with ArticleWriter(path, COLUMNS) as writer:
+        write(writer, make_rows(10, 4))
+    assert tail.read() == make_rows(10, 4)
@@ -0,0 +1,62 @@
+import numpy as np
+
+from embedding_store import EmbeddingStore
+
+def encode_lengths(texts):
+    return np.array([[len(text), i] for i, text in enumerate(texts)], dtype=np.float32)
+
+def test_texts_are_encoded_once_and_survive_reopening(tmp_path):
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return encode_lengths(texts)
+
+    store = EmbeddingStore(str(tmp_path), "org/model")
+    rows = store.rows_for(["a", "bb", "a"], encode)
+    rows_again = store.rows_for(["ccc", "bb"], encode)
+    assert calls == [["a", "bb"], ["ccc"]]
+    assert rows.tolist() == [0, 1, 0] and rows_again.tolist() == [2, 1]
+
+    reopened = EmbeddingStore(str(tmp_path), "org/model")
+    assert reopened.count == 3
+    assert reopened.rows_for(["bb", "ccc", "a"], encode).tolist() == [1, 2, 0]
+    assert len(calls) == 2
+    assert reopened.vectors([0, 1, 2])[:, 0].tolist() == [1, 2, 3]
+
+def test_index_line_cut_short_by_a_crash_is_dropped(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "model")
+    store.rows_for(["a", "bb"], encode_lengths)
+    with open(store.index_path, "a", encoding="utf-8") as f:
+        f.write('["deadbeef", 2')
+
+    reopened = EmbeddingStore(str(tmp_path), "model")
+    assert reopened.count == 2
+    assert reopened.rows_for(["ccc"], encode_lengths).tolist() == [2]
+    assert EmbeddingStore(str(tmp_path), "model").rows == {EmbeddingStore.key(t): i for i, t in enumerate(["a", "bb", "ccc"])}
+
+def test_a_substitute_encoder_gets_its_own_store(tmp_path):
+    import pandas as pd
+    import pytest
+
+    import cluster_outlets
+    from benchmarks.tiny_model import HashingEncoder
+
+    df = pd.DataFrame({"topic": ["t", "t"], "sample_text": ["border patrol", ""]})
+    store, rows = cluster_outlets.embed_texts(df, str(tmp_path), model=HashingEncoder(), verbose=False)
+    assert store.model_name == HashingEncoder().name != cluster_outlets.EMBEDDING_MODEL
+    assert rows.tolist() == [0, -1]
+    assert not EmbeddingStore(str(tmp_path), cluster_outlets.EMBEDDING_MODEL).count
+
+    class Nameless:
+        def encode(self, texts, **kwargs):
+            return encode_lengths(texts)
+
+    with pytest.raises(ValueError):
+        cluster_outlets.embed_texts(df, str(tmp_path), model=Nameless(), verbose=False)
+    with pytest.raises(ValueError):
+        cluster_outlets.embed_texts(df, model=HashingEncoder(), store=EmbeddingStore(str(tmp_path), "other"))
+    store, _ = cluster_outlets.embed_texts(df, str(tmp_path), model=Nameless(), verbose=False, model_name="lengths")
+    assert store.model_name == "lengths"
+    assert cluster_outlets.encoder_state_dir("state", "org/model") == "state/org__model"
+    assert cluster_outlets.encoder_state_dir("state", cluster_outlets.EMBEDDING_MODEL) == "state"
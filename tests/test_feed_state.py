@@ -0,0 +1,44 @@
+import requests
+
+from feed_state import FeedStateStore, entry_id
+
+def feed_url(local_outlets):
+    return next(iter(local_outlets.topics[local_outlets.topic]["conservative"].values()))
+
+def test_unchanged_feed_is_a_304_returning_only_unhandled_entries(local_outlets, tmp_path):
+    url = feed_url(local_outlets)
+    session = requests.Session()
+    store = FeedStateStore(str(tmp_path / "feeds.sqlite"))
+
+    entries = store.poll(url, session, timeout=5)
+    assert len(entries) == 12 and store.not_modified == 0
+    for entry in entries[:10]:
+        store.mark_seen(url, entry)
+
+    again = store.poll(url, session, timeout=5)
+    assert store.not_modified == 1
+    assert [entry_id(e) for e in again] == [entry_id(e) for e in entries[10:]]
+
+    for entry in again:
+        store.mark_seen(url, entry)
+    assert store.poll(url, session, timeout=5) == []
+    assert store.not_modified == 2
+
+def test_state_survives_reopening_and_new_entries_come_through(local_outlets, tmp_path):
+    url = feed_url(local_outlets)
+    session = requests.Session()
+    path = str(tmp_path / "feeds.sqlite")
+    store = FeedStateStore(path)
+    for entry in store.poll(url, session, timeout=5):
+        store.mark_seen(url, entry)
+    store.close()
+
+    reopened = FeedStateStore(path)
+    assert reopened.poll(url, session, timeout=5) == []
+    assert reopened.not_modified == 1
+
+    local_outlets.publish("Border Patrol unveils new policy")
+    fresh = reopened.poll(url, session, timeout=5)
+    assert reopened.not_modified == 1
+    assert [entry.title for entry in fresh] == ["Border Patrol unveils new policy"]
+    reopened.close()
@@ -0,0 +1,54 @@
+import numpy as np
+
+from incremental_clusters import TopicClusterer, load_clusterer, save_clusterer
+
+CENTERS = {"Liberal": (-10.0, 0.0), "Unbiased": (0.0, 10.0), "Conservative": (10.0, 0.0)}
+STANCES = {"Liberal": 10.0, "Unbiased": 50.0, "Conservative": 90.0}
+
+def articles(names, start=0, seed=0):
+    # One key, embedding and stance per article, drawn around the center of its label
+    rng = np.random.default_rng(seed)
+    keys = [f"{name}-{start + i}" for i, name in enumerate(names)]
+    embeddings = np.array([CENTERS[name] for name in names]) + rng.normal(0, 0.5, (len(names), 2))
+    return keys, embeddings.astype(np.float32), [STANCES[name] for name in names]
+
+def test_articles_are_held_until_there_are_enough_to_cluster():
+    clusterer = TopicClusterer("t", n_clusters=3)
+    ids, labels = clusterer.update(*articles(["Liberal"]))
+    assert ids == [-1] and labels == [None]
+    assert clusterer.model is None and list(clusterer.held) == ["Liberal-0"]
+
+    ids, labels = clusterer.update(*articles(["Unbiased", "Conservative", "Liberal"], start=1))
+    assert clusterer.model.n_clusters == 3 and not clusterer.held
+    assert [clusterer.label_map[clusterer.assignments[k]] for k in ["Liberal-0", "Unbiased-1", "Conservative-2"]] == \
+           ["Liberal", "Unbiased", "Conservative"]
+    assert labels == ["Unbiased", "Conservative", "Liberal"]
+
+def test_assignments_and_labels_never_change_once_made():
+    clusterer = TopicClusterer("t", n_clusters=3)
+    names = ["Liberal", "Unbiased", "Conservative"]
+    clusterer.update(*articles(names[:1]))
+    clusterer.update(*articles(names[1:2], start=1))
+    clusterer.update(*articles(names * 2, start=2, seed=1))
+    assert {"Liberal-0", "Unbiased-1"} <= set(clusterer.assignments)
+    assignments = dict(clusterer.assignments)
+    label_map = dict(clusterer.label_map)
+
+    for batch in range(5):
+        keys, embeddings, stances = articles(names * 4, start=100 * (batch + 1), seed=batch + 2)
+        _, labels = clusterer.update(keys, embeddings, stances)
+        assert labels == names * 4
+    assert all(clusterer.assignments[key] == c for key, c in assignments.items())
+    assert clusterer.label_map == label_map
+    assert len(clusterer.assignments) == 2 + 6 + 5 * 12
+
+def test_state_round_trip(tmp_path):
+    clusterer = TopicClusterer("a/b", n_clusters=3)
+    clusterer.update(*articles(["Liberal", "Unbiased"]))
+    save_clusterer(str(tmp_path), clusterer)
+
+    loaded = load_clusterer(str(tmp_path), "a/b", n_clusters=3)
+    assert list(loaded.held) == ["Liberal-0", "Unbiased-1"]
+    loaded.update(*articles(["Conservative"], start=2))
+    assert loaded.label_map[loaded.assignments["Liberal-0"]] == "Liberal"
+    assert load_clusterer(str(tmp_path), "a/b", n_clusters=4).held == {}
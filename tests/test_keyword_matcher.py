@@ -0,0 +1,26 @@
+from benchmarks.bench_keywords import brute_force_find, legacy_contains_keyword_in_title, make_titles
+from keyword_matcher import KeywordMatcher
+from scrape_outlets import KEYWORDS
+
+def test_matches_agrees_with_the_legacy_loop():
+    matcher = KeywordMatcher(KEYWORDS)
+    titles = make_titles(5000) + ["ICE", "Iceland votes", "border-patrol", "Title 42 ends", "", "visa's"]
+    for title in titles:
+        assert matcher.matches(title) == legacy_contains_keyword_in_title(title, KEYWORDS), title
+
+def test_find_agrees_with_a_brute_force_scan():
+    matcher = KeywordMatcher(KEYWORDS)
+    for title in make_titles(2000, keyword_rate=0.8):
+        assert set(matcher.find(title)) == brute_force_find(title, matcher.keywords), title
+
+def test_find_reports_shorter_keywords_inside_longer_ones():
+    matcher = KeywordMatcher(["border", "border patrol", "patrol"])
+    assert matcher.find("Border Patrol agents") == ["border patrol", "border", "patrol"]
+
+def test_no_keywords_match_nothing():
+    for keywords in ([], ["", "  "]):
+        matcher = KeywordMatcher(keywords)
+        assert not matcher.matches("hello")
+        assert not matcher.matches("")
+        assert matcher.find("hello") == []
+    assert not legacy_contains_keyword_in_title("hello", [])
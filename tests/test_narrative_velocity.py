@@ -0,0 +1,86 @@
+import pickle
+
+import pandas as pd
+
+from narrative_velocity import NarrativeVelocity
+
+STANCES = {"Vox": 10.0, "Reuters": 50.0, "Fox News Politics": 90.0}
+
+def frame(articles, topic="immigration", cluster="0"):
+    # (outlet, datetime) pairs -> clustered articles
+    return pd.DataFrame({
+        "topic": topic, "cluster_label": cluster, "outlet": [outlet for outlet, _ in articles],
+        "datetime": [when for _, when in articles], "ideological_stance": [STANCES[o] for o, _ in articles],
+        "url": [f"https://example.com/{topic}/{cluster}/{i}" for i in range(len(articles))],
+    })
+
+# Liberal outlets start the narrative, conservative ones repeat it three hours later with
+# the same shape and a moderate one picks it up at the end
+ARTICLES = [
+    ("Vox", "2025-08-01 00:10"), ("Vox", "2025-08-01 00:40"), ("Vox", "2025-08-01 01:20"),
+    ("Fox News Politics", "2025-08-01 03:10"), ("Fox News Politics", "2025-08-01 03:50"),
+    ("Fox News Politics", "2025-08-01 04:05"), ("Reuters", "2025-08-01 06:00"),
+]
+
+def test_hourly_counts_from_first_to_last_article():
+    velocity = NarrativeVelocity()
+    assert velocity.update(frame(ARTICLES)) == 7
+
+    series = velocity.series("immigration", "0")
+    assert list(series.columns) == ["Liberal", "Moderate", "Conservative"]
+    assert series.index[0] == pd.Timestamp("2025-08-01 00:00") and len(series) == 7
+    assert series["Liberal"].tolist() == [2, 1, 0, 0, 0, 0, 0]
+    assert series["Conservative"].tolist() == [0, 0, 0, 2, 1, 0, 0]
+    assert series["Moderate"].tolist() == [0, 0, 0, 0, 0, 0, 1]
+    assert velocity.series("immigration", "0", freq="D")["Conservative"].tolist() == [3]
+    assert velocity.series("immigration", "0", by="outlet")["Vox"].sum() == 3
+
+def test_lead_lag_orders_the_followers_behind_the_leader():
+    velocity = NarrativeVelocity()
+    velocity.update(frame(ARTICLES))
+
+    lags = velocity.lead_lag("immigration", "0")
+    assert lags.loc["Liberal", "Conservative"] == 3 and lags.loc["Conservative", "Liberal"] == -3
+    assert (lags.values.diagonal() == 0).all()
+
+def test_roles_initiator_amplifier_responder():
+    velocity = NarrativeVelocity()
+    # Delivered in two batches and out of order, with one article delivered twice
+    velocity.update(frame(ARTICLES).iloc[3:])
+    assert velocity.update(frame(ARTICLES)) == 3
+
+    roles = velocity.roles("immigration", "0")
+    assert roles.index.tolist() == ["Liberal", "Conservative", "Moderate"]
+    assert roles["role"].tolist() == ["initiator", "amplifier", "responder"]
+    assert roles["articles"].tolist() == [3, 3, 1]
+    assert roles.loc["Conservative", "onset_hours"] == 3.0 and roles.loc["Conservative", "lag_hours"] == 3
+    table = velocity.roles_table()
+    assert table[["topic", "narrative", "ideology", "role"]].values.tolist()[0] == ["immigration", "0", "Liberal",
+                                                                                     "initiator"]
+
+def test_seen_urls_stay_bounded_and_nothing_is_counted_twice():
+    velocity = NarrativeVelocity(horizon="48h")
+    hours = pd.date_range("2025-08-01", periods=24 * 10, freq="h")
+    history = frame([("Vox" if i % 2 else "Fox News Politics", str(when)) for i, when in enumerate(hours)])
+    for day in range(10):
+        velocity.update(history.iloc[day * 24:(day + 1) * 24])
+        assert len(velocity.seen_urls) <= 48 + 24
+
+    # Re-reading the whole history (e.g. the CSV on every run) adds nothing
+    assert velocity.update(history) == 0
+    assert velocity.articles == 240
+    restored = pickle.loads(pickle.dumps(velocity))
+    assert restored.seen_urls == velocity.seen_urls and restored.update(history) == 0
+
+def test_state_saved_with_a_url_set_still_loads():
+    velocity = NarrativeVelocity()
+    velocity.update(frame(ARTICLES))
+    state = velocity.__getstate__()
+    state["seen_urls"] = set(state["seen_urls"])
+    del state["watermark"], state["horizon"]
+
+    restored = NarrativeVelocity.__new__(NarrativeVelocity)
+    restored.__setstate__(state)
+    assert set(restored.seen_urls) == set(velocity.seen_urls)
+    assert restored.update(frame(ARTICLES)) == 0
+    assert restored.roles("immigration", "0")["role"].tolist() == ["initiator", "amplifier", "responder"]
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+import score_bias
+
+def legacy_combined(outlet_score, model_score, weight_outlet=0.7, weight_model=0.3):
+    # The per-row formula assign_scores() replaced
+    if model_score is None:
+        return outlet_score
+    return round(weight_outlet * outlet_score + weight_model * model_score, 2)
+
+def test_combined_stance_rounds_like_the_per_row_formula():
+    # One outlet of each ideology
+    outlets = {ideology: outlet for outlet, ideology in score_bias.OUTLET_TO_IDEOLOGY.items()}
+    # Every two-decimal model score, so 0.3 * score lands on .xx5 for many of them
+    model_scores = [i / 100 for i in range(10001)] + [None]
+    rows = [(ideology, outlet, score) for ideology, outlet in outlets.items() for score in model_scores]
+    df = pd.DataFrame({"outlet": [outlet for _, outlet, _ in rows], "sample_text": "text"})
+    texts, outlet_labels, valid = score_bias.prepare_articles(df, verbose=False)
+    all_scores = [{} if score is None else {"ideological_stance": score} for _, _, score in rows]
+
+    score_bias.assign_scores(df, valid, outlet_labels, all_scores)
+
+    expected = [legacy_combined(score_bias.outlet_label_to_score[ideology], score) for ideology, _, score in rows]
+    assert df["combined_ideological_stance"].tolist() == expected
+    # 0 * 0.7 + 0.05 * 0.3 = 0.015 rounds to 0.01 with round(), 0.02 with np.round()
+    assert legacy_combined(0, 0.05) == 0.01 and np.round(0.3 * 0.05, 2) == 0.02
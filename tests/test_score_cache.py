@@ -0,0 +1,63 @@
+import score_bias
+from score_cache import ScoreCache
+
+DIMENSIONS = {"emotional_tone": ["calm", "neutral", "emotional"]}
+SCORES = {"emotional_tone": 42.0}
+
+def test_hits_ignore_whitespace(tmp_path):
+    cache = ScoreCache(str(tmp_path / "cache.sqlite"), "model", DIMENSIONS)
+    cache.put_many(["Agents  detained\nworkers"], [SCORES])
+    assert cache.get_many(["Agents detained workers ", "Other text"]) == [SCORES, None]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_model_labels_and_scoring_mode_invalidate_entries(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ScoreCache(path, score_bias.scoring_signature(), DIMENSIONS)
+    cache.put_many(["text"], [SCORES])
+    cache.close()
+
+    assert ScoreCache(path, score_bias.scoring_signature(), DIMENSIONS).get_many(["text"]) == [SCORES]
+    assert ScoreCache(path, "other-model", DIMENSIONS).get_many(["text"]) == [None]
+    relabeled = {"emotional_tone": ["calm", "emotional"]}
+    assert ScoreCache(path, score_bias.scoring_signature(), relabeled).get_many(["text"]) == [None]
+
+    signatures = {score_bias.scoring_signature()}
+    monkeypatch.setattr(score_bias, "SCORING_MODE", "lead")
+    signatures.add(score_bias.scoring_signature())
+    monkeypatch.setattr(score_bias, "LEAD_TOKENS", 128)
+    signatures.add(score_bias.scoring_signature())
+    monkeypatch.setattr(score_bias, "SCORING_MODE", "chunked")
+    signatures.add(score_bias.scoring_signature())
+    monkeypatch.setattr(score_bias, "CHUNK_AGGREGATION", "max")
+    signatures.add(score_bias.scoring_signature())
+    assert len(signatures) == 5
+    assert ScoreCache(path, score_bias.scoring_signature(), DIMENSIONS).get_many(["text"]) == [None]
+
+def test_failed_scores_are_not_cached(tmp_path):
+    cache = ScoreCache(str(tmp_path / "cache.sqlite"), "model", DIMENSIONS)
+    cache.put_many(["ok", "failed"], [SCORES, {"emotional_tone": None}])
+    assert cache.get_many(["ok", "failed"]) == [SCORES, None]
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ScoreCache(str(tmp_path / "cache.sqlite"), "model", DIMENSIONS, max_entries=2)
+    cache.put_many(["a", "b"], [SCORES, SCORES])
+    cache.conn.execute("UPDATE scores SET last_used = 0 WHERE key = ?", (cache.key("a"),))
+    cache.put_many(["c"], [SCORES])
+    assert len(cache) == 2 and cache.evicted == 1
+    assert cache.get_many(["a", "b", "c"]) == [None, SCORES, SCORES]
+
+def test_only_uncached_distinct_texts_are_scored(tmp_path, monkeypatch):
+    scored = []
+
+    def fake_score_texts(texts, **kwargs):
+        scored.extend(texts)
+        return [{"emotional_tone": float(len(text))} for text in texts]
+    monkeypatch.setattr(score_bias, "score_texts", fake_score_texts)
+
+    cache = ScoreCache(str(tmp_path / "cache.sqlite"), "model", DIMENSIONS)
+    first = score_bias.score_texts_cached(["one", "three", "one"], cache)
+    assert scored == ["one", "three"]
+    second = score_bias.score_texts_cached(["three", "fourth", "one "], cache)
+    assert scored == ["one", "three", "fourth"]
+    assert first == [{"emotional_tone": 3.0}, {"emotional_tone": 5.0}, {"emotional_tone": 3.0}]
+    assert second == [{"emotional_tone": 5.0}, {"emotional_tone": 6.0}, {"emotional_tone": 3.0}]
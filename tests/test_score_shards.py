@@ -0,0 +1,144 @@
+import json
+
+import pandas as pd
+import pytest
+
+import score_bias
+import score_shards
+
+OUTLETS = ["Fox News Politics", "Vox", "Reuters"]
+
+class Crash(Exception):
+    pass
+
+def articles(n=10):
+    # Scraper rows; row 4 has no text and row 7 an unknown outlet, so neither is scored
+    return pd.DataFrame({
+        "topic": "immigration", "outlet": [("Unknown Outlet" if i == 7 else OUTLETS[i % 3]) for i in range(n)],
+        "datetime": [f"2025-08-0{1 + i % 3} 10:00" for i in range(n)], "title": [f"title {i}" for i in range(n)],
+        "url": [f"https://example.com/{i}" for i in range(n)],
+        "sample_text": ["" if i == 4 else f"text number {i}" for i in range(n)],
+        "ideological_stance": [score_bias.OUTLET_TO_IDEOLOGY.get(OUTLETS[i % 3]) for i in range(n)],
+    })
+
+def fake_scores(text):
+    return {dim: round(len(text) * 3.7 % 100, 2) for dim in score_bias.BIAS_DIMENSIONS}
+
+@pytest.fixture
+def scoring(monkeypatch):
+    # score_texts() stand-in: texts in `failing` fail as the real one does after its retries,
+    # and after `crash_after` calls it raises as if the worker was killed
+    state = {"calls": [], "failing": set(), "crash_after": None}
+
+    def score_texts(texts, **kwargs):
+        if state["crash_after"] is not None and len(state["calls"]) >= state["crash_after"]:
+            raise Crash()
+        state["calls"].append(list(texts))
+        return [{dim: None for dim in score_bias.BIAS_DIMENSIONS} if text in state["failing"] else fake_scores(text)
+                for text in texts]
+
+    monkeypatch.setattr(score_bias, "score_texts", score_texts)
+    monkeypatch.setattr(score_bias, "apply_backend", lambda clf, *args: clf)
+    return state
+
+def run_shard(input_path, checkpoint_dir, shard=0, n_shards=1):
+    score_shards.score_shard(shard, n_shards, input_path, checkpoint_dir, 1, 2, score_shards.scoring_config(), None,
+                             make_classifier=object)
+
+def expected_table(input_path):
+    # score_bias's result on the whole table, compared with check_dtype=False as the merged
+    # one is read back from CSV
+    df = pd.read_csv(input_path)
+    texts, outlet_labels, valid = score_bias.prepare_articles(df, verbose=False)
+    score_bias.assign_scores(df, valid, outlet_labels, [fake_scores(t) for t in texts[valid]])
+    return df
+
+def test_a_killed_run_resumes_where_it_stopped(tmp_path, scoring):
+    input_csv = str(tmp_path / "articles.csv")
+    articles().to_csv(input_csv, index=False)
+    checkpoint_dir = str(tmp_path / "checkpoints")
+    score_shards.check_manifest(checkpoint_dir, input_csv, 1, score_shards.scoring_config())
+
+    scoring["crash_after"] = 2
+    with pytest.raises(Crash):
+        run_shard(input_csv, checkpoint_dir)
+    path = score_shards.shard_path(checkpoint_dir, 0, 1)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"row": 9, "sco')
+    assert sorted(score_shards.load_checkpoint(path)) == [0, 1, 2, 3]
+
+    scoring["crash_after"] = None
+    run_shard(input_csv, checkpoint_dir)
+    # Only the rows the killed run had not checkpointed are scored again
+    assert scoring["calls"][2:] == [["text number 5", "text number 6"], ["text number 8", "text number 9"]]
+
+    output_csv = str(tmp_path / "scored.csv")
+    score_shards.merge_shards(input_csv, output_csv, checkpoint_dir, 1)
+    pd.testing.assert_frame_equal(pd.read_csv(output_csv), expected_table(input_csv), check_dtype=False)
+
+def test_failed_rows_are_not_checkpointed_and_are_retried(tmp_path, scoring):
+    input_csv = str(tmp_path / "articles.csv")
+    articles().to_csv(input_csv, index=False)
+    checkpoint_dir = str(tmp_path / "checkpoints")
+    score_shards.check_manifest(checkpoint_dir, input_csv, 1, score_shards.scoring_config())
+    path = score_shards.shard_path(checkpoint_dir, 0, 1)
+    # A failed record left by an earlier version counts as not done
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"row": 0, "scores": {dim: None for dim in score_bias.BIAS_DIMENSIONS}}) + "\n")
+
+    scoring["failing"] = {"text number 5"}
+    run_shard(input_csv, checkpoint_dir)
+    assert scoring["calls"][0][0] == "text number 0"
+    assert 5 not in score_shards.load_checkpoint(path)
+    with pytest.raises(RuntimeError, match="1 rows have no checkpointed scores"):
+        score_shards.merge_shards(input_csv, str(tmp_path / "scored.csv"), checkpoint_dir, 1)
+
+    scoring["failing"] = set()
+    run_shard(input_csv, checkpoint_dir)
+    assert scoring["calls"][-1] == ["text number 5"]
+    score_shards.merge_shards(input_csv, str(tmp_path / "scored.csv"), checkpoint_dir, 1)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "scored.csv"), expected_table(input_csv), check_dtype=False)
+
+def test_merge_orders_rows_across_shards_and_can_skip_missing_ones(tmp_path, scoring):
+    input_csv = str(tmp_path / "articles.csv")
+    articles().to_csv(input_csv, index=False)
+    checkpoint_dir = str(tmp_path / "checkpoints")
+    score_shards.check_manifest(checkpoint_dir, input_csv, 3, score_shards.scoring_config())
+    for shard in (1, 0, 2):
+        run_shard(input_csv, checkpoint_dir, shard, 3)
+    output_csv = str(tmp_path / "scored.csv")
+    score_shards.merge_shards(input_csv, output_csv, checkpoint_dir, 3)
+    expected = expected_table(input_csv)
+    pd.testing.assert_frame_equal(pd.read_csv(output_csv), expected, check_dtype=False)
+
+    # Shard 1's rows are gone: they get the outlet's stance and no model scores
+    open(score_shards.shard_path(checkpoint_dir, 1, 3), "w").close()
+    score_shards.merge_shards(input_csv, output_csv, checkpoint_dir, 3, allow_missing=True)
+    merged = pd.read_csv(output_csv)
+    lost = [1, 5, 9]  # every third scored row, from the second (rows 4 and 7 are not scored)
+    assert merged.loc[lost, "framing_choices"].isna().all()
+    assert merged.loc[lost, "combined_ideological_stance"].tolist() == [
+        score_bias.outlet_label_to_score[score_bias.OUTLET_TO_IDEOLOGY[outlet]] for outlet in merged.loc[lost, "outlet"]
+    ]
+    kept = [i for i in expected.index if i not in lost]
+    pd.testing.assert_frame_equal(merged.loc[kept], expected.loc[kept], check_dtype=False)
+
+def test_datasets_are_read_and_written_through_storage(tmp_path, scoring):
+    pytest.importorskip("pyarrow")
+    import storage
+
+    input_root = str(tmp_path / "raw")
+    storage.save_table(articles(), input_root)
+    checkpoint_dir = str(tmp_path / "checkpoints")
+    score_shards.check_manifest(checkpoint_dir, input_root, 1, score_shards.scoring_config())
+    run_shard(input_root, checkpoint_dir)
+    output_root = str(tmp_path / "scored")
+    score_shards.merge_shards(input_root, output_root, checkpoint_dir, 1)
+
+    scored = storage.load_table(output_root).sort_values("url")
+    assert scored["ideological_stance"].notna().sum() == 8
+    assert scored["combined_ideological_stance"].notna().sum() == 8
+    # The manifest covers the dataset's files, so changing the input invalidates the checkpoints
+    storage.save_table(articles(12), input_root)
+    with pytest.raises(RuntimeError):
+        score_shards.check_manifest(checkpoint_dir, input_root, 1, score_shards.scoring_config())
@@ -0,0 +1,92 @@
+import collections
+
+import scrape_outlets
+from article_writer import ArticleTail
+
+def test_quotas_hold_and_no_download_is_wasted(scrape, tmp_path):
+    _, requests = scrape(max_per_ideology=4, max_per_outlet=2)
+    rows = ArticleTail(str(tmp_path / "articles.csv")).read()
+
+    per_ideology = collections.Counter(row["ideological_stance"] for row in rows)
+    per_outlet = collections.Counter(row["outlet"] for row in rows)
+    assert per_ideology == {"conservative": 4, "moderate": 4, "liberal": 4}
+    assert max(per_outlet.values()) <= 2
+    assert len({row["url"] for row in rows}) == len(rows)
+    # Every entry that passes the feed filters is accepted locally, so each download counts
+    assert requests == len(rows)
+
+def test_prefilter_drops_off_topic_and_stale_entries(scrape, tmp_path):
+    scrape(max_per_ideology=10**6, max_per_outlet=10**6)
+    rows = ArticleTail(str(tmp_path / "articles.csv")).read()
+
+    assert rows
+    assert all(scrape_outlets.KEYWORD_MATCHER.matches(row["title"]) for row in rows)
+    # make_entries(): every 2nd entry is on topic and every 5th is 45 days old; 12 entries
+    # per feed leave 5 recent on-topic ones
+    assert len(rows) == 3 * 4 * 5
+
+def test_quota_tracker_drops_duplicate_urls():
+    quota = scrape_outlets.QuotaTracker({"moderate": {"A": "", "B": ""}}, max_per_ideology=5, max_per_outlet=5)
+    row = {"url": "https://www.example.com/story/?utm_source=rss"}
+
+    assert quota.try_add("moderate", "A", row)
+    assert not quota.try_add("moderate", "B", {"url": "http://example.com/story"})
+    assert not quota.try_add("moderate", "B", {"url": "https://example.com/other"},
+                             canonical_url="https://example.com/story#top")
+    assert quota.added == 1 and quota.duplicates == 2
+    assert quota.has_url("https://example.com/story?fbclid=x")
+
+def test_quota_tracker_remaining():
+    quota = scrape_outlets.QuotaTracker({"liberal": {"A": "", "B": ""}}, max_per_ideology=3, max_per_outlet=2)
+    quota.try_add("liberal", "A", {"url": "https://example.com/1"})
+    quota.try_add("liberal", "A", {"url": "https://example.com/2"})
+
+    assert quota.remaining("liberal", "A") == 0
+    assert quota.remaining("liberal", "B") == 1
+    assert quota.outlet_full("liberal", "A") and not quota.outlet_full("liberal", "B")
+
+def test_repeat_run_appends_only_new_articles(scrape, tmp_path):
+    output_csv = str(tmp_path / "articles.csv")
+    tail = ArticleTail(output_csv)
+    scrape(output_csv)
+    first = tail.read()
+    _, requests = scrape(output_csv)
+    second = tail.read()
+
+    assert len(first) == len(second) == 12
+    assert not {row["url"] for row in first} & {row["url"] for row in second}
+    assert requests == len(second)
+    assert ArticleTail(output_csv).read() == first + second
+
+def test_without_seen_store_the_output_is_replaced(scrape, tmp_path):
+    output_csv = str(tmp_path / "articles.csv")
+    scrape(output_csv, seen_url_store=None, feed_state_path=None)
+    first = ArticleTail(output_csv).read()
+    scrape(output_csv, seen_url_store=None, feed_state_path=None)
+    # The second run saves the same number of articles again, in place of the first run's
+    assert len(first) == len(ArticleTail(output_csv).read()) == 12
+
+def test_topics_and_keywords_come_from_topics_json():
+    import score_bias
+    import topic_scheduler
+    import topics_config
+    config = topics_config.load_config()
+
+    assert scrape_outlets.topics == topics_config.topic_outlets(config)
+    assert scrape_outlets.KEYWORDS == [kw.lower() for kw in config["topics"]["immigration"]["keywords"]]
+    scheduled, _, _ = topic_scheduler.load_config()
+    assert {t.name: t.outlets for t in scheduled} == scrape_outlets.topics
+    assert set(score_bias.OUTLET_TO_IDEOLOGY) == {
+        outlet for ideologies in scrape_outlets.topics.values() for outlets in ideologies.values() for outlet in outlets
+    }
+
+def test_each_topic_filters_on_its_own_keywords():
+    assert scrape_outlets.topic_matcher("immigration").matches("ICE raids in Chicago")
+    assert not scrape_outlets.topic_matcher("Elections").matches("ICE raids in Chicago")
+    assert scrape_outlets.topic_matcher("unknown topic") is scrape_outlets.topic_matcher("immigration")
+
+def test_keywords_override_the_topic_keywords(scrape, tmp_path):
+    _, requests = scrape(keywords=["no headline has this phrase"])
+
+    assert ArticleTail(str(tmp_path / "articles.csv")).read() == []
+    assert requests == 0
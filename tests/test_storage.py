@@ -0,0 +1,72 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import score_bias
+import storage
+from article_writer import ArticleWriter
+from scrape_outlets import CSV_COLUMNS
+
+def raw_rows(n=6):
+    # Rows as the scraper writes them: ideology names in ideological_stance, blank scores
+    return [{
+        "topic": "immigration" if i % 2 else "Elections", "outlet": "Fox News Politics" if i % 3 else "Vox",
+        "datetime": f"2025-08-0{1 + i % 3} 10:00", "title": f"title {i}", "url": f"https://example.com/{i}",
+        "sample_text": f"text {i}", "ideological_stance": "conservative" if i % 3 else "liberal",
+        "factual_grounding": "", "framing_choices": "", "emotional_tone": "", "source_transparency": "",
+    } for i in range(n)]
+
+def test_non_numeric_values_in_score_columns_are_kept(tmp_path):
+    root = str(tmp_path / "raw")
+    storage.write_rows(raw_rows(), root, CSV_COLUMNS)
+    df = storage.read_articles(root).sort_values("url")
+    assert df["ideological_stance"].tolist() == ["liberal", "conservative", "conservative"] * 2
+    assert df["factual_grounding"].isna().all()
+
+    mixed = pd.DataFrame(raw_rows(2))
+    mixed["ideological_stance"] = [45.5, "liberal"]
+    storage.save_table(mixed, str(tmp_path / "mixed"))
+    assert sorted(storage.load_table(str(tmp_path / "mixed"))["ideological_stance"]) == ["45.5", "liberal"]
+
+    scored = pd.DataFrame(raw_rows(2))
+    scored["ideological_stance"] = ["45.5", " "]
+    storage.save_table(scored, str(tmp_path / "scored"))
+    stance = storage.load_table(str(tmp_path / "scored")).sort_values("url")["ideological_stance"]
+    assert stance.dtype == "float64" and stance.iloc[0] == 45.5 and pd.isna(stance.iloc[1])
+
+def test_reads_prune_topics_and_dates(tmp_path):
+    root = str(tmp_path / "articles")
+    storage.write_rows(raw_rows(12), root, CSV_COLUMNS)
+    df = storage.read_articles(root, columns=["url", "datetime"], topics=["immigration"], start="2025-08-02",
+                               end="2025-08-02")
+    assert list(df.columns) == ["url", "datetime"]
+    assert sorted(df["url"]) == sorted(f"https://example.com/{i}" for i in range(12) if i % 2 and i % 3 == 1)
+
+def test_save_table_replaces_csv_and_datasets(tmp_path):
+    for path in (str(tmp_path / "table.csv"), str(tmp_path / "table")):
+        storage.save_table(pd.DataFrame(raw_rows(6)), path)
+        storage.save_table(pd.DataFrame(raw_rows(2)), path)
+        assert len(storage.load_table(path)) == 2
+    assert sorted(os.listdir(tmp_path)) == ["table", "table.csv"]
+
+def test_article_writer_appends_every_commit_to_the_dataset(tmp_path):
+    root = str(tmp_path / "raw")
+    with ArticleWriter(str(tmp_path / "articles.csv"), CSV_COLUMNS, batch_size=4, dataset=root) as writer:
+        for row in raw_rows(6):
+            writer.write(row)
+        assert len(storage.read_articles(root)) == 4
+    assert sorted(storage.read_articles(root)["url"]) == sorted(row["url"] for row in raw_rows(6))
+
+def test_scorer_keeps_the_scraper_ideology_as_label(tmp_path):
+    root = str(tmp_path / "raw")
+    storage.write_rows(raw_rows(), root, CSV_COLUMNS)
+    df = storage.load_table(root)
+    df.loc[0, "outlet"] = "Unknown Outlet"
+    _, _, valid = score_bias.prepare_articles(df, verbose=False)
+
+    assert df["ideological_stance"].dtype == "float64" and df["ideological_stance"].isna().all()
+    assert not valid[0] and df.loc[0, "ideology_label"] in ("conservative", "liberal")
+    assert (df.loc[valid, "ideology_label"] == df.loc[valid, "outlet"].map(score_bias.OUTLET_TO_IDEOLOGY)).all()
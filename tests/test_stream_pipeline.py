@@ -0,0 +1,60 @@
+import queue
+
+import numpy as np
+
+from stream_pipeline import STOP, DeadLetters, Stage, replay_dead_letters_into
+
+def run_stage(process, items, dead_letters=None, batch_size=10):
+    inbox, outbox = queue.Queue(), queue.Queue()
+    for item in items:
+        inbox.put(item)
+    inbox.put(STOP)
+    stage = Stage("score", process, inbox, outbox, batch_size=batch_size, max_wait=0.0, dead_letters=dead_letters)
+    stage.run()
+    out = []
+    while (item := outbox.get()) is not STOP:
+        out.append(item)
+    return stage, out
+
+def fail_on_bad(rows):
+    if any(row["bad"] for row in rows):
+        raise ValueError("cannot score")
+    return [dict(row, score=np.float64(len(row["url"]))) for row in rows]
+
+def test_a_failing_batch_loses_only_the_failing_article(tmp_path):
+    dead_letters = DeadLetters(str(tmp_path / "dead.jsonl"))
+    items = [({"url": f"https://example.com/{i}", "bad": i == 3}, 1000.0 + i) for i in range(6)]
+
+    stage, out = run_stage(fail_on_bad, items, dead_letters)
+
+    assert [row["url"] for row, _ in out] == [row["url"] for row, _ in items if not row["bad"]]
+    assert [scraped_at for _, scraped_at in out] == [1000.0, 1001.0, 1002.0, 1004.0, 1005.0]
+    assert stage.metrics.errors == 1 and dead_letters.count == 1
+    [record] = DeadLetters.take(dead_letters.path)
+    assert record["stage"] == "score" and record["row"] == items[3][0] and record["scraped_at"] == 1003.0
+    assert "cannot score" in record["error"]
+
+def test_dead_letters_are_replayed_into_their_stage(tmp_path):
+    path = str(tmp_path / "dead.jsonl")
+    dead_letters = DeadLetters(path)
+    dead_letters.add("cluster", {"url": "https://example.com/a", "score": np.float64(0.5)}, 1.0, ValueError("x"))
+    dead_letters.add("score", {"url": "https://example.com/b", "bad": True}, 2.0, ValueError("y"))
+
+    records = DeadLetters.take(path)
+    # A replay that did not finish is picked up again, together with new failures
+    DeadLetters(path).add("score", {"url": "https://example.com/c", "bad": False}, 3.0, ValueError("z"))
+    records = DeadLetters.take(path)
+    assert [r["row"]["url"] for r in records] == ["https://example.com/a", "https://example.com/b",
+                                                  "https://example.com/c"]
+
+    stages = [Stage(name, fail_on_bad, queue.Queue(), queue.Queue(), dead_letters=DeadLetters(path))
+              for name in ("score", "cluster")]
+    assert replay_dead_letters_into(records, stages) == 3
+    assert stages[0].inbox.qsize() == 2 and stages[1].inbox.get() == ({"url": "https://example.com/a", "score": 0.5}, 1.0)
+
+    stages[0].inbox.put(STOP)
+    stages[0].run()
+    assert stages[0].outbox.get()[0]["url"] == "https://example.com/c"
+    DeadLetters.finish_replay(path)
+    # The article that failed again is the only one left
+    assert [r["row"]["url"] for r in DeadLetters.take(path)] == ["https://example.com/b"]
@@ -0,0 +1,354 @@
+# Multi-topic scrape scheduler.
+#
+# Topics, outlets and keywords come from a JSON config (topics.json, see topics_config): a
+# shared "outlets" table in the shape of scrape_outlets.topics, and per topic its keywords,
+# quotas, polling cadence and optionally its own outlets. Every distinct feed URL is
+# fetched at most once per cycle, however many topics and outlets list it. Its entries are
+# routed by a single KeywordMatcher over the keywords of all topics (find() reports which
+# keywords, and so which topics, a title matches). An entry that matches any topic is
+# downloaded once, then filtered and counted against the quota of each topic it matched. A
+# new topic adds keywords to the matcher, not requests.
+#
+# Every feed has its own polling interval. It starts at the shortest poll_interval of the
+# topics reading the feed, halves (down to poll.min_interval) after a poll that brought new
+# entries and grows by POLL_BACKOFF (up to poll.max_interval) after one that did not or that
+# failed. Between polls the scheduler sleeps until the next feed is due. Feeds whose topics
+# have all filled their quotas are no longer polled; the run ends when every quota is full,
+# after `cycles` polling rounds or after `duration` seconds. Accepted articles of every
+# topic are appended to one CSV through an ArticleWriter, committed after each cycle and
+# optionally rotated by size or by day.
+#
+#   python topic_scheduler.py --config topics.json --cycles 1
+import argparse
+import collections
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+
+import scrape_outlets
+import topics_config
+from article_parser import MAX_PARSE_IN_FLIGHT, PARSE_WORKERS, ParsePool
+from article_writer import ArticleWriter
+from feed_state import FeedStateStore, entry_id
+from keyword_matcher import KeywordMatcher
+from url_store import SeenUrlStore, normalize_url
+
+CONFIG_PATH = topics_config.CONFIG_PATH
+MIN_POLL_INTERVAL = 300         # seconds
+MAX_POLL_INTERVAL = 7200
+POLL_BACKOFF = 1.5
+KNOWN_IDS_PER_FEED = 2000
+
+class Topic:
+    # One topic's keyword matcher and quotas over its outlets ({ideology: {outlet: url}});
+    # a quota of None means unlimited
+    def __init__(self, name, outlets, keywords, poll_interval=MIN_POLL_INTERVAL,
+                 max_per_ideology=scrape_outlets.MAX_ARTICLES_PER_IDEOLOGY,
+                 max_per_outlet=scrape_outlets.MAX_ARTICLES_PER_OUTLET):
+        self.name = name
+        self.outlets = outlets
+        self.matcher = KeywordMatcher(keywords)
+        self.poll_interval = poll_interval
+        self.quota = scrape_outlets.QuotaTracker(
+            outlets,
+            float("inf") if max_per_ideology is None else max_per_ideology,
+            float("inf") if max_per_outlet is None else max_per_outlet,
+        )
+
+def load_config(path=CONFIG_PATH):
+    # Returns (topics, min_interval, max_interval)
+    config = topics_config.load_config(path)
+    poll = config.get("poll", {})
+    min_interval = poll.get("min_interval", MIN_POLL_INTERVAL)
+    max_interval = poll.get("max_interval", MAX_POLL_INTERVAL)
+    topics = []
+    outlets_by_topic = topics_config.topic_outlets(config)
+    for name, spec in config["topics"].items():
+        outlets = outlets_by_topic[name]
+        if not outlets:
+            raise ValueError(f"Topic '{name}' has no outlets and the config has no shared outlet table")
+        if not spec.get("keywords"):
+            raise ValueError(f"Topic '{name}' has no keywords")
+        topics.append(Topic(
+            name, outlets, spec["keywords"],
+            poll_interval=spec.get("poll_interval", min_interval),
+            max_per_ideology=spec.get("max_per_ideology", scrape_outlets.MAX_ARTICLES_PER_IDEOLOGY),
+            max_per_outlet=spec.get("max_per_outlet", scrape_outlets.MAX_ARTICLES_PER_OUTLET),
+        ))
+    return topics, min_interval, max_interval
+
+class FeedSchedule:
+    # Polling state of one feed URL and the (topic, ideology, outlet) entries that read it
+    def __init__(self, url, interval):
+        self.url = url
+        self.interval = interval
+        self.next_due = 0.0
+        self.subscribers = []
+        self.known_ids = collections.OrderedDict()
+        self.polls = 0
+        self.new_entries = 0
+
+    def wanted(self):
+        return any(not topic.quota.outlet_full(ideology, outlet) for topic, ideology, outlet in self.subscribers)
+
+    def observe(self, entries, now, min_interval, max_interval):
+        # Adapt the interval to whether the poll brought entries not returned before; the
+        # first poll only sets the baseline. entries is None for a failed poll.
+        new = 0
+        for entry in entries or []:
+            key = entry_id(entry)
+            if key not in self.known_ids:
+                self.known_ids[key] = None
+                new += 1
+        while len(self.known_ids) > KNOWN_IDS_PER_FEED:
+            self.known_ids.popitem(last=False)
+        if self.polls:
+            if new:
+                self.interval = max(min_interval, self.interval / 2)
+            else:
+                self.interval = min(max_interval, self.interval * POLL_BACKOFF)
+        self.polls += 1
+        self.new_entries += new
+        self.next_due = now + self.interval
+        return new
+
+class TopicScheduler:
+    def __init__(self, topics, min_interval=MIN_POLL_INTERVAL, max_interval=MAX_POLL_INTERVAL,
+                 output_csv="news_bias_articles.csv", max_workers=scrape_outlets.MAX_WORKERS,
+                 requests_per_second=scrape_outlets.MAX_REQUESTS_PER_SECOND,
+                 seen_url_store=scrape_outlets.SEEN_URL_STORE_PATH, feed_state_path=scrape_outlets.FEED_STATE_PATH,
+                 rotate_bytes=None, rotate_daily=False, parse_workers=PARSE_WORKERS,
+                 max_parse_in_flight=MAX_PARSE_IN_FLIGHT, dataset=None):
+        self.topics = topics
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.writer = None
+        if output_csv:
+            self.writer = ArticleWriter(output_csv, scrape_outlets.CSV_COLUMNS, rotate_bytes=rotate_bytes,
+                                        rotate_daily=rotate_daily, append=True, dataset=dataset)
+        for topic in topics:
+            topic.quota.writer = self.writer
+
+        # One matcher over every topic's keywords; keyword -> topics that listed it
+        self.keyword_topics = collections.defaultdict(set)
+        for topic in topics:
+            for keyword in topic.matcher.keywords:
+                self.keyword_topics[keyword].add(topic.name)
+        self.router = KeywordMatcher(list(self.keyword_topics))
+
+        self.feeds = {}
+        for topic in topics:
+            for ideology, outlets in topic.outlets.items():
+                for outlet, url in outlets.items():
+                    feed = self.feeds.setdefault(url, FeedSchedule(url, topic.poll_interval))
+                    feed.interval = min(feed.interval, topic.poll_interval)
+                    feed.subscribers.append((topic, ideology, outlet))
+
+        self.limiter = scrape_outlets.HostLimiter(scrape_outlets.MAX_CONNECTIONS_PER_HOST, requests_per_second)
+        self.session = scrape_outlets.make_session(max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.stats = scrape_outlets.FetchStats()
+        self.filter_stats = scrape_outlets.FilterStats()
+        self.url_store = SeenUrlStore(seen_url_store, scrape_outlets.SEEN_URL_MAX_AGE_DAYS) if seen_url_store else None
+        self.feed_state = FeedStateStore(feed_state_path) if feed_state_path else None
+        self.parser = ParsePool(parse_workers, max_parse_in_flight) if parse_workers else None
+
+        self.cycles = 0
+        self.feed_polls = 0
+        self.subscription_polls = 0
+        self.routing_seconds = 0.0
+
+    def topics_for(self, title):
+        return {name for keyword in self.router.find(title) for name in self.keyword_topics[keyword]}
+
+    def mark_handled(self, feed, entry):
+        if self.feed_state is not None:
+            self.feed_state.mark_seen(feed.url, entry)
+
+    def route(self, feed, entry, claimed):
+        # Decide which of the feed's subscribers want the entry and submit one download for
+        # all of them; returns the future, or None if nothing needs downloading
+        start = time.perf_counter()
+        if not scrape_outlets.prefilter_entry(entry, self.filter_stats, self.router):
+            self.routing_seconds += time.perf_counter() - start
+            self.mark_handled(feed, entry)
+            return None
+        title = entry.get("title", "")
+        names = self.topics_for(title) if title else None
+        candidates = [(topic, ideology, outlet) for topic, ideology, outlet in feed.subscribers
+                      if names is None or topic.name in names]
+        self.routing_seconds += time.perf_counter() - start
+
+        link = entry.get("link")
+        if link:
+            candidates = [c for c in candidates if not c[0].quota.has_url(link)]
+        if not link or not candidates:
+            self.mark_handled(feed, entry)
+            return None
+        open_candidates = [c for c in candidates if not c[0].quota.outlet_full(c[1], c[2])]
+        if not open_candidates:
+            return None     # quotas full for now; the entry stays unhandled
+        if self.url_store is not None and self.url_store.seen(link):
+            self.mark_handled(feed, entry)
+            return None
+        key = normalize_url(link)
+        if key in claimed:
+            return None     # the same article from another feed is already being fetched
+        claimed.add(key)
+        return self.executor.submit(self.process_entry, feed, entry, open_candidates)
+
+    def process_entry(self, feed, entry, candidates):
+        # Download the entry once and offer it to every candidate topic
+        candidates = [c for c in candidates if not c[0].quota.outlet_full(c[1], c[2])]
+        if not candidates:
+            return
+        url = entry.link
+        article = scrape_outlets.download_article(url, self.limiter, self.session, self.stats, self.parser)
+        if article is None:
+            return          # retried on a later poll
+
+        canonical_url = article.canonical_link or None
+        if (self.url_store is not None and canonical_url and normalize_url(canonical_url) != normalize_url(url)
+                and self.url_store.seen(canonical_url, canonical=True)):
+            self.url_store.add(url)
+            self.mark_handled(feed, entry)
+            return
+
+        deferred = False
+        for topic, ideology, outlet in candidates:
+            row = scrape_outlets.filter_article(article, entry, topic.name, ideology, outlet, url, topic.matcher)
+            if row is None:
+                continue
+            if topic.quota.try_add(ideology, outlet, row, canonical_url):
+                print(f"[{topic.name}] Added article ({topic.quota.counts[ideology]}/{topic.quota.max_per_ideology}) "
+                      f"from {outlet} ({ideology})")
+            elif not topic.quota.has_url(url):
+                deferred = True     # the quota filled up while downloading
+        if not deferred:
+            if self.url_store is not None:
+                self.url_store.add(url, canonical_url)
+            self.mark_handled(feed, entry)
+
+    def run_cycle(self):
+        # Poll every due feed once and process its entries
+        now = time.monotonic()
+        due = [feed for feed in self.feeds.values() if feed.next_due <= now and feed.wanted()]
+        polls = {self.executor.submit(scrape_outlets.fetch_feed, feed.url, self.limiter, self.session,
+                                      self.feed_state): feed for feed in due}
+        jobs = []
+        claimed = set()
+        n_entries = n_new = 0
+        before = sum(topic.quota.added for topic in self.topics)
+        for future in as_completed(polls):
+            feed = polls[future]
+            try:
+                entries = future.result()
+            except Exception as e:
+                print(f"Error fetching feed {feed.url}: {e}")
+                entries = None
+            n_new += feed.observe(entries, time.monotonic(), self.min_interval, self.max_interval)
+            for entry in entries or []:
+                n_entries += 1
+                job = self.route(feed, entry, claimed)
+                if job is not None:
+                    jobs.append(job)
+        wait(jobs)
+        for job in jobs:
+            if job.exception() is not None:
+                print(f"Error processing article: {job.exception()}")
+
+        self.cycles += 1
+        self.feed_polls += len(due)
+        self.subscription_polls += sum(len(feed.subscribers) for feed in due)
+        if self.writer is not None:
+            self.writer.commit()
+        if self.feed_state is not None:
+            self.feed_state.save()
+        added = sum(topic.quota.added for topic in self.topics) - before
+        print(f"Cycle {self.cycles}: polled {len(due)} feeds for {sum(len(f.subscribers) for f in due)} "
+              f"topic/outlet subscriptions, {n_entries} entries ({n_new} new), {len(jobs)} downloads, "
+              f"{added} articles added")
+        return added
+
+    def run(self, cycles=None, duration=None):
+        # Poll until every quota is full, `cycles` rounds have run or `duration` seconds passed,
+        # sleeping until the next feed is due in between
+        deadline = None if duration is None else time.monotonic() + duration
+        try:
+            while True:
+                if all(topic.quota.all_full() for topic in self.topics):
+                    print("All topic quotas filled")
+                    break
+                if cycles is not None and self.cycles >= cycles:
+                    break
+                wanted = [feed for feed in self.feeds.values() if feed.wanted()]
+                if not wanted:
+                    print("No feed left for the unfilled quotas")
+                    break
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                next_due = min(feed.next_due for feed in wanted)
+                if next_due > now:
+                    time.sleep(next_due - now if deadline is None else min(next_due - now, deadline - now))
+                    continue
+                self.run_cycle()
+        finally:
+            self.close()
+        return {topic.name: topic.quota.added for topic in self.topics}
+
+    def summary(self):
+        lines = [
+            f"{self.cycles} cycles: {self.feed_polls} feed requests for {self.subscription_polls} topic/outlet "
+            f"subscriptions ({len(self.feeds)} distinct feeds, {len(self.topics)} topics); "
+            f"routing entries to topics took {self.routing_seconds * 1000:.1f} ms",
+        ]
+        for topic in self.topics:
+            counts = ", ".join(f"{ideology} {n}" for ideology, n in topic.quota.counts.items())
+            lines.append(f"  {topic.name}: {topic.quota.added} articles ({counts}), "
+                         f"{topic.quota.duplicates} duplicates dropped")
+        intervals = sorted(feed.interval for feed in self.feeds.values())
+        if intervals:
+            lines.append(f"  poll intervals: min {intervals[0]:.0f}s, median {intervals[len(intervals) // 2]:.0f}s, "
+                         f"max {intervals[-1]:.0f}s")
+        return "\n".join(lines)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+        if self.parser is not None:
+            self.parser.close()
+        print(f"Scheduler done: {self.summary()}")
+        if self.writer is not None:
+            self.writer.close()
+            print(f"Articles saved: {self.writer.summary()}")
+        print(f"Fetching: {self.stats.summary()}")
+        if self.parser is not None:
+            print(self.parser.summary())
+        print(f"Pre-download filters: {self.filter_stats.summary()}")
+        if self.url_store is not None:
+            print(self.url_store.summary())
+            self.url_store.close()
+        if self.feed_state is not None:
+            print(self.feed_state.summary())
+            self.feed_state.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape every configured topic from one shared set of feed polls")
+    parser.add_argument("--config", default=CONFIG_PATH)
+    parser.add_argument("--output", default="news_bias_articles.csv", help="CSV the new articles are appended to")
+    parser.add_argument("--cycles", type=int, help="stop after this many polling rounds")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--workers", type=int, default=scrape_outlets.MAX_WORKERS)
+    parser.add_argument("--requests-per-second", type=float, default=scrape_outlets.MAX_REQUESTS_PER_SECOND)
+    parser.add_argument("--rotate-mb", type=float, help="start a new output file after this many MB")
+    parser.add_argument("--rotate-daily", action="store_true", help="start a new output file every day")
+    parser.add_argument("--dataset", help="also append the new articles to this Parquet dataset (storage.py)")
+    parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS,
+                        help="processes parsing downloaded pages; 0 parses in the download threads")
+    args = parser.parse_args()
+
+    topics, min_interval, max_interval = load_config(args.config)
+    scheduler = TopicScheduler(topics, min_interval, max_interval, args.output, args.workers, args.requests_per_second,
+                               rotate_bytes=int(args.rotate_mb * 2**20) if args.rotate_mb else None,
+                               rotate_daily=args.rotate_daily, parse_workers=args.parse_workers, dataset=args.dataset)
+    scheduler.run(args.cycles, args.duration)
@@ -0,0 +1,33 @@
+# Topics, outlets and keywords, read from topics.json (next to this file). It is the one
+# place they are defined: scrape_outlets builds its topics table and keyword lists from
+# it, topic_scheduler its Topics and score_bias its outlet -> ideology map.
+#
+# The config has a shared "outlets" table ({ideology: {outlet: feed url}}), a "topics"
+# table with per topic its keywords, quotas, polling cadence and optionally its own
+# outlets, and "poll" limits for topic_scheduler.
+import json
+import os
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "topics.json")
+
+def load_config(path=CONFIG_PATH):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def topic_outlets(config):
+    # {topic: {ideology: {outlet: feed url}}}; a topic without its own outlets reads the
+    # shared table (None if there is none)
+    return {name: spec.get("outlets", config.get("outlets")) for name, spec in config["topics"].items()}
+
+def topic_keywords(config):
+    # {topic: lowercased title keywords}
+    return {name: [kw.lower() for kw in spec.get("keywords", [])] for name, spec in config["topics"].items()}
+
+def outlet_ideologies(config):
+    # {outlet: ideology} over the shared table and every topic's own outlets
+    mapping = {}
+    for ideologies in [config.get("outlets")] + list(topic_outlets(config).values()):
+        for ideology, outlets in (ideologies or {}).items():
+            for outlet in outlets:
+                mapping[outlet] = ideology
+    return mapping
@@ -0,0 +1,96 @@
+import sqlite3
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "cmpid", "intcmp", "smid", "smtyp",
+    "ocid", "taid", "ref", "ref_src", "_ga", "guccounter",
+}
+
+def normalize_url(url):
+    # Canonical form used as the dedup key: https, lowercase host without "www.", no
+    # default port, fragment, tracking parameters or trailing slash, sorted query
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+class SeenUrlStore:
+    # Normalized URLs of articles already scraped, kept in SQLite between runs.
+    #
+    # The scraper records a URL once it is saved or has been downloaded and rejected by the
+    # content filters, and skips it in later runs before any request is made. Entries not
+    # seen for max_age_days are evicted when the store is opened; by then the article has
+    # also dropped out of the is_recent() window. Lookups come from worker threads, so the
+    # connection is shared under a lock.
+    def __init__(self, path, max_age_days=30):
+        self.path = path
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.canonical_hits = 0
+        self.added = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_urls ("
+            "url TEXT PRIMARY KEY, first_seen REAL NOT NULL, last_seen REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS seen_urls_last_seen ON seen_urls (last_seen)")
+        self.conn.commit()
+        self.evicted = self.evict()
+
+    def seen(self, url, canonical=False):
+        # True if the URL was recorded before; counts a hit (per run and per URL)
+        key = normalize_url(url)
+        with self.lock:
+            found = self.conn.execute("SELECT 1 FROM seen_urls WHERE url = ?", (key,)).fetchone() is not None
+            if found:
+                self.conn.execute("UPDATE seen_urls SET hits = hits + 1, last_seen = ? WHERE url = ?",
+                                  (time.time(), key))
+                self.conn.commit()
+                if canonical:
+                    self.canonical_hits += 1
+                else:
+                    self.hits += 1
+        return found
+
+    def add(self, *urls):
+        now = time.time()
+        keys = {normalize_url(url) for url in urls if url}
+        with self.lock:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen_urls (url, first_seen, last_seen) VALUES (?, ?, ?)",
+                [(key, now, now) for key in keys],
+            )
+            self.conn.commit()
+            self.added += self.conn.total_changes - before
+
+    def evict(self):
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM seen_urls WHERE last_seen < ?", (time.time() - self.max_age,))
+            self.conn.commit()
+        return cursor.rowcount
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM seen_urls").fetchone()[0]
+
+    def summary(self):
+        return (
+            f"seen-URL store: {self.hits} entries skipped before download, {self.canonical_hits} by canonical link "
+            f"after download, {self.added} URLs added, {self.evicted} expired, {len(self)} stored in {self.path}"
+        )
+
+    def close(self):
+        self.conn.close()